@@ -1,10 +1,12 @@
 from .password import verify_password, get_password_hash
 from .jwt import create_access_token, verify_token, get_current_user
+from .principal import CurrentUser
 
 __all__ = [
     "verify_password",
     "get_password_hash", 
     "create_access_token",
     "verify_token",
-    "get_current_user"
+    "get_current_user",
+    "CurrentUser"
 ]
\ No newline at end of file
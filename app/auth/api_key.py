@@ -0,0 +1,150 @@
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from datetime import datetime
+from typing import Dict, FrozenSet, NamedTuple, Optional, Tuple
+from sqlalchemy import update, bindparam
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from app.models.api_key import ApiKey
+from app.utils.cache import TTLCache
+from app.diagnostics.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+# 密钥格式：dbt_<前缀>_<随机串>，前缀用于索引查找，完整密钥只在创建时返回一次
+API_KEY_MARKER = "dbt_"
+_PREFIX_BYTES = 6
+_SECRET_BYTES = 32
+
+class ApiKeyIdentity(NamedTuple):
+    """校验通过的API密钥"""
+    id: int
+    user_id: int
+    scopes: FrozenSet[str]
+    expires_at: Optional[datetime]
+    key_digest: str
+
+def is_api_key(token: str) -> bool:
+    """判断凭据是否为API密钥（而非JWT）"""
+    return token.startswith(API_KEY_MARKER)
+
+def generate_api_key() -> Tuple[str, str]:
+    """生成新的API密钥，返回(完整密钥, 前缀)"""
+    prefix = secrets.token_hex(_PREFIX_BYTES)
+    return f"{API_KEY_MARKER}{prefix}_{secrets.token_urlsafe(_SECRET_BYTES)}", prefix
+
+def parse_api_key_prefix(api_key: str) -> Optional[str]:
+    """从完整密钥中取出前缀，格式不正确时返回None"""
+    if not is_api_key(api_key):
+        return None
+    prefix, sep, secret = api_key[len(API_KEY_MARKER):].partition("_")
+    if not sep or not secret or len(prefix) != _PREFIX_BYTES * 2:
+        return None
+    return prefix
+
+def hash_api_key(api_key: str) -> str:
+    """计算密钥的HMAC-SHA256摘要
+    
+    密钥本身是高熵随机串，不需要bcrypt这类慢哈希；使用服务端密钥做HMAC，
+    即使数据库泄露也无法离线验证密钥。
+    """
+    secret = (settings.api_key_secret or settings.secret_key).encode()
+    return hmac.new(secret, api_key.encode(), hashlib.sha256).hexdigest()
+
+def _utc_naive(value: Optional[datetime]) -> Optional[datetime]:
+    """统一为不带时区的UTC时间，便于与datetime.utcnow()比较"""
+    if value is not None and value.tzinfo is not None:
+        value = (value - value.utcoffset()).replace(tzinfo=None)
+    return value
+
+# 按前缀缓存密钥记录，命中时只需一次HMAC和常量时间比较，不访问数据库；
+# 吊销时删除本进程缓存，其他进程最多在TTL后失效
+_api_key_cache = TTLCache("api_keys", ttl=settings.api_key_cache_ttl_seconds, maxsize=4096)
+
+def invalidate_api_key(prefix: str) -> None:
+    """删除密钥的缓存记录"""
+    _api_key_cache.delete(prefix)
+
+class _LastUsedRecorder:
+    """在内存中汇总密钥最后使用时间，由后台线程定期批量写入数据库"""
+    
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+    
+    def touch(self, key_id: int) -> None:
+        with self._lock:
+            self._pending[key_id] = datetime.utcnow()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="api-key-last-used", daemon=True)
+                self._thread.start()
+    
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+    
+    def flush(self) -> None:
+        """把汇总的最后使用时间一次性写入数据库"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        
+        table = ApiKey.__table__
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(table).where(table.c.id == bindparam("key_id")).values(last_used_at=bindparam("used_at")),
+                [{"key_id": key_id, "used_at": used_at} for key_id, used_at in pending.items()]
+            )
+            db.commit()
+        except Exception:
+            logger.exception("写入API密钥最后使用时间失败")
+            db.rollback()
+        finally:
+            db.close()
+
+_last_used = _LastUsedRecorder(settings.api_key_last_used_flush_seconds)
+
+def flush_api_key_usage() -> None:
+    """立即写入尚未落库的最后使用时间（关闭应用时调用）"""
+    _last_used.flush()
+
+@traced("auth.authenticate_api_key")
+def authenticate_api_key(db: Session, api_key: str) -> Optional[ApiKeyIdentity]:
+    """校验API密钥：按前缀索引查找（或命中缓存），再常量时间比较HMAC摘要"""
+    prefix = parse_api_key_prefix(api_key)
+    if prefix is None:
+        return None
+    
+    identity = _api_key_cache.get(prefix)
+    if identity is None:
+        row = db.query(
+            ApiKey.id, ApiKey.user_id, ApiKey.scopes, ApiKey.expires_at, ApiKey.key_digest
+        ).filter(ApiKey.prefix == prefix, ApiKey.is_active == True).first()
+        if row is None:
+            return None
+        identity = ApiKeyIdentity(
+            id=row.id,
+            user_id=row.user_id,
+            scopes=frozenset(row.scopes.split(",")),
+            expires_at=_utc_naive(row.expires_at),
+            key_digest=row.key_digest
+        )
+        _api_key_cache.set(prefix, identity)
+    
+    if not hmac.compare_digest(hash_api_key(api_key), identity.key_digest):
+        return None
+    if identity.expires_at is not None and identity.expires_at <= datetime.utcnow():
+        return None
+    
+    _last_used.touch(identity.id)
+    return identity
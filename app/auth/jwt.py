@@ -1,15 +1,24 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.config import settings
 from app.database import get_db
+from app.database.statements import USER_BY_USERNAME, USER_ROLE_NAMES
 from app.models.user import User
+from app.auth.api_key import ApiKeyIdentity, is_api_key, authenticate_api_key
+from app.auth.principal import CurrentUser
+from app.auth.versions import get_cached_auth_version, remember_auth_versions
+from app.diagnostics.tracing import traced
 
 security = HTTPBearer()
 
+# API密钥没有write范围时只允许这些方法
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+@traced("auth.create_access_token")
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建访问令牌"""
     to_encode = data.copy()
@@ -22,6 +31,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
     return encoded_jwt
 
+def build_token_claims(user: User, role_names: List[str]) -> dict:
+    """构建令牌声明：携带授权所需的信息和授权版本号，版本号仍为最新时无需查询数据库"""
+    return {
+        "sub": user.username,
+        "uid": user.id,
+        "active": user.is_active,
+        "su": user.is_superuser,
+        "roles": role_names,
+        "ver": user.auth_version,
+    }
+
+def _load_current_user(db: Session, user: User) -> CurrentUser:
+    """根据数据库中的用户构建当前用户"""
+    role_names = list(db.execute(USER_ROLE_NAMES, {"user_id": user.id}).scalars())
+    return CurrentUser(user.id, user.username, user.is_active, user.is_superuser, role_names)
+
+def current_user_from_claims(payload: dict) -> Optional[CurrentUser]:
+    """令牌的授权版本号与缓存一致时直接根据声明构建当前用户，否则返回None（需要查询数据库）"""
+    user_id = payload.get("uid")
+    version = payload.get("ver")
+    if user_id is not None and version is not None and get_cached_auth_version(user_id) == version:
+        return CurrentUser.from_claims(payload)
+    return None
+
+def load_token_user(db: Session, payload: dict) -> Optional[CurrentUser]:
+    """按令牌的sub查询数据库构建当前用户，用户不存在时返回None"""
+    user = db.execute(USER_BY_USERNAME, {"username": payload["sub"]}).scalar_one_or_none()
+    if user is None:
+        return None
+    remember_auth_versions([(user.id, user.auth_version)])
+    
+    # 令牌仍是最新版本（只是本进程尚未缓存）
+    if payload.get("uid") == user.id and payload.get("ver") == user.auth_version:
+        return CurrentUser.from_claims(payload)
+    return _load_current_user(db, user)
+
+def load_api_key_user(db: Session, identity: ApiKeyIdentity) -> Optional[CurrentUser]:
+    """构建API密钥所属用户，用户不存在时返回None"""
+    user = db.get(User, identity.user_id)
+    if user is None:
+        return None
+    return _load_current_user(db, user)
+
+@traced("auth.verify_token")
 def verify_token(token: str) -> Optional[dict]:
     """验证令牌"""
     try:
@@ -31,16 +84,35 @@ def verify_token(token: str) -> Optional[dict]:
         return None
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
-    """获取当前用户"""
+) -> CurrentUser:
+    """获取当前用户（Bearer凭据可以是JWT或API密钥）
+    
+    JWT的授权版本号与缓存中的一致时直接使用令牌声明，不访问数据库；
+    版本号过期、未缓存或是旧格式令牌时回退到数据库查询。
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    if is_api_key(credentials.credentials):
+        identity = authenticate_api_key(db, credentials.credentials)
+        if identity is None:
+            raise credentials_exception
+        if "write" not in identity.scopes and request.method not in READ_ONLY_METHODS:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="API密钥权限范围不足"
+            )
+        current_user = load_api_key_user(db, identity)
+        if current_user is None:
+            raise credentials_exception
+        return current_user
+    
     try:
         payload = verify_token(credentials.credentials)
         if payload is None:
@@ -49,18 +121,31 @@ def get_current_user(
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-            
+    
     except JWTError:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
-    if user is None:
-        raise credentials_exception
+    current_user = current_user_from_claims(payload)
+    if current_user is not None:
+        return current_user
     
-    return user
+    current_user = load_token_user(db, payload)
+    if current_user is None:
+        raise credentials_exception
+    return current_user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """获取当前活跃用户"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user
\ No newline at end of file
+    return current_user
+
+def require_admin(current_user: CurrentUser) -> None:
+    """管理员接口的权限检查：需要admin角色或超级用户"""
+    role_names = current_user.role_names
+    
+    if "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
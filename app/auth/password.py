@@ -1,16 +1,62 @@
+import time
 from passlib.context import CryptContext
+from passlib.hash import bcrypt as bcrypt_hash
 from app.config import settings
+from app.diagnostics.tracing import traced
+
+def calibrate_bcrypt_rounds(
+    target_ms: float,
+    min_rounds: int = 10,
+    max_rounds: int = 16
+) -> int:
+    """根据目标验证耗时校准bcrypt轮数
+
+    从min_rounds开始逐级测量单次验证耗时（每加一轮耗时约翻倍），
+    返回不超过目标耗时的最大轮数；即使最小轮数也超时，仍返回min_rounds。
+    """
+    best = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        hashed = bcrypt_hash.using(rounds=rounds).hash("calibration")
+        start = time.perf_counter()
+        bcrypt_hash.verify("calibration", hashed)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms > target_ms:
+            break
+        best = rounds
+    return best
+
+def _build_context() -> CryptContext:
+    """创建密码上下文
+    
+    轮数来自BCRYPT_ROUNDS（由 scripts/calibrate_bcrypt.py 校准一次后写入配置），
+    所有工作进程使用相同成本。只设置最小轮数：低于该成本的旧哈希在登录时升级，
+    成本更高的哈希保持不变，不会被降级重写。
+    """
+    options = {}
+    if settings.bcrypt_rounds and "bcrypt" in settings.pwd_context_schemes:
+        options = {
+            "bcrypt__default_rounds": settings.bcrypt_rounds,
+            "bcrypt__min_rounds": settings.bcrypt_rounds,
+        }
+    return CryptContext(
+        schemes=settings.pwd_context_schemes,
+        deprecated=settings.pwd_context_deprecated,
+        **options
+    )
 
 # 创建密码上下文
-pwd_context = CryptContext(
-    schemes=settings.pwd_context_schemes,
-    deprecated=settings.pwd_context_deprecated
-)
+pwd_context = _build_context()
 
+@traced("auth.verify_password")
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
     return pwd_context.verify(plain_password, hashed_password)
 
+@traced("auth.get_password_hash")
 def get_password_hash(password: str) -> str:
     """生成密码哈希"""
-    return pwd_context.hash(password)
\ No newline at end of file
+    return pwd_context.hash(password)
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """判断密码哈希是否需要按当前方案和成本重新生成"""
+    return pwd_context.needs_update(hashed_password)
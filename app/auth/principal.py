@@ -0,0 +1,29 @@
+from typing import Iterable
+
+class CurrentUser:
+    """已认证的请求者
+    
+    来自JWT声明或数据库，只包含授权所需的信息；需要用户的完整资料时请按id查询。
+    """
+    __slots__ = ("id", "username", "is_active", "is_superuser", "role_names")
+    
+    def __init__(self, id: int, username: str, is_active: bool, is_superuser: bool, role_names: Iterable[str]):
+        self.id = id
+        self.username = username
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        self.role_names = list(role_names)
+    
+    @classmethod
+    def from_claims(cls, payload: dict) -> "CurrentUser":
+        """根据令牌声明构建"""
+        return cls(
+            id=payload["uid"],
+            username=payload["sub"],
+            is_active=payload["active"],
+            is_superuser=payload["su"],
+            role_names=payload["roles"]
+        )
+    
+    def __repr__(self):
+        return f"<CurrentUser(id={self.id}, username='{self.username}')>"
@@ -0,0 +1,29 @@
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.user import User
+from app.utils.cache import TTLCache
+
+# 用户授权版本号的进程内缓存，以users.auth_version为准；
+# 本进程内的变更立即生效，其他进程最多在TTL后看到新版本
+_auth_versions = TTLCache("auth_versions", ttl=settings.auth_version_cache_ttl_seconds, maxsize=100000)
+
+def get_cached_auth_version(user_id: int) -> Optional[int]:
+    """获取缓存的授权版本号，未缓存时返回None"""
+    return _auth_versions.get(user_id)
+
+def remember_auth_versions(versions: Iterable[Tuple[int, int]]) -> None:
+    """缓存(用户ID, 授权版本号)"""
+    for user_id, version in versions:
+        _auth_versions.set(user_id, version)
+
+def bump_auth_versions(db: Session, *criteria, **values) -> List[Tuple[int, int]]:
+    """在当前事务中递增符合条件的用户的授权版本号（可同时更新values中的字段），返回(用户ID, 新版本号)
+    
+    不提交；调用方提交后应调用remember_auth_versions更新缓存。
+    """
+    rows = db.execute(
+        update(User).where(*criteria).values(**values, auth_version=User.auth_version + 1).returning(User.id, User.auth_version)
+    ).all()
+    return [(user_id, version) for user_id, version in rows]
@@ -0,0 +1,5 @@
+from .broadcaster import change_broadcaster
+from .recorder import record_change, record_changes, entity_data
+from .feed import change_feed
+
+__all__ = ["change_broadcaster", "record_change", "record_changes", "entity_data", "change_feed"]
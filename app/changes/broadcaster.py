@@ -0,0 +1,92 @@
+import asyncio
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set
+from app.config import settings
+
+# 去重时记住的最近事件ID数量（监听重连补发时可能与已推送的事件重叠）
+RECENT_IDS = 10000
+
+class ChangeSubscription:
+    """一个推送连接的待发送队列，收到None表示连接应结束（队列溢出或服务停止）"""
+    __slots__ = ("queue",)
+    
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Optional[Dict]]" = asyncio.Queue(maxsize=maxsize)
+
+class ChangeBroadcaster:
+    """进程内变更广播
+    
+    publish可以在任意线程调用（同步路由和后台任务都在线程池中提交事务），
+    事件通过call_soon_threadsafe交给事件循环，再放入每个订阅连接的队列。
+    某个连接跟不上时不阻塞其他连接：清空它的队列并让它结束，客户端带Last-Event-ID重连后从事件日志补发。
+    """
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        # 为True时事件由PostgreSQL监听器统一投递，本进程提交后不再直接投递
+        self.remote = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Set[ChangeSubscription] = set()
+        self._recent_ids: "OrderedDict[int, None]" = OrderedDict()
+    
+    def start(self) -> None:
+        """绑定当前事件循环，之后才开始投递"""
+        self._loop = asyncio.get_running_loop()
+    
+    def stop(self) -> None:
+        """停止投递并结束所有连接"""
+        self._loop = None
+        for subscription in list(self._subscribers):
+            self._close(subscription)
+        self._subscribers.clear()
+    
+    def subscribe(self) -> ChangeSubscription:
+        """订阅变更（在事件循环中调用）"""
+        subscription = ChangeSubscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+    
+    def unsubscribe(self, subscription: ChangeSubscription) -> None:
+        """取消订阅"""
+        self._subscribers.discard(subscription)
+    
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+    
+    def publish(self, events: List[Dict]) -> None:
+        """投递已提交的变更事件，未启动时丢弃"""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(events)
+        else:
+            loop.call_soon_threadsafe(self._deliver, events)
+    
+    def _deliver(self, events: List[Dict]) -> None:
+        for event in sorted(events, key=lambda event: event["id"]):
+            if event["id"] in self._recent_ids:
+                continue
+            self._recent_ids[event["id"]] = None
+            if len(self._recent_ids) > RECENT_IDS:
+                self._recent_ids.popitem(last=False)
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    self._subscribers.discard(subscription)
+                    self._close(subscription)
+    
+    @staticmethod
+    def _close(subscription: ChangeSubscription) -> None:
+        queue = subscription.queue
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+change_broadcaster = ChangeBroadcaster(settings.change_feed_queue_size)
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+from app.database import SessionLocal, write_engine
+from .broadcaster import change_broadcaster
+from .listener import PostgresChangeListener
+from .recorder import prune_changes
+
+logger = logging.getLogger(__name__)
+
+# 清理过期事件日志的间隔（秒）
+PRUNE_INTERVAL = 3600
+
+class ChangeFeed:
+    """变更推送的启动和停止
+    
+    PostgreSQL下启动LISTEN/NOTIFY监听线程，跨进程推送；其他数据库（SQLite、测试）只在本进程内广播。
+    同时定期清理超过保留时间的事件日志。
+    """
+    
+    def __init__(self):
+        self._listener: Optional[PostgresChangeListener] = None
+        self._prune_task: Optional[asyncio.Task] = None
+    
+    async def start(self) -> None:
+        """启动广播、PostgreSQL监听线程和定期清理"""
+        change_broadcaster.start()
+        if write_engine.dialect.name == "postgresql":
+            self._listener = PostgresChangeListener(write_engine, change_broadcaster)
+            change_broadcaster.remote = True
+            self._listener.start()
+        self._prune_task = asyncio.get_running_loop().create_task(self._prune_periodically())
+    
+    async def stop(self) -> None:
+        """停止推送并结束所有连接"""
+        if self._prune_task is not None:
+            self._prune_task.cancel()
+            try:
+                await self._prune_task
+            except asyncio.CancelledError:
+                pass
+            self._prune_task = None
+        if self._listener is not None:
+            await run_in_threadpool(self._listener.stop)
+            self._listener = None
+            change_broadcaster.remote = False
+        change_broadcaster.stop()
+    
+    async def _prune_periodically(self) -> None:
+        retention = timedelta(hours=settings.change_feed_retention_hours)
+        while True:
+            try:
+                deleted = await run_in_threadpool(self._prune, retention)
+                if deleted:
+                    logger.info("清理过期变更事件 %d 条", deleted)
+            except Exception:
+                logger.exception("清理过期变更事件失败")
+            await asyncio.sleep(PRUNE_INTERVAL)
+    
+    @staticmethod
+    def _prune(retention: timedelta) -> int:
+        db = SessionLocal()
+        try:
+            return prune_changes(db, retention)
+        finally:
+            db.close()
+
+change_feed = ChangeFeed()
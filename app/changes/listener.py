@@ -0,0 +1,106 @@
+import logging
+import select
+import threading
+from typing import Callable, Dict, List, Optional, TypeVar
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import SessionLocal
+from .broadcaster import ChangeBroadcaster
+from .recorder import CHANNEL, load_changes_by_ids, load_changes_after, latest_change_id
+
+logger = logging.getLogger(__name__)
+
+# 等待通知时的轮询间隔（秒），用于及时响应停止
+POLL_INTERVAL = 1.0
+MAX_RECONNECT_DELAY = 30.0
+
+T = TypeVar("T")
+
+class PostgresChangeListener:
+    """PostgreSQL LISTEN/NOTIFY监听线程
+    
+    使用一个脱离连接池的专用连接LISTEN变更通道，收到通知后按负载中的事件ID加载事件并投递，
+    因此任意进程提交的变更都会推送给本进程的连接。连接断开后自动重连，并补发断开期间的事件。
+    """
+    
+    def __init__(self, engine: Engine, broadcaster: ChangeBroadcaster):
+        self.engine = engine
+        self.broadcaster = broadcaster
+        self._last_id: Optional[int] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self) -> None:
+        """启动监听线程"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> None:
+        """停止监听"""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(POLL_INTERVAL * 2)
+            self._thread = None
+    
+    def _run(self) -> None:
+        delay = 1.0
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+                delay = 1.0
+            except Exception:
+                logger.exception("变更通知监听连接异常，%.0f秒后重连", delay)
+                self._stopped.wait(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY)
+    
+    def _listen(self) -> None:
+        connection = self.engine.raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {CHANNEL}")
+            self._backfill()
+            
+            while not self._stopped.is_set():
+                if select.select([dbapi_connection], [], [], POLL_INTERVAL) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                ids = []
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    ids.extend(int(event_id) for event_id in notify.payload.split(",") if event_id)
+                if ids:
+                    self._publish(self._load(lambda db: load_changes_by_ids(db, ids)))
+        finally:
+            connection.close()
+    
+    def _backfill(self) -> None:
+        """首次连接时记录当前位置；重连后补发断开期间提交的事件（重叠部分由广播器按ID去重）"""
+        if self._last_id is None:
+            self._last_id = self._load(latest_change_id)
+            return
+        last_id = self._last_id
+        events, _ = self._load(lambda db: load_changes_after(
+            db, last_id, settings.change_feed_replay_limit,
+            overlap_seconds=settings.change_feed_resume_overlap_seconds
+        ))
+        self._publish(events)
+    
+    @staticmethod
+    def _load(query: Callable[[Session], T]) -> T:
+        db = SessionLocal()
+        try:
+            return query(db)
+        finally:
+            db.close()
+    
+    def _publish(self, events: List[Dict]) -> None:
+        if events:
+            self._last_id = max(self._last_id or 0, events[-1]["id"])
+            self.broadcaster.publish(events)
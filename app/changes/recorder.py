@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event, insert, select, delete, func
+from sqlalchemy.orm import Session
+from app.models.change_event import ChangeEvent
+from .broadcaster import change_broadcaster
+
+# PostgreSQL LISTEN/NOTIFY通道
+CHANNEL = "dbatools_changes"
+
+# NOTIFY负载上限为8000字节，事件ID分批发送
+NOTIFY_PAYLOAD_LIMIT = 7000
+
+_PENDING_KEY = "pending_changes"
+
+# 各实体在created/updated事件中推送的字段（不含密码哈希等敏感字段）
+ENTITY_FIELDS = {
+    "user": ("username", "email", "full_name", "is_active", "is_superuser"),
+    "role": ("name", "display_name", "description", "is_active"),
+    "permission": ("name", "display_name", "description", "resource", "action", "is_active"),
+}
+
+def entity_data(entity: str, obj) -> dict:
+    """取出实体需要推送的字段"""
+    return {field: getattr(obj, field) for field in ENTITY_FIELDS[entity]}
+
+def record_change(db: Session, entity: str, action: str, entity_id: int, data: Optional[dict] = None) -> None:
+    """记录一条变更事件"""
+    record_changes(db, entity, action, [(entity_id, data)])
+
+def record_changes(
+    db: Session,
+    entity: str,
+    action: str,
+    changes: Sequence[Tuple[int, Optional[dict]]]
+) -> None:
+    """在当前事务中写入变更事件日志，不提交
+    
+    事件随触发变更的写操作一起提交，提交后才推送；回滚时一并丢弃。
+    PostgreSQL下同时在事务中发出NOTIFY（提交时才送达），其他进程的监听器据此推送给各自的连接。
+    """
+    if not changes:
+        return
+    rows = db.execute(
+        insert(ChangeEvent).returning(
+            ChangeEvent.id, ChangeEvent.created_at, sort_by_parameter_order=True
+        ),
+        [{"entity": entity, "action": action, "entity_id": entity_id, "data": data} for entity_id, data in changes]
+    ).all()
+    
+    events = [
+        _event_dict(row.id, entity, action, entity_id, data, row.created_at)
+        for row, (entity_id, data) in zip(rows, changes)
+    ]
+    db.info.setdefault(_PENDING_KEY, []).extend(events)
+    
+    if db.get_bind().dialect.name == "postgresql":
+        for payload in _notify_payloads([event["id"] for event in events]):
+            db.execute(select(func.pg_notify(CHANNEL, payload)))
+
+def _notify_payloads(ids: List[int]) -> Iterable[str]:
+    payload = ""
+    for event_id in ids:
+        item = str(event_id)
+        if payload and len(payload) + len(item) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            yield payload
+            payload = ""
+        payload = f"{payload},{item}" if payload else item
+    if payload:
+        yield payload
+
+def _event_dict(
+    event_id: int,
+    entity: str,
+    action: str,
+    entity_id: int,
+    data: Optional[dict],
+    created_at: Optional[datetime]
+) -> Dict:
+    return {
+        "id": event_id,
+        "entity": entity,
+        "action": action,
+        "entity_id": entity_id,
+        "data": data,
+        "created_at": created_at.isoformat() if created_at else None,
+    }
+
+def _row_to_event(row: ChangeEvent) -> Dict:
+    return _event_dict(row.id, row.entity, row.action, row.entity_id, row.data, row.created_at)
+
+def load_changes_by_ids(db: Session, ids: List[int]) -> List[Dict]:
+    """按ID加载变更事件"""
+    rows = db.query(ChangeEvent).filter(ChangeEvent.id.in_(ids)).order_by(ChangeEvent.id).all()
+    return [_row_to_event(row) for row in rows]
+
+def load_changes_after(
+    db: Session,
+    after_id: int,
+    limit: int,
+    entities: Optional[List[str]] = None,
+    overlap_seconds: float = 0.0
+) -> Tuple[List[Dict], bool]:
+    """加载after_id之后的变更事件
+    
+    事件ID在INSERT时分配而不是提交时，ID较小的事务可能晚于ID较大的事务提交，
+    因此同时补发after_id所在事件创建前overlap_seconds内的事件（可能与客户端已收到的事件重叠，需按ID去重）。
+    返回(事件列表, 是否完整)。事件已被清理或超过limit条时不完整，客户端应重新加载列表。
+    """
+    oldest_id = db.query(func.min(ChangeEvent.id)).scalar()
+    if oldest_id is not None and after_id + 1 < oldest_id:
+        return [], False
+    
+    start_id = after_id + 1
+    if overlap_seconds > 0:
+        resumed_at = db.query(ChangeEvent.created_at).filter(ChangeEvent.id == after_id).scalar()
+        if resumed_at is not None:
+            overlap_start_id = db.query(func.min(ChangeEvent.id)).filter(
+                ChangeEvent.created_at >= resumed_at - timedelta(seconds=overlap_seconds)
+            ).scalar()
+            if overlap_start_id is not None:
+                start_id = min(start_id, overlap_start_id)
+    
+    query = db.query(ChangeEvent).filter(ChangeEvent.id >= start_id)
+    if entities:
+        query = query.filter(ChangeEvent.entity.in_(entities))
+    rows = query.order_by(ChangeEvent.id).limit(limit + 1).all()
+    if len(rows) > limit:
+        return [], False
+    return [_row_to_event(row) for row in rows], True
+
+def latest_change_id(db: Session) -> int:
+    """最新的变更事件ID，没有事件时为0"""
+    return db.query(func.max(ChangeEvent.id)).scalar() or 0
+
+def prune_changes(db: Session, retention: timedelta) -> int:
+    """清理超过保留时间的变更事件，返回删除的行数"""
+    result = db.execute(delete(ChangeEvent).where(ChangeEvent.created_at < datetime.utcnow() - retention))
+    db.commit()
+    return result.rowcount
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed(session: Session) -> None:
+    events = session.info.pop(_PENDING_KEY, None)
+    if events and not change_broadcaster.remote:
+        change_broadcaster.publish(events)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_uncommitted(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
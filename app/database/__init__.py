@@ -1,3 +1,4 @@
-from .database import engine, SessionLocal, get_db
+from .database import engine, write_engine, SessionLocal, get_db
+from .errors import integrity_error_column, is_foreign_key_violation
 
-__all__ = ["engine", "SessionLocal", "get_db"]
\ No newline at end of file
+__all__ = ["engine", "write_engine", "SessionLocal", "get_db", "integrity_error_column", "is_foreign_key_violation"]
\ No newline at end of file
@@ -0,0 +1,163 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar, Token
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# SQLite进度回调的调用间隔（虚拟机指令数）
+SQLITE_PROGRESS_STEPS = 1000
+
+# PostgreSQL statement_timeout取消语句时的SQLSTATE
+PG_QUERY_CANCELED = "57014"
+
+class QueryBudgetExceeded(Exception):
+    """请求超出了数据库执行预算"""
+    
+    def __init__(self, route: str, reason: str, limit: float, statements: int, db_ms: float):
+        self.route = route
+        self.reason = reason
+        self.limit = limit
+        self.statements = statements
+        self.db_ms = db_ms
+        if reason == "statements":
+            message = f"请求的SQL语句数超过上限 {int(limit)}"
+        else:
+            message = f"请求的数据库执行时间超过上限 {int(limit)}ms"
+        super().__init__(message)
+
+class QueryBudget:
+    """单个请求的数据库执行预算：累计执行时间上限和语句数上限（0表示不限制）"""
+    __slots__ = ("route", "timeout_ms", "max_statements", "statements", "db_time", "statement_start", "deadline")
+    
+    def __init__(self, route: str, timeout_ms: float, max_statements: int):
+        self.route = route
+        self.timeout_ms = timeout_ms
+        self.max_statements = max_statements
+        self.statements = 0
+        self.db_time = 0.0
+        self.statement_start = 0.0
+        self.deadline: Optional[float] = None
+    
+    def remaining_ms(self) -> Optional[float]:
+        """剩余的执行时间，不限制时为None"""
+        if not self.timeout_ms:
+            return None
+        return self.timeout_ms - self.db_time * 1000
+
+_current_budget: ContextVar[Optional[QueryBudget]] = ContextVar("query_budget", default=None)
+
+_violations_lock = threading.Lock()
+_violations: Dict[Tuple[str, str], int] = {}
+
+def begin_query_budget(route: str, timeout_ms: float, max_statements: int) -> Token:
+    """为当前上下文设置数据库执行预算"""
+    return _current_budget.set(QueryBudget(route, timeout_ms, max_statements))
+
+def end_query_budget(token: Token) -> None:
+    """恢复进入请求前的预算"""
+    _current_budget.reset(token)
+
+def get_budget_violations() -> Dict[str, Dict[str, int]]:
+    """按路由和原因统计的超预算次数"""
+    with _violations_lock:
+        result: Dict[str, Dict[str, int]] = {}
+        for (route, reason), count in _violations.items():
+            result.setdefault(route, {})[reason] = count
+        return result
+
+def render_prometheus() -> str:
+    """以Prometheus文本格式输出指标"""
+    lines = [
+        "# HELP db_query_budget_exceeded_total Requests aborted for exceeding their database budget, by route and reason.",
+        "# TYPE db_query_budget_exceeded_total counter",
+    ]
+    with _violations_lock:
+        for (route, reason), count in _violations.items():
+            lines.append(f'db_query_budget_exceeded_total{{route="{route}",reason="{reason}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+def _violation(budget: QueryBudget, reason: str) -> QueryBudgetExceeded:
+    with _violations_lock:
+        _violations[(budget.route, reason)] = _violations.get((budget.route, reason), 0) + 1
+    limit = budget.max_statements if reason == "statements" else budget.timeout_ms
+    db_ms = budget.db_time * 1000
+    logger.warning(
+        "请求超出数据库预算：路由 %s，原因 %s，上限 %s，已执行 %d 条语句，耗时 %.1fms",
+        budget.route, reason, limit, budget.statements, db_ms
+    )
+    return QueryBudgetExceeded(budget.route, reason, limit, budget.statements, db_ms)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget = _current_budget.get()
+    if budget is None:
+        return
+    if budget.max_statements and budget.statements >= budget.max_statements:
+        raise _violation(budget, "statements")
+    remaining_ms = budget.remaining_ms()
+    if remaining_ms is not None and remaining_ms <= 0:
+        raise _violation(budget, "timeout")
+    budget.statements += 1
+    budget.statement_start = time.perf_counter()
+    budget.deadline = budget.statement_start + remaining_ms / 1000 if remaining_ms is not None else None
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    budget = _current_budget.get()
+    if budget is not None:
+        budget.db_time += time.perf_counter() - budget.statement_start
+        budget.statement_start = 0.0
+        budget.deadline = None
+
+def _handle_error(context) -> None:
+    """把预算内的语句超时转换为QueryBudgetExceeded"""
+    budget = _current_budget.get()
+    original = context.original_exception
+    if budget is None or not budget.statement_start or isinstance(original, QueryBudgetExceeded):
+        return
+    budget.db_time += time.perf_counter() - budget.statement_start
+    budget.statement_start = 0.0
+    budget.deadline = None
+    if getattr(original, "pgcode", None) == PG_QUERY_CANCELED or (
+        isinstance(original, sqlite3.OperationalError) and "interrupted" in str(original)
+    ):
+        raise _violation(budget, "timeout") from original
+
+def _sqlite_progress() -> int:
+    """SQLite执行期间定期调用，超过当前语句的截止时间时返回非0中断执行"""
+    budget = _current_budget.get()
+    return int(budget is not None and budget.deadline is not None and time.perf_counter() > budget.deadline)
+
+def _on_sqlite_connect(dbapi_connection, connection_record):
+    dbapi_connection.set_progress_handler(_sqlite_progress, SQLITE_PROGRESS_STEPS)
+
+def _on_postgresql_begin(conn):
+    # 事务开始时按剩余预算设置statement_timeout，事务结束后自动恢复
+    budget = _current_budget.get()
+    if budget is None:
+        return
+    remaining_ms = budget.remaining_ms()
+    if remaining_ms is None:
+        return
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining_ms))}")
+    finally:
+        cursor.close()
+
+def enforce_query_budgets(engine: Engine) -> None:
+    """为引擎注册执行预算检查
+    
+    语句数在执行前检查；执行时间在PostgreSQL下由SET LOCAL statement_timeout限制，
+    SQLite下由进度回调在超过截止时间时中断语句。
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _on_sqlite_connect)
+    elif engine.dialect.name == "postgresql":
+        event.listen(engine, "begin", _on_postgresql_begin)
@@ -0,0 +1,20 @@
+import re
+from typing import Iterable, Optional
+from sqlalchemy.exc import IntegrityError
+
+def integrity_error_column(exc: IntegrityError, columns: Iterable[str]) -> Optional[str]:
+    """从完整性约束错误中找出冲突的列名
+    
+    PostgreSQL的错误详情形如 Key (username)=(...) already exists，
+    SQLite形如 UNIQUE constraint failed: users.username。
+    """
+    message = str(exc.orig)
+    for column in columns:
+        if re.search(rf"\({column}\)|\.{column}\b", message):
+            return column
+    return None
+
+def is_foreign_key_violation(exc: IntegrityError) -> bool:
+    """判断是否为外键约束错误"""
+    message = str(exc.orig).lower()
+    return "foreign key" in message
@@ -0,0 +1,55 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.config import settings
+
+_WRITING_KEY = "sqlite_writing"
+
+def configure_sqlite_engine(engine: Engine, writer: bool = False) -> None:
+    """为SQLite引擎设置连接PRAGMA并接管事务开始语句
+    
+    pysqlite默认在第一条写语句前才隐式BEGIN，这里关闭其事务管理，
+    由SQLAlchemy在事务开始时显式发出BEGIN；写连接使用BEGIN IMMEDIATE，
+    在事务开始时就拿到写锁，避免读锁升级为写锁时出现SQLITE_BUSY。
+    """
+    
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        # 负数表示以KiB为单位
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+    
+    @event.listens_for(engine, "begin")
+    def _on_begin(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE" if writer else "BEGIN")
+
+class RoutingSession(Session):
+    """SQLite读写分离会话：读语句走读连接池，写语句和flush走唯一的写连接
+    
+    一旦会话在当前事务中发生写入，后续语句都走写连接，保证能读到自己未提交的写入；
+    事务结束后恢复读写分离。
+    """
+    
+    def __init__(self, *args, read_engine: Engine = None, write_engine: Engine = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_engine = read_engine
+        self.write_engine = write_engine
+    
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self.info.get(_WRITING_KEY) or self._flushing or getattr(clause, "is_dml", False):
+            self.info[_WRITING_KEY] = True
+            return self.write_engine
+        return self.read_engine
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_routing(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(_WRITING_KEY, None)
@@ -0,0 +1,22 @@
+from sqlalchemy import bindparam, select
+from app.models.user import User
+from app.models.role import Role
+from app.models.user_role import UserRole
+
+# 每个请求都会执行的热点查询在导入时构建一次，调用时只绑定参数。
+# 语句对象不变，SQLAlchemy会记住它的缓存键，跳过语句构建和缓存键计算，直接命中编译缓存；
+# 生成的SQL文本固定，驱动的语句缓存（sqlite3的cached_statements、psycopg 3的自动prepare）也能命中。
+
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+
+USER_BY_USERNAME = select(User).where(User.username == bindparam("username"))
+
+USER_ROLES = select(Role).join(UserRole, UserRole.role_id == Role.id).where(
+    UserRole.user_id == bindparam("user_id")
+).order_by(UserRole.id)
+
+USER_ROLE_NAMES = select(Role.name).join(UserRole, UserRole.role_id == Role.id).where(
+    UserRole.user_id == bindparam("user_id")
+).order_by(UserRole.id)
+
+ROLE_BY_NAME = select(Role).where(Role.name == bindparam("name"))
@@ -0,0 +1,50 @@
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import time
+
+class QueryStats:
+    """单个请求内的SQL执行统计"""
+    __slots__ = ("statements", "db_time")
+    
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def begin_query_stats() -> QueryStats:
+    """为当前上下文开启新的SQL统计"""
+    stats = QueryStats()
+    _current_stats.set(stats)
+    return stats
+
+def get_query_stats() -> Optional[QueryStats]:
+    """获取当前上下文的SQL统计"""
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 同一连接上的语句不会嵌套执行，只保存当前语句的开始时间
+    conn.info["query_start_time"] = time.perf_counter()
+
+def _record(conn) -> None:
+    start = conn.info.pop("query_start_time", None)
+    stats = _current_stats.get()
+    if start is not None and stats is not None:
+        stats.statements += 1
+        stats.db_time += time.perf_counter() - start
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record(conn)
+
+def _handle_error(context) -> None:
+    # 出错的语句（约束冲突、超出预算、被中断）不会触发after_cursor_execute，在这里计入并清除开始时间
+    if context.connection is not None:
+        _record(context.connection)
+
+def instrument_engine(engine: Engine) -> None:
+    """为引擎注册SQL耗时统计事件"""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,5 @@
+from .profiling import profile_store
+from .heap import heap_tracker
+from .loop_lag import loop_lag_monitor
+
+__all__ = ["profile_store", "heap_tracker", "loop_lag_monitor"]
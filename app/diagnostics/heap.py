@@ -0,0 +1,149 @@
+import linecache
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+
+# 快照中忽略tracemalloc自身和导入机制的分配
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+GROUP_BY_CHOICES = ("lineno", "filename", "traceback")
+
+class HeapTracker:
+    """基于tracemalloc的堆内存诊断
+    
+    快照保存在进程内存中，最多保留max_snapshots个，超出时丢弃最旧的。
+    停止追踪不会清除已有快照，仍可查看和对比。
+    """
+    
+    def __init__(self, max_snapshots: int):
+        self.max_snapshots = max_snapshots
+        self._lock = threading.Lock()
+        self._snapshots: "OrderedDict[str, Dict]" = OrderedDict()
+    
+    def start(self, frames: int = 1) -> None:
+        """开始追踪内存分配，frames为每个分配记录的调用栈深度"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+    
+    def stop(self) -> None:
+        """停止追踪内存分配"""
+        tracemalloc.stop()
+    
+    def status(self) -> Dict:
+        """获取追踪状态"""
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+            "traced_bytes": current,
+            "peak_bytes": peak,
+            "tracemalloc_overhead_bytes": tracemalloc.get_tracemalloc_memory() if tracing else 0,
+            "snapshots": self.list(),
+        }
+    
+    def take_snapshot(self) -> Dict:
+        """拍摄快照，未在追踪时抛出ValueError"""
+        if not tracemalloc.is_tracing():
+            raise ValueError("内存追踪未开启")
+        snapshot = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        info = {
+            "id": uuid.uuid4().hex[:16],
+            "created_at": time.time(),
+            "traced_bytes": sum(stat.size for stat in snapshot.statistics("filename")),
+            "frames": snapshot.traceback_limit,
+        }
+        with self._lock:
+            self._snapshots[info["id"]] = {"info": info, "snapshot": snapshot}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+        return info
+    
+    def list(self) -> List[Dict]:
+        """获取快照列表（从新到旧）"""
+        with self._lock:
+            return [item["info"] for item in reversed(self._snapshots.values())]
+    
+    def delete(self, snapshot_id: str) -> bool:
+        """删除快照"""
+        with self._lock:
+            return self._snapshots.pop(snapshot_id, None) is not None
+    
+    def _get(self, snapshot_id: str) -> Optional[tracemalloc.Snapshot]:
+        with self._lock:
+            item = self._snapshots.get(snapshot_id)
+        return item["snapshot"] if item else None
+    
+    def top(self, snapshot_id: str, group_by: str = "lineno", limit: int = 20) -> Optional[List[Dict]]:
+        """获取快照中占用内存最多的分配位置，快照不存在时返回None"""
+        snapshot = self._get(snapshot_id)
+        if snapshot is None:
+            return None
+        return [
+            {
+                "traceback": _format_traceback(stat.traceback),
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics(group_by)[:limit]
+        ]
+    
+    def diff(self, base_id: str, target_id: str, group_by: str = "lineno", limit: int = 20) -> Optional[List[Dict]]:
+        """对比两个快照，按内存增长量从大到小返回分配位置，任一快照不存在时返回None"""
+        base = self._get(base_id)
+        target = self._get(target_id)
+        if base is None or target is None:
+            return None
+        return [
+            {
+                "traceback": _format_traceback(stat.traceback),
+                "size_bytes": stat.size,
+                "size_diff_bytes": stat.size_diff,
+                "count": stat.count,
+                "count_diff": stat.count_diff,
+            }
+            for stat in target.compare_to(base, group_by)[:limit]
+        ]
+
+def _format_traceback(traceback: tracemalloc.Traceback) -> List[str]:
+    """格式化调用栈，最近的调用在前"""
+    return [f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)]
+
+heap_tracker = HeapTracker(max_snapshots=settings.heap_max_snapshots)
+
+# 记录开启过事务的会话，用弱引用避免影响会话回收
+_sessions: "weakref.WeakSet[Session]" = weakref.WeakSet()
+
+@event.listens_for(Session, "after_begin")
+def _track_session(session, transaction, connection):
+    _sessions.add(session)
+
+def get_session_identity_maps() -> List[Dict]:
+    """获取仍存活的会话及其标识映射中的对象数量"""
+    sessions = []
+    for session in list(_sessions):
+        counts: Dict[str, int] = {}
+        for obj in session.identity_map.values():
+            name = type(obj).__name__
+            counts[name] = counts.get(name, 0) + 1
+        sessions.append({
+            "session_id": id(session),
+            "in_transaction": session.in_transaction(),
+            "identity_map_size": len(session.identity_map),
+            "objects": counts,
+        })
+    return sessions
@@ -0,0 +1,188 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Dict, List, Optional
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 调度延迟直方图的桶上界（毫秒），最后一个桶为+Inf
+LAG_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# 阻塞记录保留的调用栈帧数（最内层）
+STACK_LIMIT = 30
+
+def _find_route(frame) -> Optional[str]:
+    """沿调用栈向外查找ASGI scope，返回当前请求的路由模板或路径
+    
+    阻塞代码在事件循环线程上同步执行时，驱动它的中间件和路由协程帧都在同一条调用栈上。
+    """
+    path = None
+    while frame is not None:
+        scope = frame.f_locals.get("scope")
+        if isinstance(scope, dict) and scope.get("type") == "http":
+            route = scope.get("route")
+            if route is not None:
+                return f"{scope['method']} {route.path}"
+            path = path or f"{scope['method']} {scope['path']}"
+        frame = frame.f_back
+    return path
+
+class LoopLagMonitor:
+    """事件循环调度延迟监控
+    
+    采样协程每interval秒sleep一次，实际唤醒时间与预期的差值即调度延迟，计入直方图。
+    看门狗线程发现事件循环超过threshold毫秒没有唤醒采样协程时，抓取事件循环线程的调用栈，
+    并从栈上的ASGI scope找出正在阻塞的路由；采样协程恢复后用实际延迟补全这次阻塞记录并写日志。
+    """
+    
+    def __init__(self, interval: float, threshold_ms: float, max_events: int = 50):
+        self.interval = interval
+        self.threshold_ms = threshold_ms
+        self._lock = threading.Lock()
+        self._bucket_counts = [0] * (len(LAG_BUCKETS_MS) + 1)
+        self._count = 0
+        self._sum_ms = 0.0
+        self._max_ms = 0.0
+        self._stalls_by_route: Dict[str, Dict] = {}
+        self._events: "deque[Dict]" = deque(maxlen=max_events)
+        self._pending: Optional[Dict] = None
+        self._expected_wake = 0.0
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+    
+    def start(self) -> None:
+        """在当前事件循环中启动采样协程和看门狗线程"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wake = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+    
+    async def stop(self) -> None:
+        """停止监控"""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._watchdog = None
+    
+    async def _sample(self) -> None:
+        while True:
+            self._expected_wake = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag_ms = max(0.0, (time.monotonic() - self._expected_wake) * 1000)
+            self._record(lag_ms)
+    
+    def _record(self, lag_ms: float) -> None:
+        with self._lock:
+            self._bucket_counts[bisect.bisect_left(LAG_BUCKETS_MS, lag_ms)] += 1
+            self._count += 1
+            self._sum_ms += lag_ms
+            self._max_ms = max(self._max_ms, lag_ms)
+            pending, self._pending = self._pending, None
+            if lag_ms < self.threshold_ms:
+                return
+            event = pending or {"route": None, "stack": [], "captured_at": time.time()}
+            event["lag_ms"] = round(lag_ms, 2)
+            route = event["route"] or "unknown"
+            stats = self._stalls_by_route.setdefault(route, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            stats["count"] += 1
+            stats["total_ms"] += lag_ms
+            stats["max_ms"] = max(stats["max_ms"], lag_ms)
+            self._events.append(event)
+        logger.warning(
+            "事件循环阻塞 %.1fms，路由: %s\n%s",
+            lag_ms, route, "".join(event["stack"]) or "（未捕获调用栈）"
+        )
+    
+    def _watch(self) -> None:
+        threshold = self.threshold_ms / 1000
+        while not self._stopped.wait(min(threshold / 2, self.interval)):
+            if self._pending is not None or time.monotonic() - self._expected_wake < threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            pending = {
+                "route": _find_route(frame),
+                "stack": traceback.format_stack(frame, limit=STACK_LIMIT),
+                "captured_at": time.time(),
+            }
+            with self._lock:
+                # 采样协程可能已在抓栈期间恢复，此时这次记录作废
+                if time.monotonic() - self._expected_wake >= threshold:
+                    self._pending = pending
+    
+    def snapshot(self) -> Dict:
+        """获取直方图、按路由统计的阻塞和最近的阻塞记录"""
+        with self._lock:
+            return {
+                "running": self._task is not None,
+                "interval_ms": self.interval * 1000,
+                "threshold_ms": self.threshold_ms,
+                "count": self._count,
+                "sum_ms": round(self._sum_ms, 2),
+                "max_ms": round(self._max_ms, 2),
+                "buckets": [
+                    {"le": str(bound), "count": count}
+                    for bound, count in zip(list(LAG_BUCKETS_MS) + ["+Inf"], self._cumulative_counts())
+                ],
+                "stalls_by_route": {
+                    route: {"count": stats["count"], "total_ms": round(stats["total_ms"], 2), "max_ms": round(stats["max_ms"], 2)}
+                    for route, stats in self._stalls_by_route.items()
+                },
+                "recent_stalls": list(reversed(self._events)),
+            }
+    
+    def _cumulative_counts(self) -> List[int]:
+        total = 0
+        counts = []
+        for count in self._bucket_counts:
+            total += count
+            counts.append(total)
+        return counts
+    
+    def render_prometheus(self) -> str:
+        """以Prometheus文本格式输出指标"""
+        with self._lock:
+            lines = [
+                "# HELP event_loop_lag_seconds Event loop scheduling delay.",
+                "# TYPE event_loop_lag_seconds histogram",
+            ]
+            for bound, count in zip(LAG_BUCKETS_MS, self._cumulative_counts()):
+                lines.append(f'event_loop_lag_seconds_bucket{{le="{bound / 1000}"}} {count}')
+            lines.append(f'event_loop_lag_seconds_bucket{{le="+Inf"}} {self._count}')
+            lines.append(f"event_loop_lag_seconds_sum {self._sum_ms / 1000}")
+            lines.append(f"event_loop_lag_seconds_count {self._count}")
+            lines.append("# HELP event_loop_stalls_total Event loop stalls over the threshold, by route.")
+            lines.append("# TYPE event_loop_stalls_total counter")
+            for route, stats in self._stalls_by_route.items():
+                lines.append(f'event_loop_stalls_total{{route="{_escape_label(route)}"}} {stats["count"]}')
+            lines.append("# HELP event_loop_stall_seconds_total Event loop time blocked over the threshold, by route.")
+            lines.append("# TYPE event_loop_stall_seconds_total counter")
+            for route, stats in self._stalls_by_route.items():
+                lines.append(f'event_loop_stall_seconds_total{{route="{_escape_label(route)}"}} {stats["total_ms"] / 1000}')
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+loop_lag_monitor = LoopLagMonitor(
+    interval=settings.loop_lag_interval_ms / 1000,
+    threshold_ms=settings.loop_lag_threshold_ms,
+)
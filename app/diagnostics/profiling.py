@@ -0,0 +1,91 @@
+import io
+import os
+import pstats
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from cProfile import Profile
+from typing import Dict, List, Optional
+from app.config import settings
+
+class ProfileStore:
+    """请求级CPU剖析结果的存储与限流
+
+    同一时刻只允许一个剖析，两次剖析之间至少间隔min_interval秒；
+    结果以pstats文件保存在磁盘上，最多保留max_profiles个，超出时删除最旧的。
+    """
+    
+    def __init__(self, directory: str, min_interval: float, max_profiles: int):
+        self.directory = directory
+        self.min_interval = min_interval
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        self._last_started = 0.0
+        self._index: "OrderedDict[str, Dict]" = OrderedDict()
+    
+    def try_acquire(self) -> bool:
+        """尝试获取剖析名额，被占用或未到间隔时返回False"""
+        if not self._lock.acquire(blocking=False):
+            return False
+        now = time.monotonic()
+        if now - self._last_started < self.min_interval:
+            self._lock.release()
+            return False
+        self._last_started = now
+        return True
+    
+    def release(self) -> None:
+        """释放剖析名额"""
+        self._lock.release()
+    
+    def save(self, profiler: Profile, method: str, path: str, duration_ms: float, status_code: int) -> str:
+        """保存剖析结果，返回剖析ID"""
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = uuid.uuid4().hex[:16]
+        profiler.dump_stats(self._path(profile_id))
+        self._index[profile_id] = {
+            "id": profile_id,
+            "method": method,
+            "path": path,
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "created_at": time.time(),
+        }
+        while len(self._index) > self.max_profiles:
+            old_id, _ = self._index.popitem(last=False)
+            try:
+                os.remove(self._path(old_id))
+            except FileNotFoundError:
+                pass
+        return profile_id
+    
+    def list(self) -> List[Dict]:
+        """按时间倒序列出剖析记录"""
+        return list(reversed(self._index.values()))
+    
+    def get_file(self, profile_id: str) -> Optional[str]:
+        """获取剖析文件路径"""
+        if profile_id not in self._index:
+            return None
+        return self._path(profile_id)
+    
+    def summary(self, profile_id: str, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """生成文本摘要"""
+        file_path = self.get_file(profile_id)
+        if file_path is None:
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(file_path, stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+    
+    def _path(self, profile_id: str) -> str:
+        return os.path.join(self.directory, f"{profile_id}.pstats")
+
+profile_store = ProfileStore(
+    directory=settings.profiling_dir or os.path.join(tempfile.gettempdir(), "dbatools-profiles"),
+    min_interval=settings.profiling_min_interval_seconds,
+    max_profiles=settings.profiling_max_profiles,
+)
@@ -0,0 +1,218 @@
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = settings.tracing_enabled
+
+# OTLP SpanKind
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+class Span:
+    """追踪片段"""
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes")
+    
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], kind: int, attributes: Optional[Dict]):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.attributes = attributes or {}
+        trace.spans.append(self)
+    
+    def end(self) -> None:
+        self.end_ns = time.time_ns()
+    
+    def child(self, name: str, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict] = None) -> "Span":
+        return Span(self.trace, name, self.span_id, kind, attributes)
+
+class Trace:
+    """一次请求的所有片段"""
+    __slots__ = ("trace_id", "spans")
+    
+    def __init__(self):
+        self.trace_id = os.urandom(16).hex()
+        self.spans: List[Span] = []
+
+# 当前上下文中的活动片段，嵌套片段通过ContextVar的set/reset形成栈
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def current_span() -> Optional[Span]:
+    """获取当前活动片段，未在追踪中时返回None"""
+    return _current_span.get()
+
+def start_root_span(name: str, attributes: Optional[Dict] = None) -> Optional[Span]:
+    """按采样率开启新的追踪并设为当前片段"""
+    if random.random() >= settings.tracing_sample_rate:
+        return None
+    span = Span(Trace(), name, None, SPAN_KIND_SERVER, attributes)
+    _current_span.set(span)
+    return span
+
+def finish_root_span(span: Span) -> None:
+    """结束追踪并提交导出"""
+    span.end()
+    _current_span.set(None)
+    _exporter.submit(span.trace)
+
+@contextmanager
+def span(name: str, **attributes):
+    """在当前追踪中创建嵌套片段，不在追踪中时几乎无开销"""
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = parent.child(name, attributes=attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    finally:
+        child.end()
+        _current_span.reset(token)
+
+def traced(name: Optional[str] = None) -> Callable:
+    """函数追踪装饰器；未启用追踪时直接返回原函数，没有任何额外开销"""
+    def decorator(fn: Callable) -> Callable:
+        if not TRACING_ENABLED:
+            return fn
+        span_name = name or fn.__qualname__
+        
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            parent = _current_span.get()
+            if parent is None:
+                return fn(*args, **kwargs)
+            child = parent.child(span_name)
+            token = _current_span.set(child)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.end()
+                _current_span.reset(token)
+        return wrapper
+    return decorator
+
+def traced_class(cls):
+    """为类中所有公开的静态方法添加追踪"""
+    if not TRACING_ENABLED:
+        return cls
+    for attr, value in list(vars(cls).items()):
+        if isinstance(value, staticmethod) and not attr.startswith("_"):
+            setattr(cls, attr, staticmethod(traced(f"{cls.__name__}.{attr}")(value.__func__)))
+    return cls
+
+def instrument_engine(engine: Engine) -> None:
+    """为引擎的每条SQL创建客户端片段"""
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if parent is not None:
+            conn.info.setdefault("trace_spans", []).append(parent.child(
+                "db.execute",
+                kind=SPAN_KIND_CLIENT,
+                attributes={"db.system": engine.dialect.name, "db.statement": statement[:500]}
+            ))
+        else:
+            conn.info.setdefault("trace_spans", []).append(None)
+    
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        child = conn.info["trace_spans"].pop()
+        if child is not None:
+            child.end()
+    
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+def _attribute_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+def to_otlp(trace: Trace) -> Dict:
+    """转换为OTLP/JSON格式的ExportTraceServiceRequest"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": settings.app_name}},
+                {"key": "service.version", "value": {"stringValue": settings.app_version}},
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "app.diagnostics.tracing"},
+                "spans": [
+                    {
+                        "traceId": trace.trace_id,
+                        "spanId": item.span_id,
+                        **({"parentSpanId": item.parent_id} if item.parent_id else {}),
+                        "name": item.name,
+                        "kind": item.kind,
+                        "startTimeUnixNano": str(item.start_ns),
+                        "endTimeUnixNano": str(item.end_ns or item.start_ns),
+                        "attributes": [
+                            {"key": key, "value": _attribute_value(value)}
+                            for key, value in item.attributes.items()
+                        ],
+                    }
+                    for item in trace.spans
+                ],
+            }],
+        }]
+    }
+
+class FileExporter:
+    """后台线程把追踪按行写入文件（每行一个OTLP/JSON请求）"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.SimpleQueue[Trace]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+    
+    def submit(self, trace: Trace) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+        self._queue.put(trace)
+    
+    def _run(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        while True:
+            # 取出当前积压的所有追踪后一次写入
+            traces = [self._queue.get()]
+            while True:
+                try:
+                    traces.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    for trace in traces:
+                        f.write(json.dumps(to_otlp(trace), ensure_ascii=False, separators=(",", ":")))
+                        f.write("\n")
+            except Exception:
+                logger.exception("写入追踪数据失败")
+
+_exporter = FileExporter(settings.tracing_export_path or os.path.join(tempfile.gettempdir(), "dbatools-traces.jsonl"))
@@ -0,0 +1,4 @@
+from .handlers import JOB_HANDLERS
+from .runner import job_runner
+
+__all__ = ["JOB_HANDLERS", "job_runner"]
@@ -0,0 +1,45 @@
+import time
+from typing import Iterator, List, Sequence
+from sqlalchemy import update, select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.job import Job
+
+class JobCancelled(Exception):
+    """任务已被请求取消"""
+
+class JobContext:
+    """任务执行上下文：提供任务自己的会话、分块提交和取消检查"""
+    
+    def __init__(self, db: Session, job_id: int):
+        self.db = db
+        self.job_id = job_id
+        self.progress = 0
+    
+    def set_total(self, total: int) -> None:
+        """记录总数量"""
+        self.db.execute(update(Job).where(Job.id == self.job_id).values(total=total))
+        self.db.commit()
+    
+    def chunks(self, items: Sequence) -> Iterator[List]:
+        """按配置的块大小切分，每块开始前检查是否已请求取消"""
+        size = settings.job_chunk_size
+        for start in range(0, len(items), size):
+            self.checkpoint()
+            yield list(items[start:start + size])
+    
+    def checkpoint(self) -> None:
+        """已请求取消时抛出JobCancelled"""
+        cancel_requested = self.db.execute(
+            select(Job.cancel_requested).where(Job.id == self.job_id)
+        ).scalar_one()
+        if cancel_requested:
+            raise JobCancelled()
+    
+    def commit_chunk(self, processed: int) -> None:
+        """与本块的写入一起提交进度，然后短暂让出写锁给在线请求"""
+        self.progress += processed
+        self.db.execute(update(Job).where(Job.id == self.job_id).values(progress=self.progress))
+        self.db.commit()
+        if settings.job_chunk_pause_ms:
+            time.sleep(settings.job_chunk_pause_ms / 1000)
@@ -0,0 +1,100 @@
+from typing import Callable, Dict, List, Tuple, Type
+from pydantic import BaseModel, Field
+from sqlalchemy import select, insert, delete, and_
+from app.models.user import User
+from app.models.role import Role
+from app.models.user_role import UserRole
+from app.auth.versions import bump_auth_versions, remember_auth_versions
+from app.services.effective_permission_service import EffectivePermissionService
+from app.changes import record_changes
+from .context import JobContext
+
+class DeactivateUsersParams(BaseModel):
+    """批量停用用户参数"""
+    user_ids: List[int] = Field(..., min_length=1, description="要停用的用户ID")
+
+class ReassignRoleParams(BaseModel):
+    """角色迁移参数"""
+    from_role_id: int = Field(..., description="源角色ID")
+    to_role_id: int = Field(..., description="目标角色ID")
+    remove_source: bool = Field(True, description="迁移后是否移除源角色")
+
+class RebuildEffectivePermissionsParams(BaseModel):
+    """有效权限重建参数"""
+    pass
+
+def deactivate_users(ctx: JobContext, params: DeactivateUsersParams) -> dict:
+    """批量停用用户"""
+    user_ids = sorted(set(params.user_ids))
+    ctx.set_total(len(user_ids))
+    deactivated = 0
+    for chunk in ctx.chunks(user_ids):
+        versions = bump_auth_versions(ctx.db, User.id.in_(chunk), User.is_active == True, is_active=False)
+        record_changes(ctx.db, "user", "updated", [(user_id, {"is_active": False}) for user_id, _ in versions])
+        EffectivePermissionService.refresh(ctx.db, user_ids=[user_id for user_id, _ in versions])
+        ctx.commit_chunk(len(chunk))
+        remember_auth_versions(versions)
+        deactivated += len(versions)
+    return {"deactivated": deactivated}
+
+def reassign_role(ctx: JobContext, params: ReassignRoleParams) -> dict:
+    """把源角色的所有用户迁移到目标角色"""
+    db = ctx.db
+    if params.from_role_id == params.to_role_id:
+        raise ValueError("源角色和目标角色不能相同")
+    found = db.execute(select(Role.id).where(Role.id.in_([params.from_role_id, params.to_role_id]))).scalars().all()
+    if len(found) != 2:
+        raise ValueError("角色不存在")
+    
+    user_ids = db.execute(
+        select(UserRole.user_id).where(UserRole.role_id == params.from_role_id).order_by(UserRole.user_id)
+    ).scalars().all()
+    ctx.set_total(len(user_ids))
+    
+    assigned = 0
+    for chunk in ctx.chunks(user_ids):
+        already = select(UserRole.user_id).where(UserRole.role_id == params.to_role_id, UserRole.user_id.in_(chunk))
+        added = db.execute(
+            insert(UserRole).from_select(
+                ["user_id", "role_id"],
+                select(UserRole.user_id, params.to_role_id).where(
+                    UserRole.role_id == params.from_role_id,
+                    UserRole.user_id.in_(chunk),
+                    UserRole.user_id.not_in(already)
+                )
+            ).returning(UserRole.user_id)
+        ).scalars().all()
+        assigned += len(added)
+        record_changes(db, "user_role", "created", [
+            (user_id, {"user_id": user_id, "role_id": params.to_role_id}) for user_id in added
+        ])
+        if params.remove_source:
+            removed = db.execute(
+                delete(UserRole).where(
+                    and_(UserRole.role_id == params.from_role_id, UserRole.user_id.in_(chunk))
+                ).returning(UserRole.user_id)
+            ).scalars().all()
+            record_changes(db, "user_role", "deleted", [
+                (user_id, {"user_id": user_id, "role_id": params.from_role_id}) for user_id in removed
+            ])
+        EffectivePermissionService.refresh(db, user_ids=chunk)
+        versions = bump_auth_versions(db, User.id.in_(chunk))
+        ctx.commit_chunk(len(chunk))
+        remember_auth_versions(versions)
+    return {"users": len(user_ids), "assigned": assigned}
+
+def rebuild_effective_permissions(ctx: JobContext, params: RebuildEffectivePermissionsParams) -> dict:
+    """按用户分块重建有效权限投影"""
+    user_ids = ctx.db.execute(select(User.id).order_by(User.id)).scalars().all()
+    ctx.set_total(len(user_ids))
+    for chunk in ctx.chunks(user_ids):
+        EffectivePermissionService.refresh(ctx.db, user_ids=chunk)
+        ctx.commit_chunk(len(chunk))
+    return {"users": len(user_ids)}
+
+# 任务类型 -> (参数模型, 处理函数)
+JOB_HANDLERS: Dict[str, Tuple[Type[BaseModel], Callable[[JobContext, BaseModel], dict]]] = {
+    "deactivate_users": (DeactivateUsersParams, deactivate_users),
+    "reassign_role": (ReassignRoleParams, reassign_role),
+    "rebuild_effective_permissions": (RebuildEffectivePermissionsParams, rebuild_effective_permissions),
+}
@@ -0,0 +1,174 @@
+import logging
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import update, select
+from app.config import settings
+from app.database import SessionLocal
+from app.models.job import Job
+from .context import JobContext, JobCancelled
+from .handlers import JOB_HANDLERS
+
+logger = logging.getLogger(__name__)
+
+def _pid_alive(pid: int) -> bool:
+    """本机上的进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class JobRunner:
+    """后台任务执行器
+    
+    任务在有界线程池中执行，不占用事件循环；每个任务使用SessionLocal创建自己的会话并分块提交。
+    任务通过 pending -> running 的条件更新认领，多个进程同时恢复任务也只会执行一次。
+    
+    认领时记录执行者（主机名:进程ID:启动ID）。启动时和之后每隔 job_reap_interval_seconds，
+    把执行者已不存在的运行中任务标记为失败：本机的执行者按进程是否存活判断（本进程以启动ID区分重启前后），
+    其他主机或未记录执行者的任务在超过 job_stale_seconds 未更新时视为中断。
+    """
+    
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.host = socket.gethostname()
+        self.owner = f"{self.host}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._reaper: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+    
+    def start(self) -> None:
+        """启动线程池和中断任务检查线程，标记中断的运行中任务为失败，并重新排队等待中的任务"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job-worker")
+            self._stopping.clear()
+            self._reaper = threading.Thread(target=self._reap_loop, name="job-reaper", daemon=True)
+            self._reaper.start()
+        
+        self.reap_orphaned_jobs()
+        db = SessionLocal()
+        try:
+            pending = db.execute(select(Job.id).where(Job.state == "pending").order_by(Job.id)).scalars().all()
+        finally:
+            db.close()
+        for job_id in pending:
+            self.submit(job_id)
+    
+    def shutdown(self) -> None:
+        """停止线程池，未开始的任务保持pending，下次启动时继续"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._stopping.set()
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    def reap_orphaned_jobs(self) -> List[int]:
+        """把执行者已不存在的运行中任务标记为失败，返回这些任务的ID"""
+        db = SessionLocal()
+        try:
+            running = db.execute(
+                select(Job.id, Job.owner, Job.updated_at).where(Job.state == "running")
+            ).all()
+            stale_before = datetime.utcnow() - timedelta(seconds=settings.job_stale_seconds)
+            orphaned = [
+                (job_id, owner) for job_id, owner, updated_at in running
+                if not self._owner_alive(owner, updated_at, stale_before)
+            ]
+            reaped = []
+            for job_id, owner in orphaned:
+                # 条件更新：检查期间任务已结束或被重新认领时不覆盖
+                result = db.execute(
+                    update(Job).where(Job.id == job_id, Job.state == "running", Job.owner == owner).values(
+                        state="failed", error="任务执行中断", finished_at=datetime.utcnow()
+                    )
+                )
+                if result.rowcount:
+                    reaped.append(job_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        if reaped:
+            logger.warning("后台任务执行中断，已标记为失败: %s", reaped)
+        return reaped
+    
+    def _owner_alive(self, owner: Optional[str], updated_at: Optional[datetime], stale_before: datetime) -> bool:
+        if owner == self.owner:
+            return True
+        host, _, rest = (owner or "").partition(":")
+        pid = rest.partition(":")[0]
+        if host == self.host and pid.isdigit():
+            # 进程ID与本进程相同但启动ID不同，说明是重启前的进程
+            return int(pid) != os.getpid() and _pid_alive(int(pid))
+        if updated_at is None:
+            return False
+        if updated_at.tzinfo is not None:
+            updated_at = updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+        return updated_at >= stale_before
+    
+    def _reap_loop(self) -> None:
+        while not self._stopping.wait(settings.job_reap_interval_seconds):
+            try:
+                self.reap_orphaned_jobs()
+            except Exception:
+                logger.exception("检查中断的后台任务失败")
+    
+    def submit(self, job_id: int) -> None:
+        """提交任务到线程池"""
+        if self._executor is None:
+            self.start()
+        self._executor.submit(self._run, job_id)
+    
+    def _run(self, job_id: int) -> None:
+        db = SessionLocal()
+        try:
+            job = db.execute(
+                update(Job).where(Job.id == job_id, Job.state == "pending").values(
+                    state="running", owner=self.owner, started_at=datetime.utcnow()
+                ).returning(Job.type, Job.params)
+            ).first()
+            db.commit()
+            if job is None:
+                # 已被其他进程认领或已取消
+                return
+            
+            params_model, handler = JOB_HANDLERS[job.type]
+            try:
+                result = handler(JobContext(db, job_id), params_model(**job.params))
+            except JobCancelled:
+                db.rollback()
+                self._finish(db, job_id, state="cancelled")
+            except Exception as e:
+                db.rollback()
+                logger.exception("后台任务 %s 执行失败", job_id)
+                self._finish(db, job_id, state="failed", error=str(e) or type(e).__name__)
+            else:
+                self._finish(db, job_id, state="succeeded", result=result)
+        except Exception:
+            logger.exception("更新后台任务 %s 的状态失败", job_id)
+            db.rollback()
+        finally:
+            db.close()
+    
+    @staticmethod
+    def _finish(db, job_id: int, state: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+        db.execute(
+            update(Job).where(Job.id == job_id).values(
+                state=state, result=result, error=error, finished_at=datetime.utcnow()
+            )
+        )
+        db.commit()
+
+job_runner = JobRunner(workers=settings.job_workers)
@@ -0,0 +1,24 @@
+from .access_log import AccessLogMiddleware
+from .junk_paths import JunkPathMiddleware
+from .negotiation import ContentNegotiationMiddleware
+from .compression import CompressionMiddleware
+from .profiling import ProfilingMiddleware
+from .tracing import TracingMiddleware
+from .idempotency import IdempotencyMiddleware
+from .coalescing import CoalescingMiddleware
+from .admission import AdmissionMiddleware, admission_controller
+from .query_budget import QueryBudgetMiddleware
+
+__all__ = [
+    "AccessLogMiddleware",
+    "JunkPathMiddleware",
+    "ContentNegotiationMiddleware",
+    "CompressionMiddleware",
+    "ProfilingMiddleware",
+    "TracingMiddleware",
+    "IdempotencyMiddleware",
+    "CoalescingMiddleware",
+    "AdmissionMiddleware",
+    "admission_controller",
+    "QueryBudgetMiddleware"
+]
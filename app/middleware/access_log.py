@@ -0,0 +1,62 @@
+import logging
+import random
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.database.stats import begin_query_stats
+from app.utils.logger import ACCESS_LOGGER_NAME
+
+access_logger = logging.getLogger(ACCESS_LOGGER_NAME)
+
+class AccessLogMiddleware:
+    """结构化访问日志中间件
+
+    记录方法、路径、状态码、总耗时和数据库耗时；2xx请求按sample_rate采样，
+    非2xx以及超过slow_ms的慢请求总是记录。
+    """
+    
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, slow_ms: float = 500.0):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        stats = begin_query_stats()
+        start = time.perf_counter()
+        status_code = 500
+        response_size = 0
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            if self._should_log(status_code, latency_ms):
+                client = scope.get("client")
+                access_logger.info("access", extra={"access": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "query": scope["query_string"].decode("latin-1"),
+                    "status": status_code,
+                    "latency_ms": round(latency_ms, 2),
+                    "db_ms": round(stats.db_time * 1000, 2),
+                    "db_statements": stats.statements,
+                    "bytes": response_size,
+                    "client": client[0] if client else None,
+                }})
+    
+    def _should_log(self, status_code: int, latency_ms: float) -> bool:
+        """判断是否记录该请求"""
+        if not 200 <= status_code < 300 or latency_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
@@ -0,0 +1,198 @@
+import asyncio
+import json
+from collections import deque
+from typing import Deque, Dict, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.config import settings
+from app.utils.routes import RouteTable
+
+# 不受并发限制的分类（长连接、健康检查、诊断接口在过载时也要可用）
+EXEMPT = "exempt"
+DEFAULT_CLASS = "default"
+
+class ServiceOverloaded(Exception):
+    """排队已满或等待超时"""
+    
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class _Limiter:
+    """一个路由分类的并发上限和有界等待队列（先到先得）"""
+    
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+    
+    async def acquire(self, timeout: float) -> None:
+        """获取一个执行名额，排队已满时立即抛出ServiceOverloaded，超过timeout仍未轮到时也抛出"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            self.rejected_queue_full += 1
+            raise ServiceOverloaded("queue_full")
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # 名额已经转交过来，但请求不再需要
+                self.release()
+            else:
+                self._remove_waiter(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_timeout += 1
+                raise ServiceOverloaded("timeout")
+            raise
+        self.admitted += 1
+    
+    def release(self) -> None:
+        """释放名额，有等待者时直接转交给最早的等待者"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+    
+    def _remove_waiter(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+    
+    def snapshot(self) -> Dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+        }
+
+class AdmissionController:
+    """按路由分类的准入控制
+    
+    每个分类有独立的并发上限和等待队列，因此 /api/users/me 等轻量接口（priority）不会被大列表查询（heavy）饿死。
+    routes中以 /* 结尾的键按前缀匹配，其余按路径精确匹配（忽略末尾的/），未匹配的路由属于default分类。
+    """
+    
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        queue_sizes: Dict[str, int],
+        routes: Dict[str, str],
+        queue_timeout: float
+    ):
+        self.queue_timeout = queue_timeout
+        self._limiters = {
+            name: _Limiter(name, limit, queue_sizes.get(name, limit))
+            for name, limit in limits.items()
+        }
+        if DEFAULT_CLASS not in self._limiters:
+            raise ValueError("准入控制缺少default分类")
+        unknown = set(routes.values()) - set(self._limiters) - {EXEMPT}
+        if unknown:
+            raise ValueError(f"未知的路由分类: {', '.join(sorted(unknown))}")
+        self._routes = RouteTable(routes)
+    
+    def classify(self, path: str) -> str:
+        """获取路径所属的分类"""
+        matched = self._routes.match(path)
+        return matched[1] if matched is not None else DEFAULT_CLASS
+    
+    def limiter(self, name: str) -> Optional[_Limiter]:
+        return self._limiters.get(name)
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        """各分类的并发、排队和拒绝统计"""
+        return {name: limiter.snapshot() for name, limiter in self._limiters.items()}
+    
+    def render_prometheus(self) -> str:
+        """以Prometheus文本格式输出指标"""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP http_admission_in_flight Requests currently executing, by route class.",
+            "# TYPE http_admission_in_flight gauge",
+        ]
+        lines += [f'http_admission_in_flight{{class="{name}"}} {stats["in_flight"]}' for name, stats in snapshot.items()]
+        lines += [
+            "# HELP http_admission_waiting Requests waiting for a slot, by route class.",
+            "# TYPE http_admission_waiting gauge",
+        ]
+        lines += [f'http_admission_waiting{{class="{name}"}} {stats["waiting"]}' for name, stats in snapshot.items()]
+        lines += [
+            "# HELP http_admission_rejected_total Requests shed with 503, by route class and reason.",
+            "# TYPE http_admission_rejected_total counter",
+        ]
+        for name, stats in snapshot.items():
+            lines.append(f'http_admission_rejected_total{{class="{name}",reason="queue_full"}} {stats["rejected_queue_full"]}')
+            lines.append(f'http_admission_rejected_total{{class="{name}",reason="timeout"}} {stats["rejected_timeout"]}')
+        return "\n".join(lines) + "\n"
+
+class AdmissionMiddleware:
+    """准入控制：超过分类并发上限的请求排队等待，队列已满或等待超时时立即返回503和Retry-After
+    
+    在请求占用数据库连接之前限流，避免大量请求堆积在连接池上一起超时。
+    """
+    
+    def __init__(self, app: ASGIApp, controller: "AdmissionController", retry_after: int = 1):
+        self.app = app
+        self.controller = controller
+        self.retry_after = retry_after
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # CORS预检请求不访问数据库，不占用名额
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        
+        limiter = self.controller.limiter(self.controller.classify(scope["path"]))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        
+        try:
+            await limiter.acquire(self.controller.queue_timeout)
+        except ServiceOverloaded:
+            await self._send_overloaded(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+    
+    async def _send_overloaded(self, send: Send) -> None:
+        body = json.dumps({"detail": "服务繁忙，请稍后重试"}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+admission_controller = AdmissionController(
+    limits=settings.admission_limits,
+    queue_sizes=settings.admission_queue_sizes,
+    routes=settings.admission_routes,
+    queue_timeout=settings.admission_queue_timeout_seconds,
+)
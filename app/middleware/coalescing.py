@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.auth.api_key import parse_api_key_prefix
+from app.auth.jwt import verify_token
+from app.auth.versions import get_cached_auth_version
+
+COALESCED_HEADER = b"x-coalesced"
+
+# 授权分类：role为相同角色集合的用户共享结果，user为同一用户共享结果
+AUTH_CLASSES = ("role", "user")
+
+class _Flight:
+    """一次正在执行的请求，完成后保存响应供等待者共享"""
+    __slots__ = ("done", "started", "elapsed_ms", "status", "headers", "body")
+    
+    def __init__(self):
+        self.done = asyncio.Event()
+        self.started = time.perf_counter()
+        self.elapsed_ms = 0.0
+        self.status: Optional[int] = None
+        self.headers: List[Tuple[bytes, bytes]] = []
+        self.body: Optional[bytes] = None
+
+class CoalescingStats:
+    """按路由统计合并的请求数和节省的处理时间"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict] = {}
+    
+    def record(self, route: str, outcome: str, saved_ms: float = 0.0) -> None:
+        """outcome: executed（实际执行）、coalesced（共享了其他请求的结果）、fallback（等待后仍需自己执行）"""
+        with self._lock:
+            stats = self._routes.setdefault(route, {"executed": 0, "coalesced": 0, "fallback": 0, "saved_ms": 0.0})
+            stats[outcome] += 1
+            stats["saved_ms"] += saved_ms
+    
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                route: {**stats, "saved_ms": round(stats["saved_ms"], 2)}
+                for route, stats in self._routes.items()
+            }
+    
+    def render_prometheus(self) -> str:
+        """以Prometheus文本格式输出指标"""
+        with self._lock:
+            lines = [
+                "# HELP http_coalesced_requests_total GET requests by coalescing outcome, by route.",
+                "# TYPE http_coalesced_requests_total counter",
+            ]
+            for route, stats in self._routes.items():
+                for outcome in ("executed", "coalesced", "fallback"):
+                    lines.append(f'http_coalesced_requests_total{{route="{route}",outcome="{outcome}"}} {stats[outcome]}')
+            lines.append("# HELP http_coalesced_saved_seconds_total Handler time saved by sharing in-flight results, by route.")
+            lines.append("# TYPE http_coalesced_saved_seconds_total counter")
+            for route, stats in self._routes.items():
+                lines.append(f'http_coalesced_saved_seconds_total{{route="{route}"}} {stats["saved_ms"] / 1000}')
+        return "\n".join(lines) + "\n"
+
+coalescing_stats = CoalescingStats()
+
+class CoalescingMiddleware:
+    """相同GET请求的合并（single-flight）
+    
+    只处理routes中配置的路径。路径、查询字符串、Accept和授权分类都相同的并发请求只执行一次，
+    其余请求等待它完成后共享同一响应（带 X-Coalesced: true）。只合并同时在途的请求，不做缓存。
+    
+    授权分类在这里校验JWT签名、有效期和授权版本号：role路由按角色集合、超级用户和激活状态分类，
+    user路由按用户ID分类；无法在本地确认的凭据（API密钥、版本号过期的令牌）只与完全相同的凭据合并。
+    原请求出错（5xx）、响应过大或中途断开时，等待者各自执行。
+    """
+    
+    def __init__(self, app: ASGIApp, routes: Dict[str, str], max_body_size: int = 4 * 1024 * 1024):
+        unknown = set(routes.values()) - set(AUTH_CLASSES)
+        if unknown:
+            raise ValueError(f"未知的授权分类: {', '.join(sorted(unknown))}")
+        self.app = app
+        self.routes = {path.rstrip("/") or "/": auth_class for path, auth_class in routes.items()}
+        self.max_body_size = max_body_size
+        self._in_flight: Dict[Tuple, _Flight] = {}
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        
+        route = scope["path"].rstrip("/") or "/"
+        auth_class = self.routes.get(route)
+        if auth_class is None:
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        if (
+            "no-cache" in headers.get("cache-control", "")
+            or headers.get("x-profile") == "1"
+            or b"__profile" in scope["query_string"]
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        key = (
+            scope["path"],
+            scope["query_string"],
+            headers.get("accept", ""),
+            self._auth_key(headers, auth_class),
+        )
+        
+        flight = self._in_flight.get(key)
+        if flight is not None:
+            await flight.done.wait()
+            if flight.body is not None:
+                coalescing_stats.record(route, "coalesced", flight.elapsed_ms)
+                await self._replay(send, flight)
+                return
+            coalescing_stats.record(route, "fallback")
+            await self.app(scope, receive, send)
+            return
+        
+        flight = self._in_flight[key] = _Flight()
+        try:
+            await self._call_and_capture(scope, receive, send, flight)
+            coalescing_stats.record(route, "executed")
+        finally:
+            del self._in_flight[key]
+            flight.done.set()
+    
+    async def _call_and_capture(self, scope: Scope, receive: Receive, send: Send, flight: _Flight) -> None:
+        chunks: List[bytes] = []
+        size = 0
+        complete = False
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal size, complete
+            if message["type"] == "http.response.start":
+                flight.status = message["status"]
+                flight.headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_body_size:
+                    chunks.append(chunk)
+                if not message.get("more_body", False):
+                    complete = True
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+        
+        if complete and flight.status is not None and flight.status < 500 and size <= self.max_body_size:
+            flight.body = b"".join(chunks)
+        flight.elapsed_ms = (time.perf_counter() - flight.started) * 1000
+    
+    @staticmethod
+    def _auth_key(headers: Headers, auth_class: str) -> str:
+        """授权分类标识"""
+        authorization = headers.get("authorization")
+        if not authorization:
+            return "anonymous"
+        
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token and parse_api_key_prefix(token) is None:
+            payload = verify_token(token)
+            if (
+                payload
+                and payload.get("uid") is not None
+                and payload.get("ver") is not None
+                and get_cached_auth_version(payload["uid"]) == payload["ver"]
+            ):
+                if auth_class == "user":
+                    return f"user:{payload['uid']}"
+                roles = ",".join(sorted(payload.get("roles") or []))
+                return f"roles:{roles}|su:{bool(payload.get('su'))}|active:{bool(payload.get('active'))}"
+        return "credential:" + hashlib.sha256(authorization.encode()).hexdigest()
+    
+    @staticmethod
+    async def _replay(send: Send, flight: _Flight) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": flight.status,
+            "headers": flight.headers + [(COALESCED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": flight.body})
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+from typing import Dict, List, Tuple
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.auth.api_key import parse_api_key_prefix
+from app.auth.jwt import verify_token
+from app.utils.cache import TTLCache
+from app.utils.serialization import MSGPACK_MEDIA_TYPES
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = b"idempotent-replayed"
+MAX_KEY_LENGTH = 255
+
+class _StoredResponse:
+    """已完成请求的响应"""
+    __slots__ = ("fingerprint", "status", "headers", "body")
+    
+    def __init__(self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+class IdempotencyMiddleware:
+    """POST请求的Idempotency-Key支持
+    
+    以(调用者, 键)保存第一次请求的响应，TTL内相同的重试直接返回保存的响应并带上 Idempotent-Replayed: true；
+    原请求仍在处理时，并发的重复请求等待其完成后再返回同一响应，不会重复执行。
+    调用者为JWT用户或API密钥，未认证的请求（如注册）使用客户端地址。
+    同一个键搭配不同的请求体或不同的响应格式（Accept）返回422；5xx响应不保存，重试会再次执行。
+    保存在进程内，多进程部署时只在同一进程内生效。
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        ttl: float = 3600.0,
+        max_entries: int = 10000,
+        max_body_size: int = 1024 * 1024,
+        wait_timeout: float = 30.0
+    ):
+        self.app = app
+        self.max_body_size = max_body_size
+        self.wait_timeout = wait_timeout
+        self._responses = TTLCache("idempotency", ttl=ttl, maxsize=max_entries)
+        self._in_flight: Dict[Tuple[str, str], asyncio.Event] = {}
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._send_error(send, 400, f"Idempotency-Key长度必须在1到{MAX_KEY_LENGTH}之间")
+            return
+        
+        body = await self._read_body(receive)
+        # 响应格式（JSON/MessagePack）也属于请求的一部分，以不同格式重试同一个键返回422
+        accept = headers.get("accept", "").encode()
+        media = b"msgpack" if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES) else b"json"
+        fingerprint = hashlib.sha256(scope["path"].encode() + b"\0" + media + b"\0" + body).hexdigest()
+        store_key = (self._caller(scope, headers), key)
+        
+        while True:
+            stored = self._responses.get(store_key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    await self._send_error(send, 422, "Idempotency-Key已用于不同的请求")
+                    return
+                await self._replay(send, stored)
+                return
+            
+            event = self._in_flight.get(store_key)
+            if event is None:
+                break
+            try:
+                await asyncio.wait_for(event.wait(), self.wait_timeout)
+            except asyncio.TimeoutError:
+                await self._send_error(send, 409, "相同Idempotency-Key的请求正在处理中")
+                return
+        
+        event = self._in_flight[store_key] = asyncio.Event()
+        try:
+            await self._call_and_store(scope, body, send, store_key, fingerprint)
+        finally:
+            del self._in_flight[store_key]
+            event.set()
+    
+    async def _call_and_store(
+        self,
+        scope: Scope,
+        body: bytes,
+        send: Send,
+        store_key: Tuple[str, str],
+        fingerprint: str
+    ) -> None:
+        body_sent = False
+        
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if body_sent:
+                return {"type": "http.disconnect"}
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        
+        status = 500
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_body_size:
+                    chunks.append(chunk)
+            await send(message)
+        
+        await self.app(scope, replay_receive, send_wrapper)
+        
+        if status < 500 and size <= self.max_body_size:
+            self._responses.set(store_key, _StoredResponse(fingerprint, status, response_headers, b"".join(chunks)))
+    
+    @staticmethod
+    def _caller(scope: Scope, headers: Headers) -> str:
+        """调用者标识：JWT用户、API密钥前缀，其他情况为凭据摘要或客户端地址"""
+        authorization = headers.get("authorization")
+        if authorization:
+            scheme, _, token = authorization.partition(" ")
+            if scheme.lower() == "bearer" and token:
+                prefix = parse_api_key_prefix(token)
+                if prefix is not None:
+                    return "key:" + prefix
+                payload = verify_token(token)
+                if payload and payload.get("sub"):
+                    return "user:" + payload["sub"]
+            return "auth:" + hashlib.sha256(authorization.encode()).hexdigest()
+        client = scope.get("client")
+        return "client:" + (client[0] if client else "")
+    
+    @staticmethod
+    async def _read_body(receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+    
+    @staticmethod
+    async def _replay(send: Send, stored: _StoredResponse) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": stored.headers + [(REPLAYED_HEADER, b"true")],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+    
+    @staticmethod
+    async def _send_error(send: Send, status: int, detail: str) -> None:
+        body = json.dumps({"detail": detail}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,28 @@
+import re
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# 前端开发服务器误发到API的请求路径（Vite、node_modules、源码目录）
+JUNK_PATH_PATTERN = re.compile(r"/(?:@vite|node_modules|src)/")
+
+_NOT_FOUND_BODY = b'{"detail":"Not Found"}'
+
+class JunkPathMiddleware:
+    """在路由匹配之前直接拒绝已知的无效路径，且不记录访问日志"""
+    
+    def __init__(self, app: ASGIApp, pattern: re.Pattern = JUNK_PATH_PATTERN):
+        self.app = app
+        self.match = pattern.match
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and self.match(scope["path"]):
+            await send({
+                "type": "http.response.start",
+                "status": 404,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(_NOT_FOUND_BODY)).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": _NOT_FOUND_BODY})
+            return
+        await self.app(scope, receive, send)
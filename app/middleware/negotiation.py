@@ -0,0 +1,28 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.utils.serialization import MSGPACK_MEDIA_TYPES, set_wants_msgpack
+
+class ContentNegotiationMiddleware:
+    """根据Accept头决定响应使用JSON还是MessagePack"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        accept = b""
+        for name, value in scope["headers"]:
+            if name == b"accept":
+                accept = value
+                break
+        set_wants_msgpack(any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES))
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).add_vary_header("Accept")
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
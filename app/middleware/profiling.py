@@ -0,0 +1,122 @@
+import time
+from cProfile import Profile
+from typing import Optional
+from urllib.parse import parse_qs
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.auth.api_key import is_api_key, authenticate_api_key
+from app.auth.jwt import verify_token, current_user_from_claims, load_token_user, load_api_key_user
+from app.auth.principal import CurrentUser
+from app.database import SessionLocal
+from app.diagnostics.profiling import profile_store
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "__profile"
+
+def _profile_requested(scope: Scope) -> bool:
+    """是否带有剖析标记"""
+    if Headers(scope=scope).get(PROFILE_HEADER) == "1":
+        return True
+    query_string = scope.get("query_string", b"")
+    return PROFILE_QUERY_PARAM.encode() in query_string and \
+        parse_qs(query_string.decode("latin-1")).get(PROFILE_QUERY_PARAM) == ["1"]
+
+def _load_from_db(token: str, payload: Optional[dict]) -> Optional[CurrentUser]:
+    """查询数据库构建请求者（在线程池中执行）"""
+    db = SessionLocal()
+    try:
+        if payload is None:
+            identity = authenticate_api_key(db, token)
+            return load_api_key_user(db, identity) if identity is not None else None
+        return load_token_user(db, payload)
+    finally:
+        db.close()
+
+async def _is_admin_request(scope: Scope) -> bool:
+    """根据Bearer凭据（JWT或API密钥）判断请求者是否为管理员
+    
+    与get_current_user相同：JWT的授权版本号仍为最新时直接使用令牌声明，
+    否则与API密钥一样在线程池中查询数据库，不阻塞事件循环。
+    """
+    authorization = Headers(scope=scope).get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    
+    if is_api_key(token):
+        current_user = await run_in_threadpool(_load_from_db, token, None)
+    else:
+        payload = verify_token(token)
+        if not payload or not payload.get("sub"):
+            return False
+        current_user = current_user_from_claims(payload)
+        if current_user is None:
+            current_user = await run_in_threadpool(_load_from_db, token, payload)
+    
+    if current_user is None or not current_user.is_active:
+        return False
+    return current_user.is_superuser or "admin" in current_user.role_names
+
+class ProfilingMiddleware:
+    """管理员按需对单个请求做cProfile剖析
+
+    剖析在事件循环线程上进行，覆盖async路由中的同步工作（服务层、密码哈希、ORM、序列化）；
+    在线程池中执行的同步依赖不在剖析范围内。剖析期间同一线程上并发的其他请求也会被计入。
+    结果ID通过 X-Profile-Id 响应头返回，未执行剖析时通过 X-Profile-Status 说明原因。
+    """
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not _profile_requested(scope):
+            await self.app(scope, receive, send)
+            return
+        
+        if not await _is_admin_request(scope):
+            await self._call_with_status(scope, receive, send, "forbidden")
+            return
+        
+        if not profile_store.try_acquire():
+            await self._call_with_status(scope, receive, send, "rate-limited")
+            return
+        
+        profiler = Profile()
+        status_code = 500
+        start_message = None
+        body_messages = []
+        
+        async def buffer_send(message: Message) -> None:
+            nonlocal status_code, start_message
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                start_message = message
+            else:
+                body_messages.append(message)
+        
+        try:
+            start = time.perf_counter()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, buffer_send)
+            finally:
+                profiler.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            profile_id = profile_store.save(profiler, scope["method"], scope["path"], duration_ms, status_code)
+        finally:
+            profile_store.release()
+        
+        # 缓冲整个响应以便在响应头中带上剖析ID
+        MutableHeaders(scope=start_message)["X-Profile-Id"] = profile_id
+        await send(start_message)
+        for message in body_messages:
+            await send(message)
+    
+    async def _call_with_status(self, scope: Scope, receive: Receive, send: Send, profile_status: str) -> None:
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)["X-Profile-Status"] = profile_status
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,41 @@
+from typing import Dict
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.database.budget import begin_query_budget, end_query_budget
+from app.utils.routes import RouteTable
+
+DEFAULT_ROUTE = "default"
+
+class QueryBudgetMiddleware:
+    """按路由设置请求的数据库执行预算
+    
+    budgets为 路径 -> {"timeout_ms": 累计执行时间上限, "max_statements": 语句数上限}，
+    未配置的项和未匹配的路由使用默认值，0表示不限制。超出预算的请求立即失败，不再继续占用连接。
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        budgets: Dict[str, Dict[str, float]],
+        default_timeout_ms: float,
+        default_max_statements: int
+    ):
+        self.app = app
+        self.default_timeout_ms = default_timeout_ms
+        self.default_max_statements = default_max_statements
+        self.budgets = RouteTable(budgets)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        route, budget = self.budgets.match(scope["path"]) or (DEFAULT_ROUTE, {})
+        token = begin_query_budget(
+            route,
+            budget.get("timeout_ms", self.default_timeout_ms),
+            int(budget.get("max_statements", self.default_max_statements))
+        )
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_query_budget(token)
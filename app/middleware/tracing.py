@@ -0,0 +1,38 @@
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.diagnostics.tracing import start_root_span, finish_root_span
+
+class TracingMiddleware:
+    """为每个请求开启追踪根片段，追踪ID通过 X-Trace-Id 响应头返回"""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        root = start_root_span(f"{scope['method']} {scope['path']}", {
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        })
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                MutableHeaders(scope=message)["X-Trace-Id"] = root.trace.trace_id
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 路由匹配后使用路由模板命名，便于按接口聚合
+            route = scope.get("route")
+            if route is not None:
+                root.name = f"{scope['method']} {route.path}"
+                root.attributes["http.route"] = route.path
+            finish_root_span(root)
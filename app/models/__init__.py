@@ -2,6 +2,11 @@ from .user import User
 from .role import Role
 from .user_role import UserRole
 from .permission import Permission
+from .role_permission import RolePermission
+from .user_effective_permission import UserEffectivePermission
+from .api_key import ApiKey
+from .job import Job
+from .change_event import ChangeEvent
 from .base import Base
 
-__all__ = ["User", "Role", "UserRole", "Permission", "Base"]
\ No newline at end of file
+__all__ = ["User", "Role", "UserRole", "Permission", "RolePermission", "UserEffectivePermission", "ApiKey", "Job", "ChangeEvent", "Base"]
\ No newline at end of file
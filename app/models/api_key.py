@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+
+class ApiKey(BaseModel):
+    """API密钥模型（供服务账号等机器客户端使用）"""
+    __tablename__ = "api_keys"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True, comment="所属用户ID")
+    name = Column(String(100), nullable=False, comment="密钥名称")
+    prefix = Column(String(16), unique=True, nullable=False, index=True, comment="密钥前缀（用于查找和展示）")
+    key_digest = Column(String(64), nullable=False, comment="密钥的HMAC-SHA256摘要")
+    scopes = Column(String(255), nullable=False, default="read", comment="权限范围，逗号分隔")
+    is_active = Column(Boolean, default=True, comment="是否激活")
+    expires_at = Column(DateTime(timezone=True), comment="过期时间")
+    last_used_at = Column(DateTime(timezone=True), comment="最后使用时间")
+    
+    # 关联关系
+    user = relationship("User")
+    
+    def __repr__(self):
+        return f"<ApiKey(name='{self.name}', prefix='{self.prefix}')>"
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, JSON, Index
+from .base import BaseModel
+
+class ChangeEvent(BaseModel):
+    """变更事件模型（变更推送的事件日志，按ID续传）"""
+    __tablename__ = "change_events"
+    __table_args__ = (
+        # 续传时按创建时间查找重叠窗口的起点，清理时按创建时间删除
+        Index("ix_change_events_created_at", "created_at"),
+    )
+    
+    entity = Column(String(30), nullable=False, comment="实体类型：user/role/permission/user_role/role_permission")
+    action = Column(String(20), nullable=False, comment="操作：created/updated/deleted")
+    entity_id = Column(Integer, nullable=False, comment="实体ID")
+    data = Column(JSON, comment="变更内容")
+    
+    def __repr__(self):
+        return f"<ChangeEvent(id={self.id}, entity='{self.entity}', action='{self.action}', entity_id={self.entity_id})>"
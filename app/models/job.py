@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, Index
+from .base import BaseModel
+
+class Job(BaseModel):
+    """后台任务模型"""
+    __tablename__ = "jobs"
+    __table_args__ = (
+        Index("ix_jobs_state", "state"),
+    )
+    
+    type = Column(String(50), nullable=False, comment="任务类型")
+    state = Column(String(20), nullable=False, default="pending", comment="状态：pending/running/succeeded/failed/cancelled")
+    params = Column(JSON, nullable=False, default=dict, comment="任务参数")
+    progress = Column(Integer, nullable=False, default=0, comment="已处理数量")
+    total = Column(Integer, comment="总数量")
+    result = Column(JSON, comment="任务结果")
+    error = Column(Text, comment="错误信息")
+    cancel_requested = Column(Boolean, nullable=False, default=False, comment="是否已请求取消")
+    owner = Column(String(100), comment="执行者：主机名:进程ID:启动ID")
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), comment="提交者ID")
+    started_at = Column(DateTime(timezone=True), comment="开始时间")
+    finished_at = Column(DateTime(timezone=True), comment="结束时间")
+    
+    def __repr__(self):
+        return f"<Job(id={self.id}, type='{self.type}', state='{self.state}')>"
@@ -13,5 +13,8 @@ class Permission(BaseModel):
     action = Column(String(50), nullable=False, comment="操作类型")
     is_active = Column(Boolean, default=True, comment="是否激活")
     
+    # 关联角色（关联记录由外键ON DELETE CASCADE删除，删除权限时不加载也不置空）
+    roles = relationship("RolePermission", back_populates="permission", cascade="all, delete-orphan", passive_deletes=True)
+    
     def __repr__(self):
         return f"<Permission(name='{self.name}', resource='{self.resource}', action='{self.action}')>"
\ No newline at end of file
@@ -11,8 +11,11 @@ class Role(BaseModel):
     description = Column(Text, comment="角色描述")
     is_active = Column(Boolean, default=True, comment="是否激活")
     
-    # 关联用户
-    users = relationship("UserRole", back_populates="role")
+    # 关联用户（关联记录由外键ON DELETE CASCADE删除，删除角色时不加载也不置空）
+    users = relationship("UserRole", back_populates="role", cascade="all, delete-orphan", passive_deletes=True)
+    
+    # 关联权限
+    permissions = relationship("RolePermission", back_populates="role", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self):
         return f"<Role(name='{self.name}', display_name='{self.display_name}')>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Index, DDL, event, func, text
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -13,9 +13,30 @@ class User(BaseModel):
     is_active = Column(Boolean, default=True, comment="是否激活")
     is_superuser = Column(Boolean, default=False, comment="是否超级用户")
     last_login = Column(DateTime(timezone=True), comment="最后登录时间")
+    auth_version = Column(Integer, nullable=False, default=0, server_default="0", comment="授权版本号（资料或角色变更时递增）")
     
     # 关联角色
     roles = relationship("UserRole", back_populates="user", foreign_keys="UserRole.user_id")
     
+    __table_args__ = (
+        # 不区分大小写的前缀查询（SQLite使用范围扫描）
+        Index("ix_users_username_lower", func.lower(username)),
+        Index("ix_users_email_lower", func.lower(email)),
+        Index("ix_users_full_name_lower", func.lower(full_name)),
+        # 登录活跃度统计按最后登录时间范围扫描
+        Index("ix_users_last_login", last_login),
+        # PostgreSQL下的三元组索引，支持前缀和子串模糊查询
+        Index("ix_users_username_trgm", text("lower(username) gin_trgm_ops"), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_users_email_trgm", text("lower(email) gin_trgm_ops"), postgresql_using="gin").ddl_if(dialect="postgresql"),
+        Index("ix_users_full_name_trgm", text("lower(full_name) gin_trgm_ops"), postgresql_using="gin").ddl_if(dialect="postgresql"),
+    )
+    
     def __repr__(self):
-        return f"<User(username='{self.username}', email='{self.email}')>"
\ No newline at end of file
+        return f"<User(username='{self.username}', email='{self.email}')>"
+
+# 三元组索引依赖pg_trgm扩展
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql")
+)
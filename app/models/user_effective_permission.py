@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from .base import Base
+
+class UserEffectivePermission(Base):
+    """用户有效权限物化投影
+    
+    每行表示用户通过某个角色获得某个权限（用户→角色→权限均处于激活状态），
+    由EffectivePermissionService在用户启停、角色分配、角色/权限变更时增量维护。
+    resource、action冗余自权限表，使"谁能对资源执行某操作"成为单次索引查询。
+    """
+    __tablename__ = "user_effective_permissions"
+    __table_args__ = (
+        Index("ix_user_effective_permissions_resource_action", "resource", "action", "user_id"),
+        Index("ix_user_effective_permissions_role", "role_id"),
+        Index("ix_user_effective_permissions_permission", "permission_id"),
+    )
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True, comment="用户ID")
+    permission_id = Column(Integer, ForeignKey("permissions.id", ondelete="CASCADE"), primary_key=True, comment="权限ID")
+    role_id = Column(Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True, comment="来源角色ID")
+    resource = Column(String(100), nullable=False, comment="资源名称")
+    action = Column(String(50), nullable=False, comment="操作类型")
+    
+    def __repr__(self):
+        return f"<UserEffectivePermission(user_id={self.user_id}, permission_id={self.permission_id}, role_id={self.role_id})>"
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class UserRole(BaseModel):
     """用户角色关联模型"""
     __tablename__ = "user_roles"
+    __table_args__ = (
+        UniqueConstraint("user_id", "role_id", name="uq_user_roles_user_role"),
+        # 按角色查找用户和统计各角色用户数
+        Index("ix_user_roles_role_id", "role_id"),
+    )
     
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, comment="用户ID")
     role_id = Column(Integer, ForeignKey("roles.id", ondelete="CASCADE"), nullable=False, comment="角色ID")
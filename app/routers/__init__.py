@@ -1,3 +1,3 @@
-from . import auth, users, roles
+from . import auth, users, roles, diagnostics, api_keys, jobs, changes, stats
 
-__all__ = ["auth", "users", "roles"]
\ No newline at end of file
+__all__ = ["auth", "users", "roles", "diagnostics", "api_keys", "jobs", "changes", "stats"]
\ No newline at end of file
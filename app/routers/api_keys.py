@@ -0,0 +1,76 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.api_key import ApiKey
+from app.schemas.api_key import ApiKeyCreate, ApiKeyResponse, ApiKeyCreated
+from app.services.api_key_service import ApiKeyService
+from app.auth.jwt import get_current_active_user, require_admin
+from app.auth.principal import CurrentUser
+
+router = APIRouter()
+
+def _to_response(api_key: ApiKey) -> dict:
+    return dict(
+        id=api_key.id,
+        name=api_key.name,
+        prefix=api_key.prefix,
+        user_id=api_key.user_id,
+        scopes=api_key.scopes.split(","),
+        is_active=api_key.is_active,
+        expires_at=api_key.expires_at,
+        last_used_at=api_key.last_used_at,
+        created_at=api_key.created_at
+    )
+
+@router.post("/", response_model=ApiKeyCreated, status_code=status.HTTP_201_CREATED)
+async def create_api_key(
+    api_key_create: ApiKeyCreate,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """创建API密钥（需要管理员权限），完整密钥只在此返回一次"""
+    require_admin(current_user)
+    
+    try:
+        api_key, key = ApiKeyService.create_api_key(
+            db,
+            user_id=api_key_create.user_id or current_user.id,
+            name=api_key_create.name,
+            scopes=api_key_create.scopes,
+            expires_in_days=api_key_create.expires_in_days
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return ApiKeyCreated(**_to_response(api_key), key=key)
+
+@router.get("/", response_model=List[ApiKeyResponse])
+async def get_api_keys(
+    user_id: Optional[int] = Query(None, description="按所属用户筛选"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取API密钥列表（需要管理员权限）"""
+    require_admin(current_user)
+    return [ApiKeyResponse(**_to_response(api_key)) for api_key in ApiKeyService.get_api_keys(db, user_id)]
+
+@router.delete("/{api_key_id}")
+async def revoke_api_key(
+    api_key_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """吊销API密钥（需要管理员权限）"""
+    require_admin(current_user)
+    
+    if not ApiKeyService.revoke_api_key(db, api_key_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="API密钥不存在"
+        )
+    
+    return {"message": "API密钥吊销成功"}
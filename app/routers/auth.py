@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.database import get_db
+from app.database.budget import QueryBudgetExceeded
 from app.schemas.user import UserCreate, UserLogin, UserResponse
 from app.schemas.token import Token
 from app.services.auth_service import AuthService
@@ -43,6 +44,9 @@ async def register(user_create: UserCreate, db: Session = Depends(get_db)):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
+    except QueryBudgetExceeded:
+        # 由全局异常处理器返回503
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
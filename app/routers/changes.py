@@ -0,0 +1,113 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, List, Optional
+from app.config import settings
+from app.database import get_db, SessionLocal
+from app.changes import change_broadcaster
+from app.changes.recorder import load_changes_after, latest_change_id
+from app.auth.jwt import get_current_active_user, require_admin
+from app.auth.principal import CurrentUser
+
+router = APIRouter()
+
+ENTITIES = ("user", "role", "permission", "user_role", "role_permission")
+
+# 客户端断线后的重连间隔（毫秒）
+RETRY_MS = 3000
+
+def _format_event(event_id: int, data: Dict, event_type: Optional[str] = None) -> str:
+    """格式化为SSE消息"""
+    lines = [f"id: {event_id}"]
+    if event_type:
+        lines.append(f"event: {event_type}")
+    lines.append("data: " + json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    return "\n".join(lines) + "\n\n"
+
+def _replay(after_id: Optional[int], entities: Optional[List[str]]):
+    """读取续传事件；无续传位置或无法完整补发时返回最新事件ID"""
+    db = SessionLocal()
+    try:
+        if after_id is not None:
+            events, complete = load_changes_after(
+                db, after_id, settings.change_feed_replay_limit, entities,
+                overlap_seconds=settings.change_feed_resume_overlap_seconds
+            )
+            if complete:
+                return events, None
+        return [], latest_change_id(db)
+    finally:
+        db.close()
+
+@router.get("/stream")
+async def stream_changes(
+    request: Request,
+    entities: Optional[str] = Query(None, description="逗号分隔的实体类型，例如 user,role；为空时推送全部"),
+    last_event_id: Optional[int] = Query(None, ge=0, description="从该事件ID之后续传（重连时浏览器发送的Last-Event-ID请求头优先）"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """用户、角色、权限的变更推送（Server-Sent Events，需要管理员权限）
+    
+    每条消息的id为事件ID，data为 {id, entity, action, entity_id, data, created_at}。
+    连接时带上次收到的事件ID可续传；事件已被清理或积压过多时先发送 reset 事件，客户端应重新加载列表。
+    事件ID按写入顺序而非提交顺序分配，续传时会重发该事件之前一小段时间内的事件，客户端应按事件ID去重。
+    新连接先发送 ready 事件，其id为当前最新事件ID。
+    """
+    require_admin(current_user)
+    # 长连接期间不占用数据库连接
+    db.close()
+    
+    entity_filter = None
+    if entities:
+        entity_filter = [entity.strip() for entity in entities.split(",") if entity.strip()]
+        unknown = set(entity_filter) - set(ENTITIES)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"未知的实体类型: {', '.join(sorted(unknown))}"
+            )
+    
+    after_id = last_event_id
+    if last_event_id_header and last_event_id_header.isdigit():
+        after_id = int(last_event_id_header)
+    
+    async def event_stream() -> AsyncIterator[str]:
+        # 先订阅再补发，补发期间提交的事件不会丢失
+        subscription = change_broadcaster.subscribe()
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            events, latest_id = await run_in_threadpool(_replay, after_id, entity_filter)
+            if latest_id is not None:
+                yield _format_event(latest_id, {}, "reset" if after_id is not None else "ready")
+            replayed = set()
+            for event in events:
+                replayed.add(event["id"])
+                yield _format_event(event["id"], event)
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), settings.change_feed_heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # 积压溢出或服务停止，客户端重连后续传
+                    break
+                if event["id"] in replayed:
+                    continue
+                if entity_filter and event["entity"] not in entity_filter:
+                    continue
+                yield _format_event(event["id"], event)
+        finally:
+            change_broadcaster.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -0,0 +1,219 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import FileResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Dict, List, Literal
+from app.schemas.diagnostics import (
+    ProfileInfo,
+    HeapStatus,
+    HeapSnapshotInfo,
+    AllocationSite,
+    AllocationDiff,
+    MemoryObjectsInfo,
+    LoopLagInfo,
+    CoalescingRouteStats,
+    AdmissionClassStats
+)
+from app.diagnostics.profiling import profile_store
+from app.diagnostics.heap import heap_tracker, get_session_identity_maps
+from app.diagnostics.loop_lag import loop_lag_monitor
+from app.middleware.coalescing import coalescing_stats
+from app.middleware.admission import admission_controller
+from app.database import budget as query_budget
+from app.utils.cache import get_cache_sizes
+from app.utils.logger import get_log_queue_size
+from app.auth.jwt import get_current_active_user, require_admin
+from app.auth.principal import CurrentUser
+
+router = APIRouter()
+
+@router.get("/profiles", response_model=List[ProfileInfo])
+async def list_profiles(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取请求剖析记录列表（需要管理员权限）"""
+    require_admin(current_user)
+    return [ProfileInfo(**profile) for profile in profile_store.list()]
+
+@router.get("/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: Literal["pstats", "text"] = Query("pstats", description="pstats为原始文件（可用snakeviz等工具打开），text为文本摘要"),
+    sort: str = Query("cumulative", description="文本摘要的排序字段"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """下载请求剖析结果（需要管理员权限）"""
+    require_admin(current_user)
+    
+    if format == "text":
+        try:
+            summary = profile_store.summary(profile_id, sort=sort)
+        except KeyError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"无效的排序字段: {sort}"
+            )
+        if summary is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="剖析记录不存在"
+            )
+        return PlainTextResponse(summary)
+    
+    file_path = profile_store.get_file(profile_id)
+    if file_path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="剖析记录不存在"
+        )
+    return FileResponse(file_path, media_type="application/octet-stream", filename=f"{profile_id}.pstats")
+
+@router.get("/heap", response_model=HeapStatus)
+async def get_heap_status(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取堆内存追踪状态（需要管理员权限）"""
+    require_admin(current_user)
+    return heap_tracker.status()
+
+@router.post("/heap/start", response_model=HeapStatus)
+async def start_heap_tracing(
+    frames: int = Query(1, ge=1, le=50, description="每个分配记录的调用栈深度，越深开销越大"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """开始追踪内存分配（需要管理员权限）"""
+    require_admin(current_user)
+    heap_tracker.start(frames)
+    return heap_tracker.status()
+
+@router.post("/heap/stop", response_model=HeapStatus)
+async def stop_heap_tracing(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """停止追踪内存分配，已有快照仍然保留（需要管理员权限）"""
+    require_admin(current_user)
+    heap_tracker.stop()
+    return heap_tracker.status()
+
+@router.post("/heap/snapshots", response_model=HeapSnapshotInfo, status_code=status.HTTP_201_CREATED)
+async def take_heap_snapshot(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """拍摄堆内存快照（需要管理员权限）"""
+    require_admin(current_user)
+    try:
+        # 拍摄快照需要遍历所有追踪记录，放到线程池中避免阻塞事件循环
+        return await run_in_threadpool(heap_tracker.take_snapshot)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.delete("/heap/snapshots/{snapshot_id}")
+async def delete_heap_snapshot(
+    snapshot_id: str,
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """删除堆内存快照（需要管理员权限）"""
+    require_admin(current_user)
+    if not heap_tracker.delete(snapshot_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="快照不存在"
+        )
+    return {"message": "快照删除成功"}
+
+@router.get("/heap/snapshots/{snapshot_id}/top", response_model=List[AllocationSite])
+async def get_heap_top(
+    snapshot_id: str,
+    group_by: Literal["lineno", "filename", "traceback"] = Query("lineno", description="按行、文件或完整调用栈聚合"),
+    limit: int = Query(20, ge=1, le=500, description="返回的分配位置数量"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取快照中占用内存最多的分配位置（需要管理员权限）"""
+    require_admin(current_user)
+    sites = await run_in_threadpool(heap_tracker.top, snapshot_id, group_by, limit)
+    if sites is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="快照不存在"
+        )
+    return sites
+
+@router.get("/heap/diff", response_model=List[AllocationDiff])
+async def get_heap_diff(
+    base: str = Query(..., description="基准快照ID"),
+    target: str = Query(..., description="对比快照ID"),
+    group_by: Literal["lineno", "filename", "traceback"] = Query("lineno", description="按行、文件或完整调用栈聚合"),
+    limit: int = Query(20, ge=1, le=500, description="返回的分配位置数量"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """对比两个快照，按内存增长量排序（需要管理员权限）"""
+    require_admin(current_user)
+    sites = await run_in_threadpool(heap_tracker.diff, base, target, group_by, limit)
+    if sites is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="快照不存在"
+        )
+    return sites
+
+@router.get("/heap/objects", response_model=MemoryObjectsInfo)
+async def get_memory_objects(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取数据库会话标识映射、进程内缓存和日志队列的大小（需要管理员权限）"""
+    require_admin(current_user)
+    sessions = get_session_identity_maps()
+    return MemoryObjectsInfo(
+        sessions=sessions,
+        identity_map_total=sum(item["identity_map_size"] for item in sessions),
+        caches=get_cache_sizes(),
+        log_queue_size=get_log_queue_size()
+    )
+
+@router.get("/loop-lag", response_model=LoopLagInfo)
+async def get_loop_lag(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取事件循环调度延迟直方图和阻塞记录（需要管理员权限）"""
+    require_admin(current_user)
+    return loop_lag_monitor.snapshot()
+
+@router.get("/coalescing", response_model=Dict[str, CoalescingRouteStats])
+async def get_coalescing_stats(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取按路由统计的GET请求合并情况（需要管理员权限）"""
+    require_admin(current_user)
+    return coalescing_stats.snapshot()
+
+@router.get("/admission", response_model=Dict[str, AdmissionClassStats])
+async def get_admission_stats(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取各路由分类的并发、排队和拒绝统计（需要管理员权限）"""
+    require_admin(current_user)
+    return admission_controller.snapshot()
+
+@router.get("/query-budgets", response_model=Dict[str, Dict[str, int]])
+async def get_query_budget_violations(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """获取按路由和原因（timeout/statements）统计的超出数据库预算次数（需要管理员权限）"""
+    require_admin(current_user)
+    return query_budget.get_budget_violations()
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics(
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    """以Prometheus文本格式输出诊断指标（需要管理员权限）"""
+    require_admin(current_user)
+    metrics = (
+        loop_lag_monitor.render_prometheus()
+        + coalescing_stats.render_prometheus()
+        + admission_controller.render_prometheus()
+        + query_budget.render_prometheus()
+    )
+    return PlainTextResponse(metrics, media_type="text/plain; version=0.0.4")
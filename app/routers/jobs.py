@@ -0,0 +1,79 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.schemas.job import JobCreate, JobResponse
+from app.services.job_service import JobService
+from app.auth.jwt import get_current_active_user, require_admin
+from app.auth.principal import CurrentUser
+
+router = APIRouter()
+
+@router.post("/", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_job(
+    job_create: JobCreate,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """提交后台任务（需要管理员权限）"""
+    require_admin(current_user)
+    
+    try:
+        return JobService.submit_job(db, job_create.type, job_create.params, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/", response_model=List[JobResponse])
+async def get_jobs(
+    skip: int = Query(0, ge=0, description="跳过的记录数"),
+    limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
+    state: Optional[str] = Query(None, description="按状态筛选"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取后台任务列表（需要管理员权限）"""
+    require_admin(current_user)
+    return JobService.get_jobs(db, skip=skip, limit=limit, state=state)
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """查询后台任务状态和进度（需要管理员权限）"""
+    require_admin(current_user)
+    
+    job = JobService.get_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    return job
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """取消后台任务（需要管理员权限）"""
+    require_admin(current_user)
+    
+    try:
+        job = JobService.cancel_job(db, job_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="任务不存在"
+        )
+    return job
@@ -1,12 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.schemas.permission import PermissionResponse, PermissionCreate, PermissionUpdate
-from app.models.user import User
+from app.schemas.permission import PermissionResponse, PermissionCreate, PermissionUpdate, EffectivePermissionUsersResponse
+from app.models.permission import Permission
 from app.services.permission_service import PermissionService
-from app.services.user_service import UserService
+from app.services.effective_permission_service import EffectivePermissionService
 from app.auth.jwt import get_current_active_user
+from app.auth.principal import CurrentUser
+from app.utils.fields import parse_fields, trimmed_response
+from app.utils.pagination import CountMode, set_total_count
+from app.utils.serialization import rows_response
+from app.services.count_service import CountService
 
 router = APIRouter()
 
@@ -14,33 +19,48 @@ router = APIRouter()
 async def get_permissions(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,name,resource,action"),
+    count: Optional[CountMode] = Query(None, description="在X-Total-Count响应头返回总数：exact精确、estimate估算、auto自动"),
+    response: Response = None,
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取权限列表"""
-    permissions = PermissionService.get_permissions(db, skip=skip, limit=limit)
+    if count:
+        total, count_mode = CountService.count(db, Permission, mode=count.value)
+        set_total_count(response, total, count_mode)
     
-    return [
-        PermissionResponse(
-            id=permission.id,
-            name=permission.name,
-            display_name=permission.display_name,
-            description=permission.description,
-            resource=permission.resource,
-            action=permission.action,
-            is_active=permission.is_active,
-            created_at=permission.created_at
-        )
-        for permission in permissions
-    ]
+    field_list = parse_fields(fields, PermissionResponse)
+    if field_list:
+        rows = PermissionService.get_permissions_fields(db, field_list, skip=skip, limit=limit)
+        trimmed = trimmed_response(PermissionResponse, field_list, rows)
+        if count:
+            set_total_count(trimmed, total, count_mode)
+        return trimmed
+    
+    rendered = rows_response(PermissionService.get_permission_rows(db, skip=skip, limit=limit))
+    if count:
+        set_total_count(rendered, total, count_mode)
+    return rendered
 
 @router.get("/{permission_id}", response_model=PermissionResponse)
 async def get_permission(
     permission_id: int,
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,name,resource,action"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取指定权限信息"""
+    field_list = parse_fields(fields, PermissionResponse)
+    if field_list:
+        rows = PermissionService.get_permissions_fields(db, field_list, limit=1, permission_id=permission_id)
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="权限不存在"
+            )
+        return trimmed_response(PermissionResponse, field_list, rows[0], many=False)
+    
     permission = PermissionService.get_permission_by_id(db, permission_id)
     if not permission:
         raise HTTPException(
@@ -62,13 +82,12 @@ async def get_permission(
 @router.post("/", response_model=PermissionResponse, status_code=status.HTTP_201_CREATED)
 async def create_permission(
     permission_create: PermissionCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """创建权限（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -100,13 +119,12 @@ async def create_permission(
 async def update_permission(
     permission_id: int,
     permission_update: PermissionUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """更新权限信息（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -135,13 +153,12 @@ async def update_permission(
 @router.delete("/{permission_id}")
 async def delete_permission(
     permission_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """删除权限（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -161,7 +178,7 @@ async def delete_permission(
 @router.get("/resource/{resource}", response_model=List[PermissionResponse])
 async def get_permissions_by_resource(
     resource: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """根据资源获取权限列表"""
@@ -179,4 +196,59 @@ async def get_permissions_by_resource(
             created_at=permission.created_at
         )
         for permission in permissions
-    ]
\ No newline at end of file
+    ]
+
+@router.get("/users/{user_id}/effective", response_model=List[PermissionResponse])
+async def get_user_effective_permissions(
+    user_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取用户的有效权限列表"""
+    # 用户只能查看自己的权限，除非是管理员
+    role_names = current_user.role_names
+    
+    if user_id != current_user.id and "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
+    
+    permissions = EffectivePermissionService.get_user_permissions(db, user_id)
+    
+    return [
+        PermissionResponse(
+            id=permission.id,
+            name=permission.name,
+            display_name=permission.display_name,
+            description=permission.description,
+            resource=permission.resource,
+            action=permission.action,
+            is_active=permission.is_active,
+            created_at=permission.created_at
+        )
+        for permission in permissions
+    ]
+
+@router.get("/effective/users", response_model=EffectivePermissionUsersResponse)
+async def get_users_with_permission(
+    resource: str = Query(..., min_length=1, max_length=100, description="资源名称"),
+    action: str = Query(..., min_length=1, max_length=50, description="操作类型"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取能对指定资源执行指定操作的用户（需要管理员权限）"""
+    # 检查权限
+    role_names = current_user.role_names
+    
+    if "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
+    
+    return EffectivePermissionUsersResponse(
+        resource=resource,
+        action=action,
+        user_ids=EffectivePermissionService.get_user_ids_with_permission(db, resource, action)
+    )
\ No newline at end of file
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
 from app.schemas.role import RoleResponse, RoleCreate, RoleUpdate
-from app.models.user import User
+from app.schemas.permission import PermissionResponse
+from app.models.role import Role
 from app.services.role_service import RoleService
 from app.services.user_service import UserService
 from app.auth.jwt import get_current_active_user
+from app.auth.principal import CurrentUser
+from app.utils.fields import parse_fields, trimmed_response
+from app.utils.pagination import CountMode, set_total_count
+from app.utils.serialization import rows_response
+from app.services.count_service import CountService
 
 router = APIRouter()
 
@@ -14,31 +20,48 @@ router = APIRouter()
 async def get_roles(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,name"),
+    count: Optional[CountMode] = Query(None, description="在X-Total-Count响应头返回总数：exact精确、estimate估算、auto自动"),
+    response: Response = None,
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取角色列表"""
-    roles = RoleService.get_roles(db, skip=skip, limit=limit)
+    if count:
+        total, count_mode = CountService.count(db, Role, Role.is_active == True, mode=count.value)
+        set_total_count(response, total, count_mode)
     
-    return [
-        RoleResponse(
-            id=role.id,
-            name=role.name,
-            display_name=role.display_name,
-            description=role.description,
-            is_active=role.is_active,
-            created_at=role.created_at
-        )
-        for role in roles
-    ]
+    field_list = parse_fields(fields, RoleResponse)
+    if field_list:
+        rows = RoleService.get_roles_fields(db, field_list, skip=skip, limit=limit)
+        trimmed = trimmed_response(RoleResponse, field_list, rows)
+        if count:
+            set_total_count(trimmed, total, count_mode)
+        return trimmed
+    
+    rendered = rows_response(RoleService.get_role_rows(db, skip=skip, limit=limit))
+    if count:
+        set_total_count(rendered, total, count_mode)
+    return rendered
 
 @router.get("/{role_id}", response_model=RoleResponse)
 async def get_role(
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,name"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取指定角色信息"""
+    field_list = parse_fields(fields, RoleResponse)
+    if field_list:
+        rows = RoleService.get_roles_fields(db, field_list, limit=1, active_only=False, role_id=role_id)
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="角色不存在"
+            )
+        return trimmed_response(RoleResponse, field_list, rows[0], many=False)
+    
     role = RoleService.get_role_by_id(db, role_id)
     if not role:
         raise HTTPException(
@@ -58,13 +81,12 @@ async def get_role(
 @router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
 async def create_role(
     role_create: RoleCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """创建角色（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -94,13 +116,12 @@ async def create_role(
 async def update_role(
     role_id: int,
     role_update: RoleUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """更新角色信息（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -127,13 +148,12 @@ async def update_role(
 @router.delete("/{role_id}")
 async def delete_role(
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """删除角色（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -150,17 +170,99 @@ async def delete_role(
     
     return {"message": "角色删除成功"}
 
+@router.get("/{role_id}/permissions", response_model=List[PermissionResponse])
+async def get_role_permissions(
+    role_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取角色的权限列表"""
+    role = RoleService.get_role_by_id(db, role_id)
+    if not role:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="角色不存在"
+        )
+    
+    permissions = RoleService.get_role_permissions(db, role_id)
+    
+    return [
+        PermissionResponse(
+            id=permission.id,
+            name=permission.name,
+            display_name=permission.display_name,
+            description=permission.description,
+            resource=permission.resource,
+            action=permission.action,
+            is_active=permission.is_active,
+            created_at=permission.created_at
+        )
+        for permission in permissions
+    ]
+
+@router.post("/{role_id}/permissions/{permission_id}")
+async def grant_permission_to_role(
+    role_id: int,
+    permission_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """为角色授予权限（需要管理员权限）"""
+    # 检查权限
+    role_names = current_user.role_names
+    
+    if "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
+    
+    try:
+        RoleService.grant_permission_to_role(db, role_id, permission_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {"message": "权限授予成功"}
+
+@router.delete("/{role_id}/permissions/{permission_id}")
+async def revoke_permission_from_role(
+    role_id: int,
+    permission_id: int,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """撤销角色权限（需要管理员权限）"""
+    # 检查权限
+    role_names = current_user.role_names
+    
+    if "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
+    
+    success = RoleService.revoke_permission_from_role(db, role_id, permission_id)
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="撤销权限失败，角色未拥有该权限"
+        )
+    
+    return {"message": "权限撤销成功"}
+
 @router.post("/users/{user_id}/assign/{role_id}")
 async def assign_role_to_user(
     user_id: int,
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """为用户分配角色（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -168,11 +270,12 @@ async def assign_role_to_user(
             detail="权限不足"
         )
     
-    success = UserService.assign_role_to_user(db, user_id, role_id, current_user.id)
-    if not success:
+    try:
+        UserService.assign_role_to_user(db, user_id, role_id, current_user.id)
+    except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="分配角色失败，请检查用户和角色是否存在"
+            detail=f"分配角色失败：{e}"
         )
     
     return {"message": "角色分配成功"}
@@ -181,13 +284,12 @@ async def assign_role_to_user(
 async def remove_role_from_user(
     user_id: int,
     role_id: int,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """移除用户角色（需要管理员权限）"""
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
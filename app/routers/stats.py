@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Response, Query
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.database import get_db
+from app.schemas.stats import StatsSummary
+from app.services.stats_service import StatsService
+from app.auth.jwt import get_current_active_user, require_admin
+from app.auth.principal import CurrentUser
+
+router = APIRouter()
+
+@router.get("/summary", response_model=StatsSummary)
+async def get_stats_summary(
+    days: int = Query(14, ge=1, le=90, description="每日登录统计的天数"),
+    response: Response = None,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """获取仪表盘统计汇总：用户状态、各角色用户数、登录活跃度（需要管理员权限）"""
+    require_admin(current_user)
+    
+    # 聚合查询可能扫描整张用户表，放到线程池中执行，不阻塞事件循环
+    summary = await run_in_threadpool(StatsService.get_summary, db, days)
+    response.headers["Cache-Control"] = f"private, max-age={int(settings.stats_cache_ttl_seconds)}"
+    return summary
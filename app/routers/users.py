@@ -1,46 +1,111 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.database import get_db
-from app.schemas.user import UserResponse, UserUpdate
+from app.schemas.user import UserResponse, UserUpdate, UserSearchResponse, UserBatchRequest, UserBatchResponse
 from app.models.user import User
 from app.services.user_service import UserService
 from app.auth.jwt import get_current_active_user
+from app.auth.principal import CurrentUser
+from app.utils.fields import parse_fields, trimmed_response
+from app.utils.pagination import CountMode, set_total_count
+from app.utils.serialization import rows_response
+from app.services.count_service import CountService
 
 router = APIRouter()
 
+# 批量获取用户的最大数量
+MAX_BATCH_SIZE = 100
+
+def _get_users_batch(db: Session, current_user: CurrentUser, user_ids: List[int]) -> UserBatchResponse:
+    """批量获取用户及其角色（用户查询和角色查询各一次）"""
+    # 去重并保持请求顺序
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"一次最多获取 {MAX_BATCH_SIZE} 个用户"
+        )
+    
+    # 用户只能查看自己的信息，除非是管理员
+    if user_ids != [current_user.id]:
+        role_names = current_user.role_names
+        
+        if "admin" not in role_names and not current_user.is_superuser:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="权限不足"
+            )
+    
+    users = {user.id: user for user in UserService.get_users_by_ids(db, user_ids)}
+    roles_by_user = UserService.get_role_names_for_users(db, list(users))
+    
+    return UserBatchResponse(
+        items=[
+            UserResponse(
+                id=user.id,
+                username=user.username,
+                email=user.email,
+                full_name=user.full_name,
+                is_active=user.is_active,
+                is_superuser=user.is_superuser,
+                created_at=user.created_at,
+                last_login=user.last_login,
+                roles=roles_by_user[user.id]
+            )
+            for user in (users[user_id] for user_id in user_ids if user_id in users)
+        ],
+        missing=[user_id for user_id in user_ids if user_id not in users]
+    )
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,username,roles"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取当前用户信息"""
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    field_list = parse_fields(fields, UserResponse)
+    if field_list:
+        # 只请求令牌中已有的字段时无需查询数据库
+        if set(field_list) <= {"id", "username", "is_active", "is_superuser", "roles"}:
+            user = current_user
+        else:
+            user = UserService.get_user_by_id(db, current_user.id)
+        data = {field: getattr(user, field) for field in field_list if field != "roles"}
+        if "roles" in field_list:
+            data["roles"] = current_user.role_names
+        return trimmed_response(UserResponse, field_list, data, many=False)
+    
+    user = UserService.get_user_by_id(db, current_user.id)
     
     return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        full_name=current_user.full_name,
-        is_active=current_user.is_active,
-        is_superuser=current_user.is_superuser,
-        created_at=current_user.created_at,
-        last_login=current_user.last_login,
-        roles=role_names
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        full_name=user.full_name,
+        is_active=user.is_active,
+        is_superuser=user.is_superuser,
+        created_at=user.created_at,
+        last_login=user.last_login,
+        roles=current_user.role_names
     )
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
     skip: int = Query(0, ge=0, description="跳过的记录数"),
     limit: int = Query(100, ge=1, le=1000, description="返回的记录数"),
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,username,is_active"),
+    count: Optional[CountMode] = Query(None, description="在X-Total-Count响应头返回总数：exact精确、estimate估算、auto自动"),
+    response: Response = None,
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取用户列表（需要管理员权限）"""
+    field_list = parse_fields(fields, UserResponse)
+    
     # 检查权限
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -48,37 +113,114 @@ async def get_users(
             detail="权限不足"
         )
     
-    users = UserService.get_users(db, skip=skip, limit=limit)
-    user_responses = []
+    if count:
+        total, count_mode = CountService.count(db, User, mode=count.value)
+        set_total_count(response, total, count_mode)
     
-    for user in users:
-        user_roles = UserService.get_user_roles(db, user.id)
-        role_names = [role.name for role in user_roles]
-        
-        user_responses.append(UserResponse(
-            id=user.id,
-            username=user.username,
-            email=user.email,
-            full_name=user.full_name,
-            is_active=user.is_active,
-            is_superuser=user.is_superuser,
-            created_at=user.created_at,
-            last_login=user.last_login,
-            roles=role_names
-        ))
-    
-    return user_responses
+    # 只查询请求的字段，未请求roles时不加载角色
+    if field_list:
+        rows = UserService.get_users_fields(db, field_list, skip=skip, limit=limit)
+        trimmed = trimmed_response(UserResponse, field_list, rows)
+        if count:
+            set_total_count(trimmed, total, count_mode)
+        return trimmed
+    
+    # 只读列表直接序列化行对象，不构建ORM实例和响应模型
+    rendered = rows_response(UserService.get_user_rows(db, skip=skip, limit=limit))
+    if count:
+        set_total_count(rendered, total, count_mode)
+    return rendered
+
+@router.get("/search", response_model=UserSearchResponse)
+async def search_users(
+    q: str = Query(..., min_length=1, max_length=100, description="搜索关键字（用户名、邮箱、全名）"),
+    limit: int = Query(20, ge=1, le=100, description="返回的记录数"),
+    cursor: Optional[str] = Query(None, description="分页游标"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """搜索用户（需要管理员权限）"""
+    # 检查权限
+    role_names = current_user.role_names
+    
+    if "admin" not in role_names and not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="权限不足"
+        )
+    
+    try:
+        users, next_cursor = UserService.search_users(db, q, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    roles_by_user = UserService.get_role_names_for_users(db, [user.id for user in users])
+    
+    return UserSearchResponse(
+        items=[
+            UserResponse(
+                id=user.id,
+                username=user.username,
+                email=user.email,
+                full_name=user.full_name,
+                is_active=user.is_active,
+                is_superuser=user.is_superuser,
+                created_at=user.created_at,
+                last_login=user.last_login,
+                roles=roles_by_user[user.id]
+            )
+            for user in users
+        ],
+        next_cursor=next_cursor
+    )
+
+@router.get("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    ids: str = Query(..., description="逗号分隔的用户ID列表"),
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """批量获取用户信息"""
+    try:
+        user_ids = [int(user_id) for user_id in ids.split(",") if user_id.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的用户ID列表"
+        )
+    
+    if not user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="无效的用户ID列表"
+        )
+    
+    return _get_users_batch(db, current_user, user_ids)
+
+@router.post("/batch", response_model=UserBatchResponse)
+async def post_users_batch(
+    batch_request: UserBatchRequest,
+    current_user: CurrentUser = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """批量获取用户信息（POST方式，适合较长的ID列表）"""
+    return _get_users_batch(db, current_user, batch_request.ids)
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    current_user: User = Depends(get_current_active_user),
+    fields: Optional[str] = Query(None, description="逗号分隔的返回字段，例如 id,username,roles"),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """获取指定用户信息"""
+    field_list = parse_fields(fields, UserResponse)
+    
     # 用户只能查看自己的信息，除非是管理员
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if user_id != current_user.id and "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -86,6 +228,15 @@ async def get_user(
             detail="权限不足"
         )
     
+    if field_list:
+        rows = UserService.get_users_fields(db, field_list, limit=1, user_id=user_id)
+        if not rows:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="用户不存在"
+            )
+        return trimmed_response(UserResponse, field_list, rows[0], many=False)
+    
     user = UserService.get_user_by_id(db, user_id)
     if not user:
         raise HTTPException(
@@ -112,13 +263,12 @@ async def get_user(
 async def update_user(
     user_id: int,
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: CurrentUser = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
     """更新用户信息"""
     # 用户只能更新自己的信息，除非是管理员
-    user_roles = UserService.get_user_roles(db, current_user.id)
-    role_names = [role.name for role in user_roles]
+    role_names = current_user.role_names
     
     if user_id != current_user.id and "admin" not in role_names and not current_user.is_superuser:
         raise HTTPException(
@@ -126,7 +276,14 @@ async def update_user(
             detail="权限不足"
         )
     
-    user = UserService.update_user(db, user_id, user_update)
+    try:
+        user = UserService.update_user(db, user_id, user_update)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -1,4 +1,4 @@
-from .user import UserCreate, UserResponse, UserLogin, UserUpdate
+from .user import UserCreate, UserResponse, UserLogin, UserUpdate, UserSearchResponse, UserBatchRequest, UserBatchResponse
 from .role import RoleCreate, RoleResponse, RoleUpdate
 from .token import Token, TokenData
 
@@ -7,6 +7,9 @@ __all__ = [
     "UserResponse", 
     "UserLogin",
     "UserUpdate",
+    "UserSearchResponse",
+    "UserBatchRequest",
+    "UserBatchResponse",
     "RoleCreate",
     "RoleResponse",
     "RoleUpdate",
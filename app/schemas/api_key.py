@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
+from datetime import datetime
+
+ApiKeyScope = Literal["read", "write"]
+
+class ApiKeyCreate(BaseModel):
+    """API密钥创建模式"""
+    name: str = Field(..., min_length=1, max_length=100, description="密钥名称")
+    user_id: Optional[int] = Field(None, description="所属用户ID（服务账号），为空时为当前用户")
+    scopes: List[ApiKeyScope] = Field(["read"], min_length=1, description="权限范围：read只读，write允许写操作")
+    expires_in_days: Optional[int] = Field(None, ge=1, le=3650, description="有效天数，为空时永不过期")
+
+class ApiKeyResponse(BaseModel):
+    """API密钥响应模式"""
+    id: int
+    name: str
+    prefix: str = Field(..., description="密钥前缀")
+    user_id: int
+    scopes: List[str]
+    is_active: bool
+    expires_at: Optional[datetime] = None
+    last_used_at: Optional[datetime] = None
+    created_at: datetime
+
+class ApiKeyCreated(ApiKeyResponse):
+    """API密钥创建结果模式，完整密钥只返回这一次"""
+    key: str = Field(..., description="完整密钥，请妥善保存")
@@ -0,0 +1,100 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+
+class ProfileInfo(BaseModel):
+    """请求剖析记录模式"""
+    id: str = Field(..., description="剖析ID")
+    method: str = Field(..., description="请求方法")
+    path: str = Field(..., description="请求路径")
+    status: int = Field(..., description="响应状态码")
+    duration_ms: float = Field(..., description="请求耗时（毫秒）")
+    created_at: float = Field(..., description="创建时间（Unix时间戳）")
+
+class HeapSnapshotInfo(BaseModel):
+    """堆内存快照模式"""
+    id: str = Field(..., description="快照ID")
+    created_at: float = Field(..., description="创建时间（Unix时间戳）")
+    traced_bytes: int = Field(..., description="快照中追踪到的内存（字节）")
+    frames: int = Field(..., description="每个分配记录的调用栈深度")
+
+class HeapStatus(BaseModel):
+    """堆内存追踪状态模式"""
+    tracing: bool = Field(..., description="是否正在追踪")
+    frames: int = Field(..., description="调用栈深度")
+    traced_bytes: int = Field(..., description="当前追踪到的内存（字节）")
+    peak_bytes: int = Field(..., description="追踪期间的内存峰值（字节）")
+    tracemalloc_overhead_bytes: int = Field(..., description="tracemalloc自身占用的内存（字节）")
+    snapshots: List[HeapSnapshotInfo] = Field(..., description="快照列表")
+
+class AllocationSite(BaseModel):
+    """内存分配位置模式"""
+    traceback: List[str] = Field(..., description="调用栈（文件:行号，最近的调用在前）")
+    size_bytes: int = Field(..., description="占用内存（字节）")
+    count: int = Field(..., description="分配次数")
+
+class AllocationDiff(AllocationSite):
+    """两个快照之间的内存分配差异模式"""
+    size_diff_bytes: int = Field(..., description="内存增长量（字节）")
+    count_diff: int = Field(..., description="分配次数增长量")
+
+class SessionIdentityMap(BaseModel):
+    """数据库会话标识映射模式"""
+    session_id: int = Field(..., description="会话对象ID")
+    in_transaction: bool = Field(..., description="是否在事务中")
+    identity_map_size: int = Field(..., description="标识映射中的对象数量")
+    objects: Dict[str, int] = Field(..., description="按模型统计的对象数量")
+
+class MemoryObjectsInfo(BaseModel):
+    """进程内对象容器大小模式"""
+    sessions: List[SessionIdentityMap] = Field(..., description="存活的数据库会话")
+    identity_map_total: int = Field(..., description="所有会话标识映射中的对象总数")
+    caches: Dict[str, int] = Field(..., description="进程内缓存的条目数")
+    log_queue_size: int = Field(..., description="待输出的日志条数")
+
+class LagBucket(BaseModel):
+    """调度延迟直方图桶模式"""
+    le: str = Field(..., description="桶上界（毫秒），+Inf为最后一个桶")
+    count: int = Field(..., description="延迟不超过上界的累计采样次数")
+
+class RouteStallStats(BaseModel):
+    """按路由统计的事件循环阻塞模式"""
+    count: int = Field(..., description="阻塞次数")
+    total_ms: float = Field(..., description="累计阻塞时间（毫秒）")
+    max_ms: float = Field(..., description="最长阻塞时间（毫秒）")
+
+class LoopStall(BaseModel):
+    """事件循环阻塞记录模式"""
+    route: Optional[str] = Field(None, description="阻塞时正在执行的路由")
+    lag_ms: float = Field(..., description="调度延迟（毫秒）")
+    captured_at: float = Field(..., description="抓取调用栈的时间（Unix时间戳）")
+    stack: List[str] = Field(..., description="阻塞时事件循环线程的调用栈")
+
+class LoopLagInfo(BaseModel):
+    """事件循环延迟监控模式"""
+    running: bool = Field(..., description="监控是否在运行")
+    interval_ms: float = Field(..., description="采样间隔（毫秒）")
+    threshold_ms: float = Field(..., description="记录阻塞的阈值（毫秒）")
+    count: int = Field(..., description="采样次数")
+    sum_ms: float = Field(..., description="调度延迟总和（毫秒）")
+    max_ms: float = Field(..., description="最大调度延迟（毫秒）")
+    buckets: List[LagBucket] = Field(..., description="调度延迟直方图")
+    stalls_by_route: Dict[str, RouteStallStats] = Field(..., description="按路由统计的阻塞")
+    recent_stalls: List[LoopStall] = Field(..., description="最近的阻塞记录（从新到旧）")
+
+class CoalescingRouteStats(BaseModel):
+    """按路由统计的请求合并模式"""
+    executed: int = Field(..., description="实际执行的请求数")
+    coalesced: int = Field(..., description="共享了在途请求结果的请求数")
+    fallback: int = Field(..., description="等待后仍需自己执行的请求数（原请求出错或响应过大）")
+    saved_ms: float = Field(..., description="共享结果节省的处理时间（毫秒，按原请求耗时累计）")
+
+class AdmissionClassStats(BaseModel):
+    """路由分类的准入控制统计模式"""
+    limit: int = Field(..., description="并发上限")
+    queue_size: int = Field(..., description="等待队列长度")
+    in_flight: int = Field(..., description="正在执行的请求数")
+    waiting: int = Field(..., description="正在排队的请求数")
+    admitted: int = Field(..., description="累计放行的请求数")
+    queued: int = Field(..., description="累计排过队的请求数")
+    rejected_queue_full: int = Field(..., description="队列已满被拒绝的请求数")
+    rejected_timeout: int = Field(..., description="排队超时被拒绝的请求数")
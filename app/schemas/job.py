@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Any, Dict, Literal
+from datetime import datetime
+
+JobType = Literal["deactivate_users", "reassign_role", "rebuild_effective_permissions"]
+
+class JobCreate(BaseModel):
+    """后台任务提交模式"""
+    type: JobType = Field(..., description="任务类型")
+    params: Dict[str, Any] = Field(default_factory=dict, description="任务参数")
+
+class JobResponse(BaseModel):
+    """后台任务响应模式"""
+    id: int
+    type: str
+    state: str = Field(..., description="状态：pending/running/succeeded/failed/cancelled")
+    params: Dict[str, Any]
+    progress: int = Field(..., description="已处理数量")
+    total: Optional[int] = Field(None, description="总数量")
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    cancel_requested: bool
+    created_by: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class PermissionBase(BaseModel):
@@ -29,4 +29,10 @@ class PermissionResponse(PermissionBase):
     created_at: datetime = Field(..., description="创建时间")
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class EffectivePermissionUsersResponse(BaseModel):
+    """拥有指定资源操作权限的用户响应模型"""
+    resource: str = Field(..., description="资源名称")
+    action: str = Field(..., description="操作类型")
+    user_ids: List[int] = Field([], description="用户ID列表")
@@ -0,0 +1,38 @@
+from typing import List, NamedTuple, Optional
+from datetime import datetime
+
+# 只读列表接口使用的行对象：基于元组，没有实例字典、标识映射和变更跟踪，
+# 由 app.utils.serialization.rows_response 直接序列化。
+# 字段顺序与对应的响应模型一致，输出与响应模型逐字节相同。
+
+class UserRow(NamedTuple):
+    """用户列表行，对应UserResponse"""
+    username: str
+    email: str
+    full_name: Optional[str]
+    id: int
+    is_active: bool
+    is_superuser: bool
+    created_at: datetime
+    last_login: Optional[datetime]
+    roles: List[str]
+
+class RoleRow(NamedTuple):
+    """角色列表行，对应RoleResponse"""
+    name: str
+    display_name: str
+    description: Optional[str]
+    id: int
+    is_active: bool
+    created_at: datetime
+
+class PermissionRow(NamedTuple):
+    """权限列表行，对应PermissionResponse"""
+    name: str
+    display_name: str
+    description: Optional[str]
+    resource: str
+    action: str
+    is_active: bool
+    id: int
+    created_at: datetime
@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import List
+from datetime import date, datetime
+
+class RoleUserCount(BaseModel):
+    """角色用户数模式"""
+    role_id: int
+    name: str
+    display_name: str
+    is_active: bool
+    user_count: int = Field(..., description="持有该角色的用户数")
+    active_user_count: int = Field(..., description="持有该角色的活跃用户数")
+
+class DailyLoginCount(BaseModel):
+    """每日登录用户数模式"""
+    day: date = Field(..., description="日期（UTC）")
+    count: int = Field(..., description="最后登录时间在当天的用户数")
+
+class StatsSummary(BaseModel):
+    """仪表盘统计汇总模式"""
+    total_users: int = Field(..., description="用户总数")
+    active_users: int = Field(..., description="活跃用户数")
+    inactive_users: int = Field(..., description="停用用户数")
+    superusers: int = Field(..., description="超级用户数")
+    logged_in_24h: int = Field(..., description="最近24小时登录过的用户数")
+    logged_in_7d: int = Field(..., description="最近7天登录过的用户数")
+    logged_in_30d: int = Field(..., description="最近30天登录过的用户数")
+    roles: List[RoleUserCount] = Field(..., description="各角色的用户数")
+    login_activity: List[DailyLoginCount] = Field(..., description="最近若干天每天的登录用户数（按最后登录时间）")
+    generated_at: datetime = Field(..., description="统计时间（UTC），缓存期内的请求返回同一结果")
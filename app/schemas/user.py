@@ -33,4 +33,19 @@ class UserResponse(UserBase):
     roles: List[str] = []
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class UserSearchResponse(BaseModel):
+    """用户搜索响应模式"""
+    items: List[UserResponse] = []
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多结果")
+
+
+class UserBatchRequest(BaseModel):
+    """批量获取用户请求模式"""
+    ids: List[int] = Field(..., min_length=1, max_length=100, description="用户ID列表")
+
+class UserBatchResponse(BaseModel):
+    """批量获取用户响应模式"""
+    items: List[UserResponse] = []
+    missing: List[int] = Field([], description="不存在的用户ID")
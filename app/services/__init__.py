@@ -1,5 +1,9 @@
 from .user_service import UserService
 from .role_service import RoleService
 from .auth_service import AuthService
+from .effective_permission_service import EffectivePermissionService
+from .api_key_service import ApiKeyService
+from .job_service import JobService
+from .stats_service import StatsService
 
-__all__ = ["UserService", "RoleService", "AuthService"]
\ No newline at end of file
+__all__ = ["UserService", "RoleService", "AuthService", "EffectivePermissionService", "ApiKeyService", "JobService", "StatsService"]
\ No newline at end of file
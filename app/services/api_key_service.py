@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from app.models.api_key import ApiKey
+from app.auth.api_key import generate_api_key, hash_api_key, invalidate_api_key
+from app.database.errors import is_foreign_key_violation
+from app.diagnostics.tracing import traced_class
+
+@traced_class
+class ApiKeyService:
+    """API密钥服务类"""
+    
+    @staticmethod
+    def create_api_key(
+        db: Session,
+        user_id: int,
+        name: str,
+        scopes: List[str],
+        expires_in_days: Optional[int] = None
+    ) -> Tuple[ApiKey, str]:
+        """创建API密钥，返回(密钥记录, 完整密钥)"""
+        key, prefix = generate_api_key()
+        expires_at = datetime.utcnow() + timedelta(days=expires_in_days) if expires_in_days else None
+        try:
+            api_key = db.execute(
+                insert(ApiKey).values(
+                    user_id=user_id,
+                    name=name,
+                    prefix=prefix,
+                    key_digest=hash_api_key(key),
+                    scopes=",".join(sorted(set(scopes))),
+                    expires_at=expires_at
+                ).returning(ApiKey)
+            ).scalar_one()
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if is_foreign_key_violation(e):
+                raise ValueError("用户不存在")
+            raise
+        
+        return api_key, key
+    
+    @staticmethod
+    def get_api_keys(db: Session, user_id: Optional[int] = None) -> List[ApiKey]:
+        """获取API密钥列表"""
+        query = db.query(ApiKey)
+        if user_id is not None:
+            query = query.filter(ApiKey.user_id == user_id)
+        return query.order_by(ApiKey.id).all()
+    
+    @staticmethod
+    def revoke_api_key(db: Session, api_key_id: int) -> bool:
+        """吊销API密钥"""
+        prefix = db.execute(
+            update(ApiKey).where(ApiKey.id == api_key_id).values(is_active=False).returning(ApiKey.prefix)
+        ).scalar_one_or_none()
+        if prefix is None:
+            return False
+        db.commit()
+        invalidate_api_key(prefix)
+        return True
@@ -1,14 +1,37 @@
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+import logging
 from app.models.user import User
 from app.schemas.user import UserLogin
 from app.schemas.token import Token
-from app.auth.password import verify_password
-from app.auth.jwt import create_access_token
+from app.auth.password import verify_password, get_password_hash, password_needs_rehash
+from app.auth.jwt import create_access_token, build_token_claims
+from app.auth.versions import remember_auth_versions
 from app.services.user_service import UserService
+from app.database import SessionLocal
 from app.config import settings
+from app.diagnostics.tracing import traced_class
 
+logger = logging.getLogger(__name__)
+
+# 密码重新哈希的后台线程池，单线程即可，避免与登录请求争抢CPU
+_rehash_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="password-rehash")
+
+def _rehash_password(user_id: int, plain_password: str, old_hash: str) -> None:
+    """在后台按当前成本重新生成密码哈希"""
+    db = SessionLocal()
+    try:
+        new_hash = get_password_hash(plain_password)
+        UserService.update_password_hash(db, user_id, old_hash, new_hash)
+    except Exception:
+        logger.exception("重新生成用户 %s 的密码哈希失败", user_id)
+        db.rollback()
+    finally:
+        db.close()
+
+@traced_class
 class AuthService:
     """认证服务类"""
     
@@ -25,16 +48,24 @@ class AuthService:
         if not user.is_active:
             return None
         
+        # 存储的哈希成本与当前配置不一致时，后台透明地重新哈希
+        if password_needs_rehash(user.hashed_password):
+            _rehash_executor.submit(
+                _rehash_password, user.id, user_login.password, user.hashed_password
+            )
+        
         return user
     
     @staticmethod
     def create_user_token(db: Session, user: User) -> Token:
         """为用户创建访问令牌"""
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
+        role_names = [role.name for role in UserService.get_user_roles(db, user.id)]
         access_token = create_access_token(
-            data={"sub": user.username},
+            data=build_token_claims(user, role_names),
             expires_delta=access_token_expires
         )
+        remember_auth_versions([(user.id, user.auth_version)])
         
         # 更新用户最后登录时间
         UserService.update_last_login(db, user.id)
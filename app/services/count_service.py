@@ -0,0 +1,60 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, text
+from typing import Tuple, Type
+import json
+from app.config import settings
+from app.models.base import BaseModel
+from app.utils.cache import TTLCache
+from app.diagnostics.tracing import traced_class
+
+# 精确计数按查询条件缓存
+_count_cache = TTLCache("exact_counts", ttl=settings.count_cache_ttl_seconds, maxsize=256)
+
+@traced_class
+class CountService:
+    """列表总数统计服务类
+
+    mode取值：
+    - exact：COUNT(*)，结果按过滤条件短时缓存
+    - estimate：PostgreSQL规划器估算（无过滤时用pg_class.reltuples，否则用EXPLAIN的行数估算），
+      其他数据库退化为exact
+    - auto：先估算，估算值小于阈值时改用exact
+    """
+    
+    @staticmethod
+    def count(db: Session, model: Type[BaseModel], *criteria, mode: str = "exact") -> Tuple[int, str]:
+        """统计满足条件的行数，返回(总数, 实际使用的模式)"""
+        query = select(func.count()).select_from(model).where(*criteria)
+        
+        if mode in ("estimate", "auto"):
+            estimate = CountService._estimate(db, model, *criteria)
+            if estimate is not None and (mode == "estimate" or estimate >= settings.count_estimate_threshold):
+                return estimate, "estimate"
+        
+        key = str(query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        total = _count_cache.get(key)
+        if total is None:
+            total = db.execute(query).scalar_one()
+            _count_cache.set(key, total)
+        return total, "exact"
+    
+    @staticmethod
+    def _estimate(db: Session, model: Type[BaseModel], *criteria):
+        """PostgreSQL规划器估算行数，无法估算时返回None"""
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        
+        if not criteria:
+            reltuples = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+                {"table": model.__tablename__}
+            ).scalar()
+            # 从未ANALYZE过的表reltuples为-1
+            return reltuples if reltuples is not None and reltuples >= 0 else None
+        
+        query = select(model.id).where(*criteria)
+        compiled = str(query.compile(dialect=db.get_bind().dialect, compile_kwargs={"literal_binds": True}))
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
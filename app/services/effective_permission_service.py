@@ -0,0 +1,115 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete
+from typing import List, Optional
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.models.role_permission import RolePermission
+from app.models.user_role import UserRole
+from app.models.user_effective_permission import UserEffectivePermission
+from app.diagnostics.tracing import traced_class
+
+@traced_class
+class EffectivePermissionService:
+    """用户有效权限投影服务类
+    
+    refresh方法只在当前事务中执行DELETE + INSERT ... SELECT，不提交，
+    由调用方与触发变更的写操作一起提交。
+    修改角色的用户或权限关联前先调用lock_role，使同一角色上的并发维护串行执行：
+    READ COMMITTED下两个事务的INSERT ... SELECT互相看不到对方未提交的关联行，
+    并发的分配角色和授予权限会各自漏掉对方产生的投影行。
+    """
+    
+    @staticmethod
+    def lock_role(db: Session, role_id: int, user_id: Optional[int] = None) -> None:
+        """锁定角色行（以及用户行）直到当前事务结束，SQLite不支持行锁时忽略"""
+        db.execute(select(Role.id).where(Role.id == role_id).with_for_update())
+        if user_id is not None:
+            db.execute(select(User.id).where(User.id == user_id).with_for_update())
+    
+    @staticmethod
+    def refresh(
+        db: Session,
+        user_id: Optional[int] = None,
+        role_id: Optional[int] = None,
+        permission_id: Optional[int] = None,
+        user_ids: Optional[List[int]] = None
+    ) -> None:
+        """按范围重新计算有效权限，所有参数为空时重建全部投影"""
+        scope = []
+        source_scope = []
+        if user_id is not None:
+            scope.append(UserEffectivePermission.user_id == user_id)
+            source_scope.append(UserRole.user_id == user_id)
+        if user_ids is not None:
+            scope.append(UserEffectivePermission.user_id.in_(user_ids))
+            source_scope.append(UserRole.user_id.in_(user_ids))
+        if role_id is not None:
+            scope.append(UserEffectivePermission.role_id == role_id)
+            source_scope.append(UserRole.role_id == role_id)
+        if permission_id is not None:
+            scope.append(UserEffectivePermission.permission_id == permission_id)
+            source_scope.append(RolePermission.permission_id == permission_id)
+        
+        db.execute(delete(UserEffectivePermission).where(*scope))
+        
+        source = select(
+            UserRole.user_id,
+            Permission.id,
+            UserRole.role_id,
+            Permission.resource,
+            Permission.action
+        ).join(
+            User, UserRole.user_id == User.id
+        ).join(
+            Role, UserRole.role_id == Role.id
+        ).join(
+            RolePermission, RolePermission.role_id == Role.id
+        ).join(
+            Permission, RolePermission.permission_id == Permission.id
+        ).where(
+            User.is_active == True,
+            Role.is_active == True,
+            Permission.is_active == True,
+            *source_scope
+        ).distinct()
+        
+        db.execute(
+            insert(UserEffectivePermission).from_select(
+                ["user_id", "permission_id", "role_id", "resource", "action"],
+                source
+            )
+        )
+    
+    @staticmethod
+    def rebuild(db: Session) -> int:
+        """全量重建有效权限投影，返回重建后的行数"""
+        EffectivePermissionService.refresh(db)
+        db.commit()
+        return db.query(UserEffectivePermission).count()
+    
+    @staticmethod
+    def get_user_permissions(db: Session, user_id: int) -> List[Permission]:
+        """获取用户的有效权限列表"""
+        permission_ids = select(UserEffectivePermission.permission_id).where(
+            UserEffectivePermission.user_id == user_id
+        )
+        return db.query(Permission).filter(Permission.id.in_(permission_ids)).order_by(Permission.id).all()
+    
+    @staticmethod
+    def get_user_ids_with_permission(db: Session, resource: str, action: str) -> List[int]:
+        """获取能对指定资源执行指定操作的用户ID列表"""
+        rows = db.query(UserEffectivePermission.user_id).filter(
+            UserEffectivePermission.resource == resource,
+            UserEffectivePermission.action == action
+        ).distinct().order_by(UserEffectivePermission.user_id).all()
+        return [user_id for user_id, in rows]
+    
+    @staticmethod
+    def user_has_permission(db: Session, user_id: int, resource: str, action: str) -> bool:
+        """判断用户是否能对指定资源执行指定操作"""
+        return db.query(UserEffectivePermission.user_id).filter(
+            UserEffectivePermission.user_id == user_id,
+            UserEffectivePermission.resource == resource,
+            UserEffectivePermission.action == action
+        ).first() is not None
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import List, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from app.models.job import Job
+from app.jobs import JOB_HANDLERS, job_runner
+from app.diagnostics.tracing import traced_class
+
+@traced_class
+class JobService:
+    """后台任务服务类"""
+    
+    @staticmethod
+    def submit_job(db: Session, job_type: str, params: dict, created_by: Optional[int] = None) -> Job:
+        """校验参数、保存任务记录并提交执行"""
+        params_model, _ = JOB_HANDLERS[job_type]
+        try:
+            params = params_model(**params).model_dump()
+        except ValidationError as e:
+            raise ValueError(f"任务参数无效: {e.errors()[0]['loc']} {e.errors()[0]['msg']}")
+        
+        job = db.execute(
+            insert(Job).values(type=job_type, params=params, created_by=created_by).returning(Job)
+        ).scalar_one()
+        db.commit()
+        job_runner.submit(job.id)
+        return job
+    
+    @staticmethod
+    def get_job(db: Session, job_id: int) -> Optional[Job]:
+        """根据ID获取任务"""
+        return db.query(Job).filter(Job.id == job_id).first()
+    
+    @staticmethod
+    def get_jobs(db: Session, skip: int = 0, limit: int = 100, state: Optional[str] = None) -> List[Job]:
+        """获取任务列表（从新到旧）"""
+        query = db.query(Job)
+        if state:
+            query = query.filter(Job.state == state)
+        return query.order_by(Job.id.desc()).offset(skip).limit(limit).all()
+    
+    @staticmethod
+    def cancel_job(db: Session, job_id: int) -> Optional[Job]:
+        """取消任务：等待中的任务直接取消，运行中的任务在下一块开始前停止"""
+        job = db.execute(
+            update(Job).where(Job.id == job_id, Job.state == "pending").values(
+                state="cancelled", cancel_requested=True, finished_at=datetime.utcnow()
+            ).returning(Job)
+        ).scalar_one_or_none()
+        if job is None:
+            job = db.execute(
+                update(Job).where(Job.id == job_id, Job.state == "running").values(
+                    cancel_requested=True
+                ).returning(Job)
+            ).scalar_one_or_none()
+        db.commit()
+        
+        if job is None:
+            job = JobService.get_job(db, job_id)
+            if job is not None:
+                raise ValueError("任务已结束")
+        return job
@@ -1,8 +1,18 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, delete, select
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 from app.models.permission import Permission
 from app.schemas.permission import PermissionCreate, PermissionUpdate
+from app.schemas.rows import PermissionRow
+from app.services.effective_permission_service import EffectivePermissionService
+from app.changes import record_change, entity_data
+from app.diagnostics.tracing import traced_class
 
+# 权限列表行对应的表列，按PermissionRow的字段顺序
+PERMISSION_ROW_COLUMNS = [Permission.__table__.c[field] for field in PermissionRow._fields]
+
+@traced_class
 class PermissionService:
     """权限服务类"""
     
@@ -11,6 +21,26 @@ class PermissionService:
         """获取权限列表"""
         return db.query(Permission).offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_permission_rows(db: Session, skip: int = 0, limit: int = 100) -> List[PermissionRow]:
+        """获取权限列表行（只读，不构建ORM实例）"""
+        query = select(*PERMISSION_ROW_COLUMNS).offset(skip).limit(limit)
+        return [PermissionRow._make(row) for row in db.execute(query)]
+    
+    @staticmethod
+    def get_permissions_fields(
+        db: Session,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        permission_id: Optional[int] = None
+    ) -> List[dict]:
+        """只查询指定字段的权限列表"""
+        query = select(*[getattr(Permission, field) for field in fields])
+        if permission_id is not None:
+            query = query.where(Permission.id == permission_id)
+        return [dict(row) for row in db.execute(query.offset(skip).limit(limit)).mappings()]
+    
     @staticmethod
     def get_permission_by_id(db: Session, permission_id: int) -> Optional[Permission]:
         """根据ID获取权限"""
@@ -24,48 +54,55 @@ class PermissionService:
     @staticmethod
     def create_permission(db: Session, permission_create: PermissionCreate) -> Permission:
         """创建权限"""
-        # 检查权限名称是否已存在
-        existing_permission = PermissionService.get_permission_by_name(db, permission_create.name)
-        if existing_permission:
+        try:
+            db_permission = db.execute(
+                insert(Permission).values(
+                    name=permission_create.name,
+                    display_name=permission_create.display_name,
+                    description=permission_create.description,
+                    resource=permission_create.resource,
+                    action=permission_create.action,
+                    is_active=permission_create.is_active
+                ).returning(Permission)
+            ).scalar_one()
+            record_change(db, "permission", "created", db_permission.id, entity_data("permission", db_permission))
+            db.commit()
+        except IntegrityError:
+            # 权限名称唯一约束冲突
+            db.rollback()
             raise ValueError(f"权限名称 '{permission_create.name}' 已存在")
         
-        db_permission = Permission(
-            name=permission_create.name,
-            display_name=permission_create.display_name,
-            description=permission_create.description,
-            resource=permission_create.resource,
-            action=permission_create.action,
-            is_active=permission_create.is_active
-        )
-        
-        db.add(db_permission)
-        db.commit()
-        db.refresh(db_permission)
         return db_permission
     
     @staticmethod
     def update_permission(db: Session, permission_id: int, permission_update: PermissionUpdate) -> Optional[Permission]:
         """更新权限"""
-        db_permission = PermissionService.get_permission_by_id(db, permission_id)
-        if not db_permission:
-            return None
-        
         update_data = permission_update.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_permission, field, value)
+        if not update_data:
+            return PermissionService.get_permission_by_id(db, permission_id)
+        
+        db_permission = db.execute(
+            update(Permission).where(Permission.id == permission_id).values(**update_data).returning(Permission)
+        ).scalar_one_or_none()
+        
+        # 资源、操作或激活状态变化时同步有效权限
+        if db_permission and update_data.keys() & {"resource", "action", "is_active"}:
+            EffectivePermissionService.refresh(db, permission_id=permission_id)
+        if db_permission:
+            record_change(db, "permission", "updated", db_permission.id, entity_data("permission", db_permission))
         
         db.commit()
-        db.refresh(db_permission)
         return db_permission
     
     @staticmethod
     def delete_permission(db: Session, permission_id: int) -> bool:
         """删除权限"""
-        db_permission = PermissionService.get_permission_by_id(db, permission_id)
-        if not db_permission:
+        result = db.execute(delete(Permission).where(Permission.id == permission_id))
+        if not result.rowcount:
             return False
         
-        db.delete(db_permission)
+        EffectivePermissionService.refresh(db, permission_id=permission_id)
+        record_change(db, "permission", "deleted", permission_id)
         db.commit()
         return True
     
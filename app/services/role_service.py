@@ -1,27 +1,47 @@
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, delete, select
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List
 from app.models.role import Role
+from app.models.permission import Permission
+from app.models.role_permission import RolePermission
+from app.models.user import User
+from app.models.user_role import UserRole
+from app.auth.versions import bump_auth_versions, remember_auth_versions
 from app.schemas.role import RoleCreate, RoleUpdate
+from app.schemas.rows import RoleRow
+from app.database.errors import integrity_error_column, is_foreign_key_violation
+from app.database.statements import ROLE_BY_NAME
+from app.services.effective_permission_service import EffectivePermissionService
+from app.changes import record_change, entity_data
+from app.diagnostics.tracing import traced_class
 
+# 角色列表行对应的表列，按RoleRow的字段顺序
+ROLE_ROW_COLUMNS = [Role.__table__.c[field] for field in RoleRow._fields]
+
+@traced_class
 class RoleService:
     """角色服务类"""
     
     @staticmethod
     def create_role(db: Session, role_create: RoleCreate) -> Role:
         """创建角色"""
-        # 检查角色名是否已存在
-        if RoleService.get_role_by_name(db, role_create.name):
-            raise ValueError("角色名已存在")
-        
-        db_role = Role(
-            name=role_create.name,
-            display_name=role_create.display_name,
-            description=role_create.description
-        )
+        try:
+            db_role = db.execute(
+                insert(Role).values(
+                    name=role_create.name,
+                    display_name=role_create.display_name,
+                    description=role_create.description
+                ).returning(Role)
+            ).scalar_one()
+            record_change(db, "role", "created", db_role.id, entity_data("role", db_role))
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if integrity_error_column(e, ["name"]) == "name":
+                raise ValueError("角色名已存在")
+            raise
         
-        db.add(db_role)
-        db.commit()
-        db.refresh(db_role)
         return db_role
     
     @staticmethod
@@ -32,7 +52,7 @@ class RoleService:
     @staticmethod
     def get_role_by_name(db: Session, name: str) -> Optional[Role]:
         """根据名称获取角色"""
-        return db.query(Role).filter(Role.name == name).first()
+        return db.execute(ROLE_BY_NAME, {"name": name}).scalar_one_or_none()
     
     @staticmethod
     def get_roles(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[Role]:
@@ -42,29 +62,112 @@ class RoleService:
             query = query.filter(Role.is_active == True)
         return query.offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_role_rows(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[RoleRow]:
+        """获取角色列表行（只读，不构建ORM实例）"""
+        query = select(*ROLE_ROW_COLUMNS)
+        if active_only:
+            query = query.where(Role.is_active == True)
+        return [RoleRow._make(row) for row in db.execute(query.offset(skip).limit(limit))]
+    
+    @staticmethod
+    def get_roles_fields(
+        db: Session,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        active_only: bool = True,
+        role_id: Optional[int] = None
+    ) -> List[dict]:
+        """只查询指定字段的角色列表"""
+        query = select(*[getattr(Role, field) for field in fields])
+        if active_only:
+            query = query.where(Role.is_active == True)
+        if role_id is not None:
+            query = query.where(Role.id == role_id)
+        return [dict(row) for row in db.execute(query.offset(skip).limit(limit)).mappings()]
+    
     @staticmethod
     def update_role(db: Session, role_id: int, role_update: RoleUpdate) -> Optional[Role]:
         """更新角色信息"""
-        db_role = RoleService.get_role_by_id(db, role_id)
-        if not db_role:
-            return None
-        
         update_data = role_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_role, field, value)
+        if not update_data:
+            return RoleService.get_role_by_id(db, role_id)
+        
+        db_role = db.execute(
+            update(Role).where(Role.id == role_id).values(**update_data).returning(Role)
+        ).scalar_one_or_none()
+        
+        # 角色停用或启用时同步有效权限
+        if db_role and "is_active" in update_data:
+            EffectivePermissionService.refresh(db, role_id=role_id)
+        if db_role:
+            record_change(db, "role", "updated", db_role.id, entity_data("role", db_role))
         
         db.commit()
-        db.refresh(db_role)
         return db_role
     
     @staticmethod
     def delete_role(db: Session, role_id: int) -> bool:
         """删除角色"""
-        db_role = RoleService.get_role_by_id(db, role_id)
-        if db_role:
-            db.delete(db_role)
+        # 先递增持有该角色的用户的授权版本号，删除后关联记录随之级联删除
+        versions = bump_auth_versions(db, User.id.in_(select(UserRole.user_id).where(UserRole.role_id == role_id)))
+        result = db.execute(delete(Role).where(Role.id == role_id))
+        if result.rowcount:
+            EffectivePermissionService.refresh(db, role_id=role_id)
+            record_change(db, "role", "deleted", role_id)
+            db.commit()
+            remember_auth_versions(versions)
+            return True
+        db.rollback()
+        return False
+    
+    @staticmethod
+    def get_role_permissions(db: Session, role_id: int) -> List[Permission]:
+        """获取角色的权限列表"""
+        return db.query(Permission).join(RolePermission).filter(
+            RolePermission.role_id == role_id
+        ).order_by(Permission.id).all()
+    
+    @staticmethod
+    def grant_permission_to_role(db: Session, role_id: int, permission_id: int) -> RolePermission:
+        """为角色授予权限"""
+        try:
+            EffectivePermissionService.lock_role(db, role_id)
+            role_permission = db.execute(
+                insert(RolePermission).values(
+                    role_id=role_id,
+                    permission_id=permission_id
+                ).returning(RolePermission)
+            ).scalar_one()
+            EffectivePermissionService.refresh(db, role_id=role_id, permission_id=permission_id)
+            record_change(db, "role_permission", "created", role_id, {"role_id": role_id, "permission_id": permission_id})
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if is_foreign_key_violation(e):
+                raise ValueError("角色或权限不存在")
+            raise ValueError("角色已拥有该权限")
+        
+        return role_permission
+    
+    @staticmethod
+    def revoke_permission_from_role(db: Session, role_id: int, permission_id: int) -> bool:
+        """撤销角色权限"""
+        EffectivePermissionService.lock_role(db, role_id)
+        result = db.execute(
+            delete(RolePermission).where(
+                RolePermission.role_id == role_id,
+                RolePermission.permission_id == permission_id
+            )
+        )
+        
+        if result.rowcount:
+            EffectivePermissionService.refresh(db, role_id=role_id, permission_id=permission_id)
+            record_change(db, "role_permission", "deleted", role_id, {"role_id": role_id, "permission_id": permission_id})
             db.commit()
             return True
+        db.rollback()
         return False
     
     @staticmethod
@@ -0,0 +1,109 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case
+from datetime import datetime, timedelta
+import threading
+from app.config import settings
+from app.models.user import User
+from app.models.role import Role
+from app.models.user_role import UserRole
+from app.utils.cache import TTLCache
+from app.diagnostics.tracing import traced_class
+
+# 统计结果按活动天数缓存
+_summary_cache = TTLCache("stats_summary", ttl=settings.stats_cache_ttl_seconds, maxsize=16)
+# 缓存过期时只让一个请求重新计算，其他请求等待后直接读取缓存
+_summary_lock = threading.Lock()
+
+def _count_if(condition):
+    """满足条件的行数（CASE求和，各数据库通用）"""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+@traced_class
+class StatsService:
+    """仪表盘统计服务类"""
+    
+    @staticmethod
+    def get_summary(db: Session, days: int = 14) -> dict:
+        """获取统计汇总，结果缓存STATS_CACHE_TTL_SECONDS秒"""
+        summary = _summary_cache.get(days)
+        if summary is not None:
+            return summary
+        
+        with _summary_lock:
+            summary = _summary_cache.get(days)
+            if summary is None:
+                summary = StatsService.compute_summary(db, days)
+                _summary_cache.set(days, summary)
+        return summary
+    
+    @staticmethod
+    def compute_summary(db: Session, days: int = 14) -> dict:
+        """用几条聚合查询计算统计汇总
+        
+        用户总数和状态需要扫描users表；登录统计只扫描last_login索引上的最近30天范围；
+        角色用户数按user_roles.role_id分组后关联用户状态。
+        """
+        now = datetime.utcnow()
+        
+        total, active, superusers = db.execute(
+            select(
+                func.count(),
+                _count_if(User.is_active == True),
+                _count_if(User.is_superuser == True)
+            ).select_from(User)
+        ).one()
+        
+        logged_in_30d, logged_in_7d, logged_in_24h = db.execute(
+            select(
+                func.count(),
+                _count_if(User.last_login >= now - timedelta(days=7)),
+                _count_if(User.last_login >= now - timedelta(hours=24))
+            ).where(User.last_login >= now - timedelta(days=30))
+        ).one()
+        
+        activity_since = (now - timedelta(days=days - 1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        login_day = func.date(User.last_login)
+        login_activity = db.execute(
+            select(login_day, func.count()).where(
+                User.last_login >= activity_since
+            ).group_by(login_day).order_by(login_day)
+        ).all()
+        
+        role_counts = select(
+            UserRole.role_id,
+            func.count().label("user_count"),
+            _count_if(User.is_active == True).label("active_user_count")
+        ).join(User, UserRole.user_id == User.id).group_by(UserRole.role_id).subquery()
+        roles = db.execute(
+            select(
+                Role.id,
+                Role.name,
+                Role.display_name,
+                Role.is_active,
+                func.coalesce(role_counts.c.user_count, 0),
+                func.coalesce(role_counts.c.active_user_count, 0)
+            ).outerjoin(role_counts, role_counts.c.role_id == Role.id).order_by(Role.id)
+        ).all()
+        
+        return {
+            "total_users": total,
+            "active_users": active,
+            "inactive_users": total - active,
+            "superusers": superusers,
+            "logged_in_24h": logged_in_24h,
+            "logged_in_7d": logged_in_7d,
+            "logged_in_30d": logged_in_30d,
+            "roles": [
+                {
+                    "role_id": role_id,
+                    "name": name,
+                    "display_name": display_name,
+                    "is_active": is_active,
+                    "user_count": user_count,
+                    "active_user_count": active_user_count,
+                }
+                for role_id, name, display_name, is_active, user_count, active_user_count in roles
+            ],
+            "login_activity": [{"day": day, "count": count} for day, count in login_activity],
+            "generated_at": now,
+        }
@@ -1,56 +1,105 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
-from typing import Optional, List
+from sqlalchemy import Integer, and_, or_, func, insert, update, delete, select, literal
+from sqlalchemy.exc import IntegrityError
+from typing import Optional, List, Dict, Tuple
 from app.models.user import User
 from app.models.role import Role
 from app.models.user_role import UserRole
 from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.rows import UserRow
 from app.auth.password import get_password_hash
+from app.auth.versions import bump_auth_versions, remember_auth_versions
+from app.database.errors import integrity_error_column, is_foreign_key_violation
+from app.database.statements import USER_BY_ID, USER_BY_USERNAME, USER_ROLES
+from app.services.effective_permission_service import EffectivePermissionService
+from app.changes import record_change, entity_data
 from datetime import datetime
+import base64
+from app.diagnostics.tracing import traced_class
 
+# 搜索结果排序等级：完全匹配 < 前缀匹配 < 子串匹配
+RANK_EXACT, RANK_PREFIX, RANK_SUBSTRING = 0, 1, 2
+# 低于该长度的关键字无法使用三元组索引，只做前缀匹配
+MIN_SUBSTRING_QUERY_LENGTH = 3
+# 用户列表行对应的表列，按UserRow的字段顺序
+USER_ROW_COLUMNS = [User.__table__.c[field] for field in UserRow._fields if field != "roles"]
+
+def _escape_like(value: str) -> str:
+    """转义LIKE通配符"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _encode_cursor(rank: int, user_id: int) -> str:
+    """编码搜索游标"""
+    return base64.urlsafe_b64encode(f"{rank}:{user_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[int, int]:
+    """解码搜索游标"""
+    try:
+        rank, user_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(":")
+        return int(rank), int(user_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("无效的游标")
+
+@traced_class
 class UserService:
     """用户服务类"""
     
     @staticmethod
     def create_user(db: Session, user_create: UserCreate) -> User:
-        """创建用户"""
-        # 检查用户名是否已存在
-        if UserService.get_user_by_username(db, user_create.username):
-            raise ValueError("用户名已存在")
-        
-        # 检查邮箱是否已存在
-        if UserService.get_user_by_email(db, user_create.email):
-            raise ValueError("邮箱已存在")
+        """创建用户
         
-        # 创建用户
+        用户名和邮箱的唯一性由数据库约束保证，冲突时映射为ValueError，
+        避免先查询再插入之间的并发竞争。
+        """
         hashed_password = get_password_hash(user_create.password)
-        db_user = User(
-            username=user_create.username,
-            email=user_create.email,
-            full_name=user_create.full_name,
-            hashed_password=hashed_password
-        )
         
-        db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        
-        # 自动分配查看者角色
-        viewer_role = db.query(Role).filter(Role.name == "viewer").first()
-        if viewer_role:
-            UserService.assign_role_to_user(db, db_user.id, viewer_role.id)
+        try:
+            db_user = db.execute(
+                insert(User).values(
+                    username=user_create.username,
+                    email=user_create.email,
+                    full_name=user_create.full_name,
+                    hashed_password=hashed_password
+                ).returning(User)
+            ).scalar_one()
+            
+            # 自动分配查看者角色
+            db.execute(
+                insert(UserRole).from_select(
+                    ["user_id", "role_id"],
+                    select(literal(db_user.id), Role.id).where(Role.name == "viewer")
+                )
+            )
+            EffectivePermissionService.refresh(db, user_id=db_user.id)
+            record_change(db, "user", "created", db_user.id, entity_data("user", db_user))
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            column = integrity_error_column(e, ["username", "email"])
+            if column == "username":
+                raise ValueError("用户名已存在")
+            if column == "email":
+                raise ValueError("邮箱已存在")
+            raise
         
         return db_user
     
     @staticmethod
     def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
         """根据ID获取用户"""
-        return db.query(User).filter(User.id == user_id).first()
+        return db.execute(USER_BY_ID, {"user_id": user_id}).scalar_one_or_none()
+    
+    @staticmethod
+    def get_users_by_ids(db: Session, user_ids: List[int]) -> List[User]:
+        """根据ID列表批量获取用户"""
+        if not user_ids:
+            return []
+        return db.query(User).filter(User.id.in_(user_ids)).order_by(User.id).all()
     
     @staticmethod
     def get_user_by_username(db: Session, username: str) -> Optional[User]:
         """根据用户名获取用户"""
-        return db.query(User).filter(User.username == username).first()
+        return db.execute(USER_BY_USERNAME, {"username": username}).scalar_one_or_none()
     
     @staticmethod
     def get_user_by_email(db: Session, email: str) -> Optional[User]:
@@ -62,65 +111,214 @@ class UserService:
         """获取用户列表"""
         return db.query(User).offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_user_rows(db: Session, skip: int = 0, limit: int = 100) -> List[UserRow]:
+        """获取用户列表行（只读）
+        
+        直接查询表列，不构建ORM实例；角色名称一次查询批量获取。
+        """
+        rows = db.execute(select(*USER_ROW_COLUMNS).offset(skip).limit(limit)).all()
+        roles_by_user = UserService.get_role_names_for_users(db, [row.id for row in rows])
+        return [UserRow(*row, roles_by_user[row.id]) for row in rows]
+    
+    @staticmethod
+    def get_users_fields(
+        db: Session,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        user_id: Optional[int] = None
+    ) -> List[dict]:
+        """只查询指定字段的用户列表，仅在请求roles字段时才加载角色"""
+        columns = [field for field in fields if field != "roles"]
+        query = select(*[getattr(User, column) for column in dict.fromkeys(["id", *columns])])
+        if user_id is not None:
+            query = query.where(User.id == user_id)
+        
+        rows = [dict(row) for row in db.execute(query.offset(skip).limit(limit)).mappings()]
+        
+        if "roles" in fields:
+            roles_by_user = UserService.get_role_names_for_users(db, [row["id"] for row in rows])
+            for row in rows:
+                row["roles"] = roles_by_user[row["id"]]
+        if "id" not in fields:
+            for row in rows:
+                del row["id"]
+        
+        return rows
+    
+    @staticmethod
+    def search_users(
+        db: Session,
+        q: str,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """按用户名、邮箱、全名搜索用户（不区分大小写）
+        
+        按完全匹配、前缀匹配、子串匹配三个等级依次查询，使用(等级, ID)游标分页。
+        每个等级单独查询并按ID排序、单独LIMIT，不需要对整个匹配集计算等级再排序：
+        完全匹配走lower()表达式索引；PostgreSQL下前缀和子串匹配走三元组索引，
+        SQLite下前缀匹配走lower()表达式索引的范围扫描，子串匹配退化为扫描。
+        """
+        term = q.strip().lower()
+        columns = [func.lower(User.username), func.lower(User.email), func.lower(User.full_name)]
+        prefix_pattern = f"{_escape_like(term)}%"
+        substring_pattern = f"%{_escape_like(term)}%"
+        
+        if db.get_bind().dialect.name == "sqlite":
+            # 前缀范围：[term, term + 最大码点)，可命中lower()表达式索引
+            upper_bound = term + "\U0010ffff"
+            prefix_match = or_(*[and_(column >= term, column < upper_bound) for column in columns])
+        else:
+            prefix_match = or_(*[column.like(prefix_pattern, escape="\\") for column in columns])
+        exact_match = or_(*[column == term for column in columns])
+        
+        # 各等级互斥：低等级排除高等级已返回的行（IS NOT TRUE 使full_name为NULL的行不被误排除）
+        tiers = [
+            (RANK_EXACT, exact_match),
+            (RANK_PREFIX, and_(prefix_match, exact_match.is_not(True))),
+        ]
+        if len(term) >= MIN_SUBSTRING_QUERY_LENGTH:
+            substring_match = or_(*[column.like(substring_pattern, escape="\\") for column in columns])
+            tiers.append((RANK_SUBSTRING, and_(substring_match, prefix_match.is_not(True))))
+        
+        last_rank, last_id = _decode_cursor(cursor) if cursor else (RANK_EXACT, None)
+        rows: List[Tuple[int, User]] = []
+        for rank, condition in tiers:
+            if rank < last_rank:
+                continue
+            query = db.query(User).filter(condition)
+            if rank == last_rank and last_id is not None:
+                query = query.filter(User.id > last_id)
+            # 多取一条用于判断是否还有下一页
+            users = query.order_by(User.id).limit(limit + 1 - len(rows)).all()
+            rows.extend((rank, user) for user in users)
+            if len(rows) > limit:
+                break
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last_rank, last_user = rows[-1]
+            next_cursor = _encode_cursor(last_rank, last_user.id)
+        
+        return [user for _, user in rows], next_cursor
+    
     @staticmethod
     def update_user(db: Session, user_id: int, user_update: UserUpdate) -> Optional[User]:
         """更新用户信息"""
-        db_user = UserService.get_user_by_id(db, user_id)
-        if not db_user:
-            return None
-        
         update_data = user_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_user, field, value)
+        if not update_data:
+            return UserService.get_user_by_id(db, user_id)
         
-        db.commit()
-        db.refresh(db_user)
+        try:
+            # 递增授权版本号，使携带旧声明的令牌回退到数据库校验
+            db_user = db.execute(
+                update(User).where(User.id == user_id).values(
+                    **update_data, auth_version=User.auth_version + 1
+                ).returning(User)
+            ).scalar_one_or_none()
+            if db_user is not None:
+                # 用户停用或启用时同步有效权限
+                if "is_active" in update_data:
+                    EffectivePermissionService.refresh(db, user_id=user_id)
+                record_change(db, "user", "updated", db_user.id, entity_data("user", db_user))
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if integrity_error_column(e, ["email"]) == "email":
+                raise ValueError("邮箱已存在")
+            raise
+        
+        if db_user is not None:
+            remember_auth_versions([(db_user.id, db_user.auth_version)])
         return db_user
     
     @staticmethod
     def update_last_login(db: Session, user_id: int) -> None:
         """更新用户最后登录时间"""
-        db_user = UserService.get_user_by_id(db, user_id)
-        if db_user:
-            db_user.last_login = datetime.utcnow()
-            db.commit()
+        db.execute(update(User).where(User.id == user_id).values(last_login=datetime.utcnow()))
+        db.commit()
+    
+    @staticmethod
+    def update_password_hash(db: Session, user_id: int, old_hash: str, new_hash: str) -> bool:
+        """替换用户密码哈希（仅当存储的哈希仍为old_hash时才更新，避免覆盖并发修改）"""
+        updated = db.query(User).filter(
+            and_(User.id == user_id, User.hashed_password == old_hash)
+        ).update({User.hashed_password: new_hash}, synchronize_session=False)
+        db.commit()
+        return updated > 0
     
     @staticmethod
     def assign_role_to_user(db: Session, user_id: int, role_id: int, assigned_by: Optional[int] = None) -> UserRole:
-        """为用户分配角色"""
-        # 检查是否已经分配了该角色
-        existing = db.query(UserRole).filter(
-            and_(UserRole.user_id == user_id, UserRole.role_id == role_id)
-        ).first()
+        """为用户分配角色
         
-        if existing:
+        使用 INSERT ... SELECT ... WHERE NOT EXISTS，已拥有该角色时不插入任何行，
+        不依赖 uq_user_roles_user_role 约束（升级前创建的数据库可能没有该约束）。
+        """
+        try:
+            EffectivePermissionService.lock_role(db, role_id, user_id)
+            assigned = select(UserRole.id).where(UserRole.user_id == user_id, UserRole.role_id == role_id)
+            user_role = db.execute(
+                insert(UserRole).from_select(
+                    ["user_id", "role_id", "assigned_by"],
+                    select(
+                        literal(user_id, Integer),
+                        literal(role_id, Integer),
+                        literal(assigned_by, Integer)
+                    ).where(~assigned.exists())
+                ).returning(UserRole)
+            ).scalar_one_or_none()
+            if user_role is None:
+                db.rollback()
+                raise ValueError("用户已拥有该角色")
+            EffectivePermissionService.refresh(db, user_id=user_id, role_id=role_id)
+            versions = bump_auth_versions(db, User.id == user_id)
+            record_change(db, "user_role", "created", user_id, {"user_id": user_id, "role_id": role_id})
+            db.commit()
+        except IntegrityError as e:
+            db.rollback()
+            if is_foreign_key_violation(e):
+                raise ValueError("用户或角色不存在")
             raise ValueError("用户已拥有该角色")
         
-        user_role = UserRole(
-            user_id=user_id,
-            role_id=role_id,
-            assigned_by=assigned_by
-        )
-        
-        db.add(user_role)
-        db.commit()
-        db.refresh(user_role)
+        remember_auth_versions(versions)
         return user_role
     
     @staticmethod
     def remove_role_from_user(db: Session, user_id: int, role_id: int) -> bool:
         """移除用户角色"""
-        user_role = db.query(UserRole).filter(
-            and_(UserRole.user_id == user_id, UserRole.role_id == role_id)
-        ).first()
+        EffectivePermissionService.lock_role(db, role_id, user_id)
+        result = db.execute(
+            delete(UserRole).where(and_(UserRole.user_id == user_id, UserRole.role_id == role_id))
+        )
         
-        if user_role:
-            db.delete(user_role)
+        if result.rowcount:
+            EffectivePermissionService.refresh(db, user_id=user_id, role_id=role_id)
+            versions = bump_auth_versions(db, User.id == user_id)
+            record_change(db, "user_role", "deleted", user_id, {"user_id": user_id, "role_id": role_id})
             db.commit()
+            remember_auth_versions(versions)
             return True
+        db.rollback()
         return False
     
     @staticmethod
     def get_user_roles(db: Session, user_id: int) -> List[Role]:
         """获取用户角色列表"""
-        return db.query(Role).join(UserRole).filter(UserRole.user_id == user_id).all()
\ No newline at end of file
+        return list(db.execute(USER_ROLES, {"user_id": user_id}).scalars())
+    
+    @staticmethod
+    def get_role_names_for_users(db: Session, user_ids: List[int]) -> Dict[int, List[str]]:
+        """一次查询获取多个用户的角色名称"""
+        role_names = {user_id: [] for user_id in user_ids}
+        if not user_ids:
+            return role_names
+        
+        rows = db.query(UserRole.user_id, Role.name).join(Role, UserRole.role_id == Role.id).filter(
+            UserRole.user_id.in_(user_ids)
+        ).order_by(UserRole.user_id, UserRole.id).all()
+        for user_id, role_name in rows:
+            role_names[user_id].append(role_name)
+        return role_names
\ No newline at end of file
@@ -0,0 +1,4 @@
+from .logger import setup_logging, stop_log_listener
+from .fields import parse_fields, trimmed_response
+
+__all__ = ["setup_logging", "stop_log_listener", "parse_fields", "trimmed_response"]
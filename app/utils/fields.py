@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter, create_model
+from .serialization import MSGPACK_MEDIA_TYPE, pack, wants_msgpack
+from app.diagnostics.tracing import span
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """解析?fields=参数，返回按响应模型字段顺序排列的字段列表；未指定时返回None"""
+    if not fields:
+        return None
+    
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"未知字段: {', '.join(sorted(unknown))}"
+        )
+    if not requested:
+        return None
+    
+    return [field for field in model.model_fields if field in requested]
+
+@lru_cache(maxsize=256)
+def _trimmed_adapter(model: Type[BaseModel], fields: Tuple[str, ...], many: bool) -> TypeAdapter:
+    """根据字段子集生成精简响应模型（按模型和字段组合缓存）"""
+    trimmed = create_model(
+        f"{model.__name__}Fields",
+        **{field: (model.model_fields[field].annotation, None) for field in fields}
+    )
+    return TypeAdapter(List[trimmed] if many else trimmed)
+
+def trimmed_response(model: Type[BaseModel], fields: List[str], data: Any, many: bool = True) -> Response:
+    """只序列化请求的字段"""
+    with span("response.render"):
+        adapter = _trimmed_adapter(model, tuple(fields), many)
+        validated = adapter.validate_python(data)
+        if wants_msgpack():
+            return Response(content=pack(adapter.dump_python(validated, mode="json")), media_type=MSGPACK_MEDIA_TYPE)
+        return Response(content=adapter.dump_json(validated), media_type="application/json")
@@ -0,0 +1,79 @@
+import atexit
+import json
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+ACCESS_LOGGER_NAME = "app.access"
+
+class JsonFormatter(logging.Formatter):
+    """结构化JSON日志格式，访问日志的字段来自record.access"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        access = getattr(record, "access", None)
+        if access:
+            data.update(access)
+        else:
+            data["message"] = record.getMessage()
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+class _AccessOnlyFilter(logging.Filter):
+    """只放行访问日志"""
+    def filter(self, record):
+        return record.name == ACCESS_LOGGER_NAME
+
+class _NonAccessFilter(logging.Filter):
+    """放行访问日志以外的记录"""
+    def filter(self, record):
+        return record.name != ACCESS_LOGGER_NAME
+
+class _DeferredQueueHandler(QueueHandler):
+    """进程内队列处理器，格式化工作全部交给后台监听线程"""
+    
+    def prepare(self, record):
+        return record
+
+_listener: Optional[QueueListener] = None
+_log_queue: Optional[queue.SimpleQueue] = None
+
+def setup_logging(level: int = logging.INFO) -> None:
+    """配置异步日志：事件循环只负责入队，格式化和输出由后台线程完成"""
+    global _listener, _log_queue
+    if _listener is not None:
+        return
+    
+    log_queue = _log_queue = queue.SimpleQueue()
+    
+    access_handler = logging.StreamHandler()
+    access_handler.setFormatter(JsonFormatter())
+    access_handler.addFilter(_AccessOnlyFilter())
+    
+    default_handler = logging.StreamHandler()
+    default_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    default_handler.addFilter(_NonAccessFilter())
+    
+    _listener = QueueListener(log_queue, access_handler, default_handler, respect_handler_level=True)
+    
+    root = logging.getLogger()
+    root.handlers = [_DeferredQueueHandler(log_queue)]
+    root.setLevel(level)
+    
+    _listener.start()
+    atexit.register(stop_log_listener)
+
+def stop_log_listener() -> None:
+    """停止后台日志监听线程并刷出剩余日志"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_log_queue_size() -> int:
+    """获取尚未被后台线程处理的日志条数"""
+    return _log_queue.qsize() if _log_queue is not None else 0
@@ -0,0 +1,17 @@
+from enum import Enum
+from fastapi.responses import Response
+
+TOTAL_COUNT_HEADER = "X-Total-Count"
+TOTAL_COUNT_MODE_HEADER = "X-Total-Count-Mode"
+
+class CountMode(str, Enum):
+    """总数统计模式"""
+    exact = "exact"
+    estimate = "estimate"
+    auto = "auto"
+
+def set_total_count(response: Response, total: int, mode: str) -> Response:
+    """在响应头中写入总数及统计模式"""
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    response.headers[TOTAL_COUNT_MODE_HEADER] = mode
+    return response
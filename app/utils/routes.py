@@ -0,0 +1,34 @@
+from typing import Dict, Generic, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+def normalize_path(path: str) -> str:
+    """去掉末尾的/，/api/users/ 与 /api/users 视为同一路径"""
+    return path.rstrip("/") or "/"
+
+class RouteTable(Generic[T]):
+    """按请求路径查找路由配置
+    
+    以 /* 结尾的键按前缀匹配（长前缀优先），其余按路径精确匹配（忽略末尾的/）。
+    中间件在路由之前执行，只能按路径而不是路由模板匹配。
+    """
+    
+    def __init__(self, routes: Dict[str, T]):
+        self._exact: Dict[str, Tuple[str, T]] = {}
+        self._prefixes: List[Tuple[str, str, T]] = []
+        for key, value in routes.items():
+            if key.endswith("/*"):
+                self._prefixes.append((key[:-1], key, value))
+            else:
+                self._exact[normalize_path(key)] = (key, value)
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+    
+    def match(self, path: str) -> Optional[Tuple[str, T]]:
+        """返回(匹配的键, 配置)，未匹配时返回None"""
+        item = self._exact.get(normalize_path(path))
+        if item is not None:
+            return item
+        for prefix, key, value in self._prefixes:
+            if path.startswith(prefix):
+                return key, value
+        return None
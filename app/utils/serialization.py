@@ -0,0 +1,45 @@
+from contextvars import ContextVar
+from typing import Any, Iterable, NamedTuple
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json, to_jsonable_python
+import msgpack
+from app.diagnostics.tracing import span
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# 兼容部分客户端使用的旧媒体类型
+MSGPACK_MEDIA_TYPES = (b"application/msgpack", b"application/x-msgpack")
+
+_wants_msgpack: ContextVar[bool] = ContextVar("wants_msgpack", default=False)
+
+def set_wants_msgpack(value: bool) -> None:
+    """标记当前请求是否要求MessagePack响应"""
+    _wants_msgpack.set(value)
+
+def wants_msgpack() -> bool:
+    """当前请求是否要求MessagePack响应"""
+    return _wants_msgpack.get()
+
+def pack(content: Any) -> bytes:
+    """编码为MessagePack，content须为JSON兼容的数据"""
+    return msgpack.packb(content, use_bin_type=True)
+
+class NegotiatedResponse(JSONResponse):
+    """按请求的Accept头输出JSON或MessagePack的默认响应类"""
+    
+    def render(self, content: Any) -> bytes:
+        with span("response.render"):
+            if wants_msgpack():
+                self.media_type = MSGPACK_MEDIA_TYPE
+                return pack(content)
+            return super().render(content)
+
+def rows_response(rows: Iterable[NamedTuple]) -> Response:
+    """直接序列化行对象列表（app.schemas.rows），跳过响应模型的校验和转换
+    
+    使用pydantic-core的编码器，日期时间等类型的格式与响应模型一致（如UTC时间输出为Z后缀）。
+    """
+    with span("response.render"):
+        content = [row._asdict() for row in rows]
+        if wants_msgpack():
+            return Response(content=pack(to_jsonable_python(content)), media_type=MSGPACK_MEDIA_TYPE)
+        return Response(content=to_json(content), media_type="application/json")
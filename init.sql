@@ -10,6 +10,7 @@ SET timezone = 'Asia/Shanghai';
 -- 创建扩展（如果需要）
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pg_stat_statements";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
 
 -- 创建用户（如果需要额外的用户）
 -- CREATE USER IF NOT EXISTS dbatools_readonly WITH PASSWORD 'readonly123';
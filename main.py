@@ -1,66 +1,176 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from app.routers import auth, users, roles, permissions
-from app.database import engine
+from fastapi.middleware.cors import CORSMiddleware
+from app.routers import auth, users, roles, permissions, diagnostics, api_keys, jobs, changes, stats
+from app.database import write_engine
 from app.models import Base
+from app.config import settings
+from app.diagnostics import loop_lag_monitor
+from app.auth.api_key import flush_api_key_usage
+from app.jobs import job_runner
+from app.changes import change_feed
+from app.database.budget import QueryBudgetExceeded
+from app.middleware import (
+    AccessLogMiddleware,
+    JunkPathMiddleware,
+    ContentNegotiationMiddleware,
+    CompressionMiddleware,
+    ProfilingMiddleware,
+    TracingMiddleware,
+    IdempotencyMiddleware,
+    CoalescingMiddleware,
+    AdmissionMiddleware,
+    admission_controller,
+    QueryBudgetMiddleware
+)
+from app.utils import setup_logging
+from app.utils.serialization import NegotiatedResponse
+from app.utils.pagination import TOTAL_COUNT_HEADER, TOTAL_COUNT_MODE_HEADER
 import logging
 import uvicorn
 
-# 配置日志，屏蔽uvicorn的access日志中的特定404错误
-class CustomUvicornFilter(logging.Filter):
-    """自定义日志过滤器，屏蔽Vite相关的404请求"""
-    def filter(self, record):
-        # 屏蔽包含@vite、node_modules、src等路径的404日志
-        if hasattr(record, 'getMessage'):
-            message = record.getMessage()
-            if ('404 Not Found' in message and 
-                ('/@vite/' in message or '/node_modules/' in message or '/src/' in message)):
-                return False
-        return True
-
-# 应用过滤器到uvicorn的access日志
-logging.getLogger('uvicorn.access').addFilter(CustomUvicornFilter())
+# 配置异步日志，访问日志由AccessLogMiddleware输出
+setup_logging(getattr(logging, settings.log_level.upper(), logging.INFO))
 
 # 创建数据库表
-Base.metadata.create_all(bind=engine)
+Base.metadata.create_all(bind=write_engine)
 
 app = FastAPI(
     title="DBA Tools API",
     description="数据库管理工具后端API",
-    version="1.0.0"
+    version="1.0.0",
+    # 支持 Accept: application/msgpack
+    default_response_class=NegotiatedResponse
+)
+
+# 请求的数据库执行预算（SQL语句数和执行时间），超出时立即失败
+if settings.query_budget_enabled:
+    app.add_middleware(
+        QueryBudgetMiddleware,
+        budgets=settings.query_budget_routes,
+        default_timeout_ms=settings.query_budget_timeout_ms,
+        default_max_statements=settings.query_budget_max_statements,
+    )
+
+# 按路由分类限制并发，过载时排队或返回503（位于请求合并和幂等之内，等待合并结果或原请求的请求不占名额）
+if settings.admission_enabled:
+    app.add_middleware(
+        AdmissionMiddleware,
+        controller=admission_controller,
+        retry_after=settings.admission_retry_after_seconds,
+    )
+
+# POST请求的Idempotency-Key支持，重试直接返回第一次的响应（位于准入控制之外，等待原请求完成的重复请求不占名额）
+app.add_middleware(
+    IdempotencyMiddleware,
+    ttl=settings.idempotency_ttl_seconds,
+    max_entries=settings.idempotency_max_entries,
+    wait_timeout=settings.idempotency_wait_seconds,
+)
+
+# 相同的并发GET请求只执行一次，共享同一响应
+if settings.coalescing_enabled:
+    app.add_middleware(
+        CoalescingMiddleware,
+        routes=settings.coalescing_routes,
+        max_body_size=settings.coalescing_max_body_bytes,
+    )
+
+# 按Accept头选择JSON或MessagePack
+app.add_middleware(ContentNegotiationMiddleware)
+
+# 应用内brotli/gzip压缩
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_minimum_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+    )
+
+# 请求追踪（数据库、密码哈希、JWT、服务层、序列化）
+if settings.tracing_enabled:
+    app.add_middleware(TracingMiddleware)
+
+# 管理员按需剖析单个请求
+if settings.profiling_enabled:
+    app.add_middleware(ProfilingMiddleware)
+
+# 结构化访问日志（含总耗时和数据库耗时）
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rate=settings.access_log_sample_rate,
+    slow_ms=settings.access_log_slow_ms,
 )
 
-# 配置CORS
+# 在路由之前拒绝Vite、node_modules、src等无效请求
+app.add_middleware(JunkPathMiddleware)
+
+# 配置CORS（最后添加，位于最外层：各中间件直接返回的400/409/422/503响应也带CORS头，预检请求不经过其他中间件）
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # 生产环境应该限制具体域名
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 允许前端读取列表总数
+    expose_headers=[TOTAL_COUNT_HEADER, TOTAL_COUNT_MODE_HEADER, "Idempotent-Replayed", "X-Coalesced", "Retry-After"],
 )
 
-# 添加路由来处理Vite相关请求，避免404错误
-@app.get("/@vite/{path:path}")
-async def handle_vite_requests(path: str):
-    """处理Vite开发服务器相关请求"""
-    return JSONResponse(status_code=404, content={"detail": "Vite resource not found"})
-
-@app.get("/node_modules/{path:path}")
-async def handle_node_modules_requests(path: str):
-    """处理node_modules相关请求"""
-    return JSONResponse(status_code=404, content={"detail": "Node modules resource not found"})
-
-@app.get("/src/{path:path}")
-async def handle_src_requests(path: str):
-    """处理src相关请求"""
-    return JSONResponse(status_code=404, content={"detail": "Source resource not found"})
+@app.exception_handler(QueryBudgetExceeded)
+async def query_budget_exceeded_handler(request: Request, exc: QueryBudgetExceeded):
+    """超出数据库执行预算的请求返回503"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc), "budget": {"route": exc.route, "reason": exc.reason, "limit": exc.limit}}
+    )
 
 # 注册路由
 app.include_router(auth.router, prefix="/api/auth", tags=["认证"])
 app.include_router(users.router, prefix="/api/users", tags=["用户管理"])
 app.include_router(roles.router, prefix="/api/roles", tags=["角色管理"])
 app.include_router(permissions.router, prefix="/api/permissions", tags=["权限管理"])
+app.include_router(diagnostics.router, prefix="/api/diagnostics", tags=["诊断"])
+app.include_router(api_keys.router, prefix="/api/api-keys", tags=["API密钥"])
+app.include_router(jobs.router, prefix="/api/jobs", tags=["后台任务"])
+app.include_router(changes.router, prefix="/api/changes", tags=["变更推送"])
+app.include_router(stats.router, prefix="/api/stats", tags=["统计"])
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    """启动事件循环延迟监控"""
+    if settings.loop_lag_enabled:
+        loop_lag_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_lag_monitor():
+    """停止事件循环延迟监控"""
+    await loop_lag_monitor.stop()
+
+@app.on_event("startup")
+def start_job_runner():
+    """启动后台任务执行器并恢复未完成的任务"""
+    job_runner.start()
+
+@app.on_event("shutdown")
+def stop_job_runner():
+    """停止后台任务执行器"""
+    job_runner.shutdown()
+
+@app.on_event("startup")
+async def start_change_feed():
+    """启动变更推送"""
+    await change_feed.start()
+
+@app.on_event("shutdown")
+async def stop_change_feed():
+    """停止变更推送"""
+    await change_feed.stop()
+
+@app.on_event("shutdown")
+def flush_api_key_last_used():
+    """写入尚未落库的API密钥最后使用时间"""
+    flush_api_key_usage()
 
 @app.get("/")
 async def root():
@@ -73,6 +183,5 @@ async def health_check():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    import uvicorn
-    from app.config import settings
-    uvicorn.run(app, host=settings.host, port=settings.port)
\ No newline at end of file
+    # 访问日志由AccessLogMiddleware输出，关闭uvicorn自带的访问日志
+    uvicorn.run(app, host=settings.host, port=settings.port, access_log=False)
\ No newline at end of file
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列表读取路径对比脚本 - 比较1000行用户列表经ORM实例+响应模型与经Core行对象直接序列化的耗时和内存
+
+使用内存SQLite，两条路径执行相同数量的SQL，差异主要来自ORM实例构建、响应模型校验和序列化。
+"""
+
+import sys
+import os
+import gc
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 只使用脚本内创建的内存数据库，不连接配置中的数据库
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, User, Role, UserRole
+from app.schemas.user import UserResponse
+from app.schemas.rows import UserRow
+from app.services.user_service import UserService
+from app.utils.serialization import rows_response
+
+ROWS = 1000
+
+# FastAPI为每个路由缓存一次响应模型的校验器
+USER_LIST_ADAPTER = TypeAdapter(List[UserResponse])
+
+def setup_sessionmaker():
+    """
+    创建内存数据库并写入一页以上的测试数据
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(Role), [
+            {"name": name, "display_name": name} for name in ("admin", "operator", "viewer")
+        ])
+        conn.execute(insert(User), [
+            {
+                "username": f"user{i:07d}",
+                "email": f"user{i:07d}@example.com",
+                "full_name": f"测试用户 {i}",
+                "hashed_password": "x",
+                "is_active": i % 7 != 0,
+                "last_login": now - timedelta(minutes=i),
+            }
+            for i in range(1, ROWS + 101)
+        ])
+        conn.execute(insert(UserRole), [
+            {"user_id": i, "role_id": role_id}
+            for i in range(1, ROWS + 101)
+            for role_id in ((3,) if i % 3 else (2, 3))
+        ])
+    return sessionmaker(bind=engine)
+
+def orm_page(db) -> bytes:
+    """
+    原读取路径：ORM实例 -> 响应模型 -> JSON模式 -> json.dumps（与FastAPI的response_model处理一致）
+    """
+    users = UserService.get_users(db, limit=ROWS)
+    roles_by_user = UserService.get_role_names_for_users(db, [user.id for user in users])
+    responses = [
+        UserResponse(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            created_at=user.created_at,
+            last_login=user.last_login,
+            roles=roles_by_user[user.id]
+        )
+        for user in users
+    ]
+    content = USER_LIST_ADAPTER.dump_python(USER_LIST_ADAPTER.validate_python(responses), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def row_page(db) -> bytes:
+    """
+    只读路径：Core查询 -> UserRow -> 直接序列化
+    """
+    return rows_response(UserService.get_user_rows(db, limit=ROWS)).body
+
+def check_aware_datetimes() -> bool:
+    """
+    PostgreSQL的timestamptz列返回带时区的时间，检查两条路径对其输出相同（UTC为Z后缀）
+    """
+    rows = [
+        UserRow(
+            username="utc",
+            email="utc@example.com",
+            full_name="世界协调时",
+            id=1,
+            is_active=True,
+            is_superuser=False,
+            created_at=datetime(2024, 1, 1, 8, 30, 0, 123456, tzinfo=timezone.utc),
+            last_login=datetime(2024, 1, 1, 16, 30, tzinfo=timezone(timedelta(hours=8))),
+            roles=["viewer"]
+        )
+    ]
+    responses = [UserResponse(**row._asdict()) for row in rows]
+    content = USER_LIST_ADAPTER.dump_python(USER_LIST_ADAPTER.validate_python(responses), mode="json")
+    expected = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return rows_response(rows).body == expected
+
+def measure(name, session_factory, render, repeat: int = 20):
+    """
+    测量单页耗时（平均）以及读取和序列化过程中的内存峰值，每次使用新会话
+    """
+    def run():
+        db = session_factory()
+        try:
+            return render(db)
+        finally:
+            db.close()
+    
+    body = run()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    
+    gc.collect()
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    print(f"{name:<24}{elapsed_ms:>12.2f}{peak / 1024:>14.1f}{peak / ROWS:>14.0f}")
+    return body
+
+def main():
+    """
+    输出对比结果
+    """
+    session_factory = setup_sessionmaker()
+    
+    print(f"{'读取路径':<20}{'单页耗时(ms)':>12}{'内存峰值(KiB)':>12}{'每行(字节)':>12}")
+    orm_body = measure("ORM实例 + 响应模型", session_factory, orm_page)
+    row_body = measure("Core行对象", session_factory, row_page)
+    
+    print(f"\n{ROWS}行，响应体 {len(row_body):,} 字节，两条路径输出{'一致' if orm_body == row_body else '不一致'}")
+    print(f"带时区的时间（PostgreSQL），两条路径输出{'一致' if check_aware_datetimes() else '不一致'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+热点查询开销对比脚本 - 比较每次构建 db.query(...) 链与预构建 select() 语句的单次调用耗时
+
+使用内存SQLite，数据库执行时间可以忽略，结果主要反映Python侧的语句构建、缓存键计算和ORM加载开销。
+"""
+
+import sys
+import os
+import time
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 只使用脚本内创建的内存数据库，不连接配置中的数据库
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.models import Base, User, Role, UserRole
+from app.database.statements import USER_BY_ID, USER_BY_USERNAME, USER_ROLES, ROLE_BY_NAME
+
+def setup_session():
+    """
+    创建内存数据库并写入测试数据
+    """
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    roles = [Role(name=name, display_name=name) for name in ("admin", "operator", "viewer")]
+    session.add_all(roles)
+    session.flush()
+    for i in range(1, 101):
+        user = User(username=f"user{i:04d}", email=f"user{i:04d}@example.com", hashed_password="x")
+        session.add(user)
+        session.flush()
+        session.add_all([UserRole(user_id=user.id, role_id=role.id) for role in roles[i % 2:]])
+    session.commit()
+    return engine, session
+
+def measure(name, call, repeat: int = 5000):
+    """
+    测量单次调用的平均耗时（微秒）
+    """
+    for _ in range(200):
+        call()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    elapsed_us = (time.perf_counter() - start) * 1_000_000 / repeat
+    print(f"{name:<40}{elapsed_us:>12.1f}")
+    return elapsed_us
+
+def main():
+    """
+    输出对比结果
+    """
+    engine, db = setup_session()
+    
+    # 数据库侧的基准：直接用驱动执行相同的SQL
+    raw = engine.raw_connection()
+    cursor = raw.cursor()
+    
+    print(f"{'查询':<38}{'单次耗时(us)':>12}")
+    cases = [
+        (
+            "get_user_by_username",
+            lambda: db.query(User).filter(User.username == "user0042").first(),
+            lambda: db.execute(USER_BY_USERNAME, {"username": "user0042"}).scalar_one_or_none(),
+            ("SELECT * FROM users WHERE username = ?", ("user0042",)),
+        ),
+        (
+            "get_user_by_id",
+            lambda: db.query(User).filter(User.id == 42).first(),
+            lambda: db.execute(USER_BY_ID, {"user_id": 42}).scalar_one_or_none(),
+            ("SELECT * FROM users WHERE id = ?", (42,)),
+        ),
+        (
+            "get_user_roles",
+            lambda: db.query(Role).join(UserRole).filter(UserRole.user_id == 42).all(),
+            lambda: list(db.execute(USER_ROLES, {"user_id": 42}).scalars()),
+            (
+                "SELECT roles.* FROM roles JOIN user_roles ON user_roles.role_id = roles.id "
+                "WHERE user_roles.user_id = ? ORDER BY user_roles.id",
+                (42,),
+            ),
+        ),
+        (
+            "get_role_by_name",
+            lambda: db.query(Role).filter(Role.name == "viewer").first(),
+            lambda: db.execute(ROLE_BY_NAME, {"name": "viewer"}).scalar_one_or_none(),
+            ("SELECT * FROM roles WHERE name = ?", ("viewer",)),
+        ),
+    ]
+    for name, query_chain, prebuilt, (sql, params) in cases:
+        before = measure(f"{name} (db.query链)", query_chain)
+        after = measure(f"{name} (预构建select)", prebuilt)
+        driver = measure(f"{name} (驱动直接执行)", lambda: cursor.execute(sql, params).fetchall())
+        print(f"{'':<4}Python侧开销: {before - driver:.1f}us -> {after - driver:.1f}us\n")
+    
+    cursor.close()
+    raw.close()
+    db.close()
+
+if __name__ == "__main__":
+    main()
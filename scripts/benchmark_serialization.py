@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+序列化对比脚本 - 比较1000行用户列表在JSON、MessagePack及压缩后的体积和编码耗时
+"""
+
+import sys
+import os
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from app.schemas.user import UserResponse
+from app.utils.serialization import pack
+from app.middleware.compression import brotli
+
+def build_page(rows: int = 1000):
+    """
+    构造一页用户数据
+    """
+    now = datetime.utcnow()
+    return [
+        UserResponse(
+            id=i,
+            username=f"user{i:07d}",
+            email=f"user{i:07d}@example.com",
+            full_name=f"测试用户 {i}",
+            is_active=i % 7 != 0,
+            is_superuser=False,
+            created_at=now - timedelta(days=i),
+            last_login=now - timedelta(minutes=i),
+            roles=["viewer"] if i % 3 else ["viewer", "operator"]
+        )
+        for i in range(1, rows + 1)
+    ]
+
+def measure(name, encode, repeat: int = 20):
+    """
+    测量编码耗时（取平均）和输出体积
+    """
+    body = encode()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeat
+    print(f"{name:<24}{len(body):>12,}{elapsed_ms:>14.2f}")
+    return body
+
+def main():
+    """
+    输出对比结果
+    """
+    page = build_page()
+    content = jsonable_encoder(page)
+    
+    print(f"{'格式':<22}{'字节数':>10}{'编码耗时(ms)':>12}")
+    json_body = measure("json", lambda: json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    msgpack_body = measure("msgpack", lambda: pack(content))
+    measure("json + gzip(5)", lambda: gzip.compress(json_body, compresslevel=5))
+    measure("msgpack + gzip(5)", lambda: gzip.compress(msgpack_body, compresslevel=5))
+    if brotli is not None:
+        measure("json + brotli(4)", lambda: brotli.compress(json_body, quality=4))
+        measure("msgpack + brotli(4)", lambda: brotli.compress(msgpack_body, quality=4))
+    else:
+        print("未安装brotli，跳过brotli对比")
+    
+    print("\n说明: json/msgpack的耗时不含模型到基础类型的转换（jsonable_encoder），压缩耗时不含序列化。")
+
+if __name__ == "__main__":
+    main()
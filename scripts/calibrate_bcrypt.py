@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bcrypt轮数校准脚本 - 根据目标验证耗时给出当前机器上合适的BCRYPT_ROUNDS
+
+部署时运行一次并用 --env-file 写入配置，所有工作进程使用同一轮数。
+"""
+
+import sys
+import os
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.auth.password import calibrate_bcrypt_rounds
+
+def write_env(path: str, rounds: int) -> None:
+    """
+    在env文件中写入或替换BCRYPT_ROUNDS
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f.read().splitlines() if not line.startswith("BCRYPT_ROUNDS=")]
+    lines.append(f"BCRYPT_ROUNDS={rounds}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+def main():
+    """
+    执行校准并输出建议配置
+    """
+    parser = argparse.ArgumentParser(description="校准bcrypt轮数")
+    parser.add_argument("--target-ms", type=float, default=250.0, help="目标单次验证耗时（毫秒）")
+    parser.add_argument("--min-rounds", type=int, default=10, help="最小轮数")
+    parser.add_argument("--max-rounds", type=int, default=16, help="最大轮数")
+    parser.add_argument("--env-file", help="将结果写入该env文件（如 .env）")
+    args = parser.parse_args()
+    
+    rounds = calibrate_bcrypt_rounds(args.target_ms, args.min_rounds, args.max_rounds)
+    print(f"目标验证耗时: {args.target_ms}ms")
+    print(f"建议配置: BCRYPT_ROUNDS={rounds}")
+    if args.env_file:
+        write_env(args.env_file, rounds)
+        print(f"已写入 {args.env_file}")
+
+if __name__ == "__main__":
+    main()
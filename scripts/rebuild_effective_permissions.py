@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全量重建用户有效权限投影（user_effective_permissions），用于数据修复
+"""
+
+import sys
+import os
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.database.database import engine, SessionLocal
+from app.models import Base
+from app.services.effective_permission_service import EffectivePermissionService
+
+def rebuild_effective_permissions():
+    """
+    重建有效权限投影
+    """
+    print("开始重建用户有效权限...")
+    
+    # 确保投影表存在
+    Base.metadata.create_all(bind=engine)
+    
+    db = SessionLocal()
+    
+    try:
+        total = EffectivePermissionService.rebuild(db)
+        print(f"重建完成，共 {total} 条有效权限记录")
+    except Exception as e:
+        print(f"重建失败: {str(e)}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    rebuild_effective_permissions()
@@ -0,0 +1,74 @@
+import os
+import sys
+import tempfile
+import time
+import pytest
+
+# 在导入应用之前指定测试数据库：每次运行使用临时目录中的SQLite文件
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="dbatools-test-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+# 测试中不需要生产强度的密码哈希
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+import main
+from app.database import SessionLocal
+from app.models.user import User
+
+@pytest.fixture(scope="session")
+def client():
+    """应用客户端，进入上下文时执行启动事件（建表、后台任务执行器等）"""
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db():
+    """数据库会话"""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def register_user(client, username: str, password: str = "secret123", **fields) -> dict:
+    """注册用户并返回响应数据"""
+    response = client.post("/api/auth/register", json={
+        "username": username,
+        "email": f"{username}@example.com",
+        "password": password,
+        **fields
+    })
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def login_headers(client, username: str, password: str = "secret123") -> dict:
+    """登录并返回带访问令牌的请求头"""
+    response = client.post("/api/auth/login", json={"username": username, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def admin_headers(client) -> dict:
+    """超级用户的请求头"""
+    user = register_user(client, "test_admin")
+    session = SessionLocal()
+    try:
+        session.execute(update(User).where(User.id == user["id"]).values(is_superuser=True))
+        session.commit()
+    finally:
+        session.close()
+    return login_headers(client, "test_admin")
+
+def wait_for(predicate, timeout: float = 10.0, interval: float = 0.02):
+    """轮询直到predicate返回真值，超时则测试失败"""
+    deadline = time.monotonic() + timeout
+    while True:
+        value = predicate()
+        if value:
+            return value
+        if time.monotonic() > deadline:
+            pytest.fail("等待超时")
+        time.sleep(interval)
@@ -0,0 +1,93 @@
+import pytest
+from conftest import register_user, wait_for
+from app.models.job import Job
+
+@pytest.fixture
+def setup(client, admin_headers, request):
+    """创建一个角色、一个权限和一个用户，名称按测试区分"""
+    suffix = request.node.name.replace("test_", "")[:30]
+    role = client.post("/api/roles/", json={"name": f"r_{suffix}", "display_name": f"角色 {suffix}"}, headers=admin_headers)
+    assert role.status_code == 201, role.text
+    permission = client.post("/api/permissions/", json={
+        "name": f"p_{suffix}",
+        "display_name": f"权限 {suffix}",
+        "resource": f"res_{suffix}",
+        "action": "read"
+    }, headers=admin_headers)
+    assert permission.status_code == 201, permission.text
+    user = register_user(client, f"u_{suffix}")
+    return role.json()["id"], permission.json()["id"], user["id"]
+
+def effective_ids(client, headers, user_id):
+    response = client.get(f"/api/permissions/users/{user_id}/effective", headers=headers)
+    assert response.status_code == 200, response.text
+    return [permission["id"] for permission in response.json()]
+
+def test_assign_grant_and_revoke(client, admin_headers, setup):
+    """分配角色、授予和撤销权限、移除角色后投影随之更新"""
+    role_id, permission_id, user_id = setup
+    
+    assert client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers).status_code == 200
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
+    
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert permission_id in effective_ids(client, admin_headers, user_id)
+    
+    assert client.delete(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
+    
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert permission_id in effective_ids(client, admin_headers, user_id)
+    
+    assert client.delete(f"/api/roles/users/{user_id}/remove/{role_id}", headers=admin_headers).status_code == 200
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
+
+def test_duplicate_assignment_is_rejected(client, admin_headers, setup):
+    """重复分配同一角色返回400，投影不变"""
+    role_id, permission_id, user_id = setup
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers).status_code == 200
+    
+    response = client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers)
+    assert response.status_code == 400
+    assert "用户已拥有该角色" in response.json()["detail"]
+    assert effective_ids(client, admin_headers, user_id).count(permission_id) == 1
+
+def test_user_activation_changes(client, admin_headers, setup):
+    """停用用户后不再拥有有效权限，重新启用后恢复"""
+    role_id, permission_id, user_id = setup
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers).status_code == 200
+    assert permission_id in effective_ids(client, admin_headers, user_id)
+    
+    assert client.put(f"/api/users/{user_id}", json={"is_active": False}, headers=admin_headers).status_code == 200
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
+    
+    assert client.put(f"/api/users/{user_id}", json={"is_active": True}, headers=admin_headers).status_code == 200
+    assert permission_id in effective_ids(client, admin_headers, user_id)
+
+def test_deactivate_users_job(client, admin_headers, db, setup):
+    """批量停用任务同步移除有效权限"""
+    role_id, permission_id, user_id = setup
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers).status_code == 200
+    
+    response = client.post("/api/jobs/", json={"type": "deactivate_users", "params": {"user_ids": [user_id]}}, headers=admin_headers)
+    assert response.status_code == 202, response.text
+    job_id = response.json()["id"]
+    
+    def finished():
+        db.rollback()
+        return db.get(Job, job_id, populate_existing=True).state == "succeeded"
+    
+    wait_for(finished)
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
+
+def test_role_deactivation(client, admin_headers, setup):
+    """停用角色后通过该角色获得的权限失效"""
+    role_id, permission_id, user_id = setup
+    assert client.post(f"/api/roles/{role_id}/permissions/{permission_id}", headers=admin_headers).status_code == 200
+    assert client.post(f"/api/roles/users/{user_id}/assign/{role_id}", headers=admin_headers).status_code == 200
+    
+    assert client.put(f"/api/roles/{role_id}", json={"is_active": False}, headers=admin_headers).status_code == 200
+    assert permission_id not in effective_ids(client, admin_headers, user_id)
@@ -0,0 +1,61 @@
+import uuid
+from app.models.role import Role
+
+def idempotency_headers(headers: dict, **extra) -> dict:
+    return {**headers, "Idempotency-Key": uuid.uuid4().hex, **extra}
+
+def test_retry_replays_first_response(client, admin_headers, db):
+    """相同键的重试返回第一次的响应，不会再次执行"""
+    headers = idempotency_headers(admin_headers)
+    payload = {"name": "idem_replay", "display_name": "幂等重放"}
+    
+    first = client.post("/api/roles/", json=payload, headers=headers)
+    assert first.status_code == 201, first.text
+    assert "idempotent-replayed" not in first.headers
+    
+    second = client.post("/api/roles/", json=payload, headers=headers)
+    assert second.status_code == 201
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert db.query(Role).filter(Role.name == "idem_replay").count() == 1
+    
+    # 不带键的重复请求会真正执行，因唯一约束失败
+    assert client.post("/api/roles/", json=payload, headers=admin_headers).status_code == 400
+
+def test_key_reused_with_different_body(client, admin_headers):
+    """同一个键搭配不同的请求体返回422"""
+    headers = idempotency_headers(admin_headers)
+    assert client.post("/api/roles/", json={"name": "idem_a", "display_name": "幂等A"}, headers=headers).status_code == 201
+    
+    response = client.post("/api/roles/", json={"name": "idem_b", "display_name": "幂等B"}, headers=headers)
+    assert response.status_code == 422
+
+def test_key_reused_with_different_format(client, admin_headers):
+    """同一个键以不同的响应格式重试返回422"""
+    headers = idempotency_headers(admin_headers)
+    payload = {"name": "idem_format", "display_name": "幂等格式"}
+    assert client.post("/api/roles/", json=payload, headers=headers).status_code == 201
+    
+    response = client.post("/api/roles/", json=payload, headers={**headers, "Accept": "application/msgpack"})
+    assert response.status_code == 422
+
+def test_error_responses_are_replayed(client, admin_headers):
+    """4xx响应同样保存，重试得到相同的错误"""
+    headers = idempotency_headers(admin_headers)
+    payload = {"name": "idem_error", "display_name": "幂等错误"}
+    assert client.post("/api/roles/", json=payload, headers=admin_headers).status_code == 201
+    
+    first = client.post("/api/roles/", json=payload, headers=headers)
+    assert first.status_code == 400
+    second = client.post("/api/roles/", json=payload, headers=headers)
+    assert second.status_code == 400
+    assert second.headers["idempotent-replayed"] == "true"
+
+def test_invalid_key_is_rejected(client, admin_headers):
+    """超长的键返回400"""
+    response = client.post(
+        "/api/roles/",
+        json={"name": "idem_long", "display_name": "幂等超长"},
+        headers={**admin_headers, "Idempotency-Key": "k" * 256}
+    )
+    assert response.status_code == 400
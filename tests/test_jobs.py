@@ -0,0 +1,109 @@
+import os
+from sqlalchemy import insert, select
+from conftest import wait_for
+from app.config import settings
+from app.jobs import job_runner
+from app.models.job import Job
+from app.models.user import User
+
+def create_users(db, prefix: str, count: int):
+    """直接写入一批用户，返回ID列表"""
+    user_ids = db.execute(
+        insert(User).returning(User.id),
+        [
+            {"username": f"{prefix}{i}", "email": f"{prefix}{i}@example.com", "hashed_password": "x"}
+            for i in range(count)
+        ]
+    ).scalars().all()
+    db.commit()
+    return sorted(user_ids)
+
+def submit_deactivate(client, headers, user_ids):
+    response = client.post("/api/jobs/", json={"type": "deactivate_users", "params": {"user_ids": user_ids}}, headers=headers)
+    assert response.status_code == 202, response.text
+    return response.json()
+
+def get_job(client, headers, job_id):
+    response = client.get(f"/api/jobs/{job_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def wait_for_job(client, headers, job_id, condition):
+    """轮询任务直到满足条件，返回任务"""
+    def check():
+        job = get_job(client, headers, job_id)
+        return job if condition(job) else None
+    return wait_for(check)
+
+def active_count(db, user_ids):
+    db.rollback()
+    return len(db.execute(select(User.id).where(User.id.in_(user_ids), User.is_active == True)).all())
+
+def test_job_runs_to_completion(client, admin_headers, db):
+    """任务从pending经running到succeeded，记录进度和结果"""
+    user_ids = create_users(db, "job_done_", 3)
+    job = submit_deactivate(client, admin_headers, user_ids)
+    assert job["state"] in ("pending", "running")
+    
+    job = wait_for_job(client, admin_headers, job["id"], lambda job: job["state"] == "succeeded")
+    assert job["progress"] == job["total"] == 3
+    assert job["result"] == {"deactivated": 3}
+    assert job["started_at"] is not None and job["finished_at"] is not None
+    assert active_count(db, user_ids) == 0
+
+def test_cancel_pending_job(client, admin_headers, db, monkeypatch):
+    """等待中的任务取消后直接结束，之后不会再被认领执行"""
+    monkeypatch.setattr(job_runner, "submit", lambda job_id: None)
+    user_ids = create_users(db, "job_pending_", 2)
+    job = submit_deactivate(client, admin_headers, user_ids)
+    assert job["state"] == "pending"
+    
+    response = client.post(f"/api/jobs/{job['id']}/cancel", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["state"] == "cancelled"
+    
+    job_runner._run(job["id"])
+    assert get_job(client, admin_headers, job["id"])["state"] == "cancelled"
+    assert active_count(db, user_ids) == 2
+
+def test_cancel_running_job(client, admin_headers, db, monkeypatch):
+    """运行中的任务在下一个分块边界停止，已提交的分块保留"""
+    monkeypatch.setattr(settings, "job_chunk_size", 1)
+    monkeypatch.setattr(settings, "job_chunk_pause_ms", 100.0)
+    user_ids = create_users(db, "job_running_", 20)
+    job = submit_deactivate(client, admin_headers, user_ids)
+    
+    wait_for_job(client, admin_headers, job["id"], lambda job: job["state"] == "running" and job["progress"] >= 1)
+    response = client.post(f"/api/jobs/{job['id']}/cancel", headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json()["cancel_requested"] is True
+    
+    job = wait_for_job(client, admin_headers, job["id"], lambda job: job["state"] == "cancelled")
+    assert 1 <= job["progress"] < 20
+    assert active_count(db, user_ids) == 20 - job["progress"]
+
+def test_cancel_finished_job(client, admin_headers, db):
+    """已结束的任务不能取消"""
+    job = submit_deactivate(client, admin_headers, create_users(db, "job_finished_", 1))
+    wait_for_job(client, admin_headers, job["id"], lambda job: job["state"] == "succeeded")
+    
+    response = client.post(f"/api/jobs/{job['id']}/cancel", headers=admin_headers)
+    assert response.status_code == 400
+
+def test_reap_jobs_of_previous_process(db):
+    """本机同一进程ID但启动ID不同（进程已重启）的运行中任务标记为失败"""
+    job_id = db.execute(
+        insert(Job).values(
+            type="rebuild_effective_permissions",
+            params={},
+            state="running",
+            owner=f"{job_runner.host}:{os.getpid()}:previous"
+        ).returning(Job.id)
+    ).scalar_one()
+    db.commit()
+    
+    assert job_id in job_runner.reap_orphaned_jobs()
+    db.rollback()
+    job = db.get(Job, job_id, populate_existing=True)
+    assert job.state == "failed"
+    assert job.error == "任务执行中断"
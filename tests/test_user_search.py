@@ -0,0 +1,78 @@
+import pytest
+from sqlalchemy import insert, select
+from app.database import SessionLocal
+from app.models.user import User
+from app.services.user_service import RANK_EXACT, RANK_PREFIX, RANK_SUBSTRING, MIN_SUBSTRING_QUERY_LENGTH
+
+NAMES = ["srchbob", "srchbobby", "asrchbob", "x_srchbob_x", "Srchbob", "srch%b", "srch_b", "srchb", "carol"]
+
+@pytest.fixture(scope="module", autouse=True)
+def search_users(client):
+    """写入一批用户名、邮箱、全名互相交叠的用户"""
+    session = SessionLocal()
+    try:
+        session.execute(insert(User), [
+            {
+                "username": f"{NAMES[i % len(NAMES)]}{i}" if i >= len(NAMES) else NAMES[i],
+                "email": f"srchbob{i}@example.com" if i % 5 == 0 else f"m{i}@example.com",
+                "full_name": None if i % 4 == 0 else ("SRCHBOB" if i % 7 == 0 else f"name {i}"),
+                "hashed_password": "x",
+            }
+            for i in range(120)
+        ])
+        session.commit()
+    finally:
+        session.close()
+
+def expected_ids(db, q: str):
+    """按搜索规则在Python中计算的期望结果：(等级, ID)排序"""
+    term = q.strip().lower()
+    matches = []
+    for user_id, *values in db.execute(select(User.id, User.username, User.email, User.full_name)):
+        values = [value.lower() for value in values if value is not None]
+        if term in values:
+            rank = RANK_EXACT
+        elif any(value.startswith(term) for value in values):
+            rank = RANK_PREFIX
+        elif len(term) >= MIN_SUBSTRING_QUERY_LENGTH and any(term in value for value in values):
+            rank = RANK_SUBSTRING
+        else:
+            continue
+        matches.append((rank, user_id))
+    return [user_id for _, user_id in sorted(matches)]
+
+def search_all(client, headers, q: str, limit: int):
+    """沿游标翻完所有页"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        params = {"q": q, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/users/search", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body["items"]) <= limit
+        ids.extend(item["id"] for item in body["items"])
+        pages += 1
+        cursor = body["next_cursor"]
+        if not cursor:
+            return ids, pages
+
+@pytest.mark.parametrize("q", ["srchbob", "SrchBob", "srch", "sr", "srch%", "srch_", "example.com", "zzz"])
+@pytest.mark.parametrize("limit", [1, 3, 7, 100])
+def test_cursor_paging_matches_ranking(client, admin_headers, db, q, limit):
+    """各页拼接后与完全匹配、前缀匹配、子串匹配的排序一致，且没有重复或遗漏"""
+    expected = expected_ids(db, q)
+    ids, pages = search_all(client, admin_headers, q, limit)
+    assert ids == expected
+    assert pages == max(1, -(-len(expected) // limit))
+
+def test_short_query_skips_substring_tier(client, admin_headers, db):
+    """短于三元组长度的关键字不做子串匹配"""
+    ids, _ = search_all(client, admin_headers, "rc", 100)
+    assert ids == expected_ids(db, "rc") == []
+
+def test_invalid_cursor_is_rejected(client, admin_headers):
+    """无法解析的游标返回400"""
+    response = client.get("/api/users/search", params={"q": "srch", "cursor": "not-a-cursor"}, headers=admin_headers)
+    assert response.status_code == 400